@@ -1 +1,4 @@
 # App package - FastAPI app is loaded via uvicorn app.main:app
+import time
+
+IMPORT_STARTED = time.perf_counter()  # app.main reports its import time against this for /ready
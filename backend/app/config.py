@@ -15,6 +15,39 @@ class Settings(BaseSettings):
     legal_generation_limit: int = 64
     legal_generation_window_minutes: int = 60
     default_steps: int = 16
+    model_inference_mode: str = "eager"  # eager | scripted | quantized (see models/export.py)
+    model_reload_interval_seconds: float = 30.0  # 0 disables checkpoint hot swap
+    model_keep_versions: int = 3
+    generation_batch_max_items: int = 16
+    pattern_cache_size: int = 1024
+    pattern_cache_dir: str | None = None  # shared on-disk tier for all workers, e.g. backend/var/pattern_cache
+    pattern_cache_disk_max_entries: int = 50_000
+    pattern_reservoir_max_depth: int = 32  # ready patterns per (style, section, steps, temperature); 0 disables
+    pattern_reservoir_min_depth: int = 4
+    pattern_reservoir_max_slots: int = 64
+    pattern_reservoir_demand_window_seconds: float = 300.0
+    pattern_reservoir_idle_ms: float = 250.0  # refill only after live inference has been quiet this long
+    pattern_reservoir_batch_size: int = 8
+    pattern_reservoir_refill_interval_seconds: float = 0.5
+    warmup_on_startup: bool = True  # False: models load on the first request that needs them
+    warmup_retry_seconds: float = 10.0  # first retry delay for a failed warm-up step; doubles up to 5 minutes
+    inference_batch_max_size: int = 16
+    inference_batch_max_wait_ms: float = 5.0
+    db_pool_workers: int = 8
+    db_pool_max_queue: int = 64
+    inference_pool_workers: int = 2
+    inference_pool_max_queue: int = 32
+    subscription_cache_size: int = 4096
+    subscription_cache_ttl_seconds: float = 60.0
+    telemetry_batch_size: int = 100
+    telemetry_flush_interval_seconds: float = 2.0
+    telemetry_max_queue: int = 10000
+    telemetry_max_overflow: int = 1000  # rows waiting for the flush thread to spill them
+    telemetry_spill_path: str = str(Path(__file__).resolve().parent.parent / "var" / "telemetry_spill.jsonl")
+    telemetry_max_attempts: int = 8  # then the row moves to telemetry_spill.dead.jsonl
+    training_job_max_concurrent: int = 1
+    training_job_history: int = 50
+    training_job_log_dir: str = str(Path(__file__).resolve().parent.parent / "var" / "training_jobs")
 
     model_config = SettingsConfigDict(
         env_file=".env",
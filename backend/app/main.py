@@ -1,11 +1,27 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from . import IMPORT_STARTED
 from .config import settings
 from .routers import feedback, generation, learning, training, drums, subscriptions, payments
-from .services.inference import get_inference_engine
+from .services.database import database_gateway_started, get_database_gateway
+from .services.drum_service import get_drum_batcher, warm_drum_service
+from .services.executors import executor_metrics, run_db, run_inference, shutdown_executors
+from .services.inference import get_inference_engine, inference_engine_started
+from .services.pattern_cache import pattern_cache_stats
+from .services.pattern_reservoir import pattern_reservoir_stats
+from .services.subscriptions import subscription_cache_stats
+from .services.training_jobs import get_training_job_runner, shutdown_training_jobs
+from .services.warmup import get_warmup_tracker
+
+# Torch, Supabase and Stripe are imported lazily by the services that use them,
+# so this covers FastAPI and the app's own modules (see app/startup_profile.py).
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
 app = FastAPI(title="Beat Addicts AI Engine", version="0.1.0", description="Local-first AI engine for Pulse")
 
@@ -28,10 +44,39 @@ app.include_router(subscriptions.router, prefix="/subscriptions", tags=["subscri
 app.include_router(payments.router, prefix="/payments", tags=["payments"])
 
 
+async def _warm_inference() -> None:
+    engine = await run_inference(get_inference_engine)  # constructing the engine imports torch
+    # Background tasks start before the load: the watcher's reload retries a failed first
+    # load, and the producer waits until the engine is loaded. Both ignore repeated starts.
+    engine.start_model_watcher(settings.model_reload_interval_seconds)
+    engine.start_reservoir_producer(settings.pattern_reservoir_refill_interval_seconds)
+    await engine.ensure_loaded()
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
-    engine = get_inference_engine()
-    await engine.ensure_loaded()
+    """Start serving immediately; models warm up in the background (see ``/ready``)."""
+    if settings.warmup_on_startup:
+        get_warmup_tracker().start({
+            "database": lambda: run_db(get_database_gateway),
+            "inference": _warm_inference,
+            "drums": warm_drum_service,
+        })
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    await get_warmup_tracker().stop()
+    engine = inference_engine_started()
+    if engine is not None:
+        await engine.stop_model_watcher()
+        await engine.stop_reservoir_producer()
+    await get_drum_batcher().stop()
+    shutdown_executors()
+    shutdown_training_jobs()
+    database = database_gateway_started()
+    if database is not None:
+        database.flush()
 
 
 @app.get("/")
@@ -46,16 +91,62 @@ async def root() -> dict:
 
 @app.get("/health")
 async def healthcheck() -> dict:
-    from .services.database import get_database_gateway
-    db = get_database_gateway()
-    return {"status": "ok", "supabase": db.is_enabled()}
+    """Liveness: answers as soon as the process serves requests, even while models warm up."""
+    db = database_gateway_started()
+    return {"status": "ok", "supabase": db is not None and db.is_enabled()}
+
+
+@app.get("/ready")
+async def readiness() -> JSONResponse:
+    """Readiness: 200 once every warm-up step has finished, 503 before that."""
+    report = get_warmup_tracker().report()
+    report["import_seconds"] = round(IMPORT_SECONDS, 3)
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@app.get("/admin/metrics")
+async def metrics() -> dict:
+    """Runtime counters: pool queue depth, batching and cache hit rates, reservoir depth, training jobs, model latency."""
+    return {
+        "executors": executor_metrics(),
+        "drum_batcher": get_drum_batcher().stats(),
+        "subscription_cache": subscription_cache_stats(),
+        "pattern_cache": pattern_cache_stats(),
+        "pattern_reservoir": pattern_reservoir_stats(),
+        "telemetry": db.sink.stats() if (db := database_gateway_started()) and db.sink else None,
+        "training_jobs": get_training_job_runner().stats(),
+        "models": engine.registry.stats() if (engine := inference_engine_started()) else None,
+    }
+
+
+@app.get("/admin/models")
+async def model_versions() -> dict:
+    """Known model versions with metadata, hash, serving state and latency."""
+    registry = (await run_inference(get_inference_engine)).registry  # constructing the engine imports torch
+    return {"active": registry.stats()["active"], "versions": registry.versions()}
+
+
+@app.post("/admin/models/reload")
+async def reload_model() -> dict:
+    engine = await run_inference(get_inference_engine)
+    swapped = await engine.reload_model()
+    return {"success": True, "swapped": swapped, "active": engine.registry.active.version}
+
+
+@app.post("/admin/models/rollback")
+async def rollback_model(version: str | None = None) -> dict:
+    try:
+        engine = await run_inference(get_inference_engine)
+        restored = await engine.rollback_model(version)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0]))
+    return {"success": True, "active": restored}
 
 
 @app.get("/admin/db-status")
 async def db_status() -> dict:
     """Check which Supabase tables exist."""
-    from .services.database import get_database_gateway
-    db = get_database_gateway()
+    db = await run_db(get_database_gateway)
     if not db.is_enabled():
         return {"connected": False, "tables": {}}
 
@@ -63,13 +154,16 @@ async def db_status() -> dict:
         "users", "subscription_tiers", "user_subscriptions",
         "generation_usage", "addons", "user_addons", "content_ownership",
     ]
-    status = {}
-    for t in tables:
+    def probe(table: str) -> str:
         try:
-            db.client.table(t).select("*").limit(1).execute()
-            status[t] = "ok"
+            db.client.table(table).select("*").limit(1).execute()
+            return "ok"
         except Exception:
-            status[t] = "missing"
+            return "missing"
+
+    status = {}
+    for t in tables:
+        status[t] = await run_db(probe, t)
 
     return {"connected": True, "tables": status, "ready": all(v == "ok" for v in status.values())}
 
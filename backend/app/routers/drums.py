@@ -5,8 +5,9 @@ from typing import Optional
 from fastapi import APIRouter
 from pydantic import BaseModel
 
-from ..services.drum_service import create_drum_pattern
-from ..services.subscriptions import check_generation_allowed, increment_usage
+from ..services.drum_service import create_drum_pattern_batched
+from ..services.executors import run_db
+from ..services.subscriptions import consume_generation
 
 router = APIRouter()
 
@@ -19,15 +20,14 @@ class DrumGenerateRequest(BaseModel):
 async def generate_drums(request: DrumGenerateRequest = DrumGenerateRequest()) -> dict:
     tier_meta = {}
     if request.user_id:
-        check_generation_allowed(request.user_id)
-        updated = increment_usage(request.user_id)
+        updated = await run_db(consume_generation, request.user_id)
         tier_meta = {
             "tier_id": updated.tier_id,
             "owns_creation": updated.owns_creations,
             "generations_remaining": updated.remaining,
         }
 
-    pattern = create_drum_pattern()
+    pattern = await create_drum_pattern_batched()
     return {"success": True, "pattern": pattern, **tier_meta}
 
 SUPABASE_SERVICE_KEY = "eyJhbGciOi...your-full-key-here..."
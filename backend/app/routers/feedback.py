@@ -2,15 +2,15 @@ from fastapi import APIRouter
 
 from ..schemas import FeedbackPayload, MidiUploadPayload
 from ..services.database import get_database_gateway
+from ..services.executors import run_db
 
 router = APIRouter()
 
-database = get_database_gateway()
-
 
 @router.post("/pattern")
 async def pattern_feedback(payload: FeedbackPayload):
     eligible_for_training = payload.accepted and payload.user.opted_in
+    database = await run_db(get_database_gateway)
     if database.is_enabled():
         database.store_pattern_feedback({
             "pattern_id": payload.pattern_id,
@@ -26,8 +26,9 @@ async def pattern_feedback(payload: FeedbackPayload):
 
 @router.post("/midi")
 async def upload_midi(payload: MidiUploadPayload):
+    database = await run_db(get_database_gateway)
     if database.is_enabled():
-        database.store_midi_asset({
+        await run_db(database.store_midi_asset, {
             "name": payload.name,
             "data": payload.data,
             "url": payload.url,
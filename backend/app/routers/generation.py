@@ -1,6 +1,13 @@
-from fastapi import APIRouter, Depends
+import json
+from typing import Any, AsyncIterator, Dict
 
-from ..schemas import GenerationRequest
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from ..config import settings
+from ..schemas import BatchGenerationRequest, GenerationRequest
+from ..services.executors import run_inference
 from ..services.inference import get_inference_engine, InferenceEngine
 
 router = APIRouter()
@@ -25,7 +32,63 @@ async def generate_chords(request: GenerationRequest, engine: InferenceEngine =
     return await _generate_section("chords", request, engine)
 
 
+def _arrangement_summary(request: GenerationRequest):
+    return request.sections or (request.metadata.get("sections") if request.metadata else None)
+
+
 @router.post("/arrangement")
 async def generate_arrangement(request: GenerationRequest, engine: InferenceEngine = Depends(get_inference_engine)):
-    summary = request.sections or (request.metadata.get("sections") if request.metadata else None)
-    return await engine.generate_arrangement(request, summary)
+    return await engine.generate_arrangement(request, _arrangement_summary(request))
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.post("/arrangement/stream")
+async def stream_arrangement(request: GenerationRequest, engine: InferenceEngine = Depends(get_inference_engine)):
+    """Server-sent events: the skeleton first, then one ``section`` event per arrangement section."""
+    events = engine.stream_arrangement(request, _arrangement_summary(request))
+    skeleton = await anext(events)  # charges quota, so a 429 is still a plain HTTP error
+
+    async def body() -> AsyncIterator[str]:
+        yield _sse(skeleton)
+        try:
+            async for event in events:
+                yield _sse(event)
+        except Exception as exc:  # headers are already sent; report the failure in-band
+            yield _sse({"event": "error", "detail": str(exc)})
+
+    return StreamingResponse(
+        body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/arrangement/ws")
+async def arrangement_socket(websocket: WebSocket):
+    """WebSocket variant: send one GenerationRequest as JSON, receive the same events as the SSE stream."""
+    await websocket.accept()
+    try:
+        request = GenerationRequest.model_validate(await websocket.receive_json())
+        engine = await run_inference(get_inference_engine)  # constructing the engine imports torch
+        async for event in engine.stream_arrangement(request, _arrangement_summary(request)):
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        return
+    except ValidationError as exc:
+        await websocket.send_json({"event": "error", "status": 422, "detail": json.loads(exc.json())})
+        await websocket.close(code=1008)
+        return
+    except HTTPException as exc:
+        await websocket.send_json({"event": "error", "status": exc.status_code, "detail": exc.detail})
+        await websocket.close(code=1008)
+        return
+    await websocket.close()
+
+
+@router.post("/batch")
+async def generate_batch(request: BatchGenerationRequest, engine: InferenceEngine = Depends(get_inference_engine)):
+    """Generate several sections for one quota charge and one batched forward pass."""
+    if len(request.items) > settings.generation_batch_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.generation_batch_max_items} items per batch")
+    return await engine.generate_batch(request)
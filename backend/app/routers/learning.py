@@ -2,15 +2,15 @@ from fastapi import APIRouter
 
 from ..schemas import PreferencePayload
 from ..services.database import get_database_gateway
+from ..services.executors import run_db
 
 router = APIRouter()
 
-database = get_database_gateway()
-
 
 @router.post("/preferences")
 async def sync_preferences(payload: PreferencePayload):
     synced = False
+    database = await run_db(get_database_gateway)
     if payload.user.opted_in and database.is_enabled():
         synced = database.store_preference_profile({
             "style": payload.style,
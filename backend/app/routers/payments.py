@@ -2,25 +2,24 @@
 from __future__ import annotations
 
 import logging
+from types import ModuleType
 from typing import Optional
 
-import stripe
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
 from ..config import settings
-from ..services.subscriptions import ADDONS, TIERS
+from ..services.subscriptions import ADDONS, TIERS, invalidate_user_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # ── Initialise Stripe ────────────────────────────────────────
+# The SDK is imported on the first payment request (see _stripe_sdk) so it
+# stays off the app's cold-start path.
 
-if settings.stripe_secret_key:
-    stripe.api_key = settings.stripe_secret_key
-    logger.info("Stripe SDK initialised")
-else:
+if not settings.stripe_secret_key:
     logger.warning("STRIPE_SECRET_KEY not set – payment endpoints will fail")
 
 
@@ -72,6 +71,7 @@ async def stripe_status():
     configured = bool(settings.stripe_secret_key)
     if not configured:
         return {"stripe": False, "message": "STRIPE_SECRET_KEY not set"}
+    stripe = _stripe_sdk()
     try:
         acct = stripe.Account.retrieve()
         return {
@@ -87,7 +87,7 @@ async def stripe_status():
 @router.post("/create-checkout", response_model=CheckoutResponse)
 async def create_checkout(req: CreateCheckoutRequest):
     """Create a Stripe Checkout Session for a tier upgrade or add‑on."""
-    _require_stripe()
+    stripe = _require_stripe()
 
     if req.tier_id and req.addon_id:
         raise HTTPException(400, "Specify either tier_id or addon_id, not both")
@@ -157,7 +157,7 @@ async def create_checkout(req: CreateCheckoutRequest):
 @router.post("/sync-products", response_model=CreateProductsResponse)
 async def sync_stripe_products():
     """Create / sync Beat Addicts tier & add-on products in Stripe."""
-    _require_stripe()
+    stripe = _require_stripe()
 
     created_products = 0
     created_prices = 0
@@ -213,6 +213,7 @@ async def stripe_webhook(request: Request):
     sig_header = request.headers.get("stripe-signature")
 
     if settings.stripe_webhook_secret and sig_header:
+        stripe = _stripe_sdk()
         try:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, settings.stripe_webhook_secret
@@ -234,10 +235,13 @@ async def stripe_webhook(request: Request):
             session.get("metadata", {}).get("addon_id"),
         )
         # Activate subscription in Supabase (subscribe_user / subscribe_addon)
+        _invalidate_entitlements(session)
 
     elif event_type == "customer.subscription.deleted":
         logger.info("Subscription cancelled via Stripe")
         # Handle cancellation logic
+        subscription = event.get("data", {}).get("object", {}) if isinstance(event, dict) else event.data.object
+        _invalidate_entitlements(subscription)
 
     return {"received": True}
 
@@ -245,6 +249,22 @@ async def stripe_webhook(request: Request):
 # ── Helpers ──────────────────────────────────────────────────
 
 
-def _require_stripe():
+def _invalidate_entitlements(stripe_object) -> None:
+    user_id = (stripe_object.get("metadata") or {}).get("user_id")
+    if user_id:
+        invalidate_user_cache(user_id)
+
+
+def _stripe_sdk() -> ModuleType:
+    import stripe
+
+    if settings.stripe_secret_key and stripe.api_key != settings.stripe_secret_key:
+        stripe.api_key = settings.stripe_secret_key
+        logger.info("Stripe SDK initialised")
+    return stripe
+
+
+def _require_stripe() -> ModuleType:
     if not settings.stripe_secret_key:
         raise HTTPException(503, "Stripe is not configured (STRIPE_SECRET_KEY missing)")
+    return _stripe_sdk()
@@ -16,6 +16,7 @@ from ..schemas import (
     UsageInfo,
     UserProfile,
 )
+from ..services.executors import run_db
 from ..services.subscriptions import (
     ADDONS,
     TIERS,
@@ -55,7 +56,7 @@ async def get_tier(tier_id: str):
 @router.post("/register", response_model=UserProfile)
 async def register(request: RegisterRequest):
     """Register a new user (no email validation). Auto-assigned free tier."""
-    user = register_user(request.display_name, request.email)
+    user = await run_db(register_user, request.display_name, request.email)
     tier = TIERS["free"]
     return UserProfile(
         id=user["id"],
@@ -81,7 +82,7 @@ async def register(request: RegisterRequest):
 @router.post("/subscribe", response_model=SubscriptionResponse)
 async def subscribe(request: SubscribeRequest):
     """Subscribe or change a user's plan."""
-    sub = subscribe_user(request.user_id, request.tier_id)
+    sub = await run_db(subscribe_user, request.user_id, request.tier_id)
     tier = TIERS[sub.tier_id]
     return SubscriptionResponse(subscription=sub, tier=tier)
 
@@ -89,7 +90,7 @@ async def subscribe(request: SubscribeRequest):
 @router.get("/subscription/{user_id}", response_model=SubscriptionResponse)
 async def get_subscription(user_id: str):
     """Get a user's current subscription and tier details."""
-    sub = get_user_subscription(user_id)
+    sub = await run_db(get_user_subscription, user_id)
     if sub is None:
         # Default to free
         tier = TIERS["free"]
@@ -107,7 +108,7 @@ async def get_subscription(user_id: str):
 @router.get("/usage/{user_id}", response_model=UsageInfo)
 async def usage(user_id: str):
     """Get the user's generation usage for the current billing period."""
-    return get_usage(user_id)
+    return await run_db(get_usage, user_id)
 
 
 # ── User profile ────────────────────────────────────────────
@@ -116,9 +117,9 @@ async def usage(user_id: str):
 @router.get("/profile/{user_id}", response_model=UserProfile)
 async def profile(user_id: str):
     """Get full user profile: tier, add-ons, and usage."""
-    tier = get_user_tier(user_id)
-    addons = get_user_addons(user_id)
-    usage_info = get_usage(user_id)
+    tier = await run_db(get_user_tier, user_id)
+    addons = await run_db(get_user_addons, user_id)
+    usage_info = await run_db(get_usage, user_id)
     return UserProfile(
         id=user_id,
         tier=tier,
@@ -139,7 +140,7 @@ async def list_addons():
 @router.post("/addons/subscribe", response_model=AddonResponse)
 async def addon_subscribe(request: AddonSubscribeRequest):
     """Subscribe to an add-on. Validates tier requirements."""
-    addon_sub = subscribe_addon(request.user_id, request.addon_id)
+    addon_sub = await run_db(subscribe_addon, request.user_id, request.addon_id)
     info = ADDONS[request.addon_id]
     return AddonResponse(addon=addon_sub, info=info)
 
@@ -147,7 +148,7 @@ async def addon_subscribe(request: AddonSubscribeRequest):
 @router.post("/addons/cancel", response_model=AddonResponse)
 async def addon_cancel(request: AddonSubscribeRequest):
     """Cancel an active add-on."""
-    addon_sub = cancel_addon(request.user_id, request.addon_id)
+    addon_sub = await run_db(cancel_addon, request.user_id, request.addon_id)
     info = ADDONS[request.addon_id]
     return AddonResponse(addon=addon_sub, info=info)
 
@@ -155,4 +156,4 @@ async def addon_cancel(request: AddonSubscribeRequest):
 @router.get("/addons/{user_id}", response_model=List[AddonInfo])
 async def user_addons(user_id: str):
     """List a user's active add-ons."""
-    return get_user_addons(user_id)
+    return await run_db(get_user_addons, user_id)
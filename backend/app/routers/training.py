@@ -1,12 +1,12 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query
 
-from ..schemas import TrainingBatchPayload
+from ..schemas import TrainingBatchPayload, TrainingRunRequest
 from ..services.database import get_database_gateway
+from ..services.executors import run_db
+from ..services.training_jobs import get_training_job_runner
 
 router = APIRouter()
 
-database = get_database_gateway()
-
 
 @router.post("/batch")
 async def submit_training_batch(payload: TrainingBatchPayload):
@@ -17,14 +17,45 @@ async def submit_training_batch(payload: TrainingBatchPayload):
         "metadata": payload.metadata,
         "eligible_for_training": eligible,
     }
+    database = await run_db(get_database_gateway)
     if database.is_enabled():
         database.store_training_batch(record)
     return {"success": True, "eligible_for_training": eligible}
 
 
 @router.post("/run")
-async def run_training_job(task: BackgroundTasks):
-    from ...training.trainer import schedule_training_job
+async def run_training_job(payload: TrainingRunRequest | None = None):
+    """Queue a training run in a subprocess; identical active requests share one job."""
+    payload = payload or TrainingRunRequest()
+    params = payload.model_dump(exclude={"kind"}, exclude_none=True)
+    job, created = get_training_job_runner().submit(payload.kind, params)
+    return {"success": True, "job_id": job.id, "status": job.status, "deduplicated": not created}
+
+
+@router.get("/jobs")
+async def list_training_jobs():
+    return {"jobs": [job.to_dict() for job in get_training_job_runner().list()]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    job = get_training_job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/logs")
+async def get_training_job_logs(job_id: str, tail: int = Query(default=100, ge=1, le=1000)):
+    lines = get_training_job_runner().logs(job_id, tail=tail)
+    if lines is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return {"job_id": job_id, "lines": lines}
+
 
-    task.add_task(schedule_training_job)
-    return {"success": True, "status": "scheduled"}
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_training_job(job_id: str):
+    job = get_training_job_runner().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return {"success": True, "job_id": job.id, "status": job.status}
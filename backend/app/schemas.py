@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field, ConfigDict
 from enum import Enum
 
@@ -147,10 +147,14 @@ class PatternPayload(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+# Sampling runs attention over every step, so the cost grows quadratically with ``steps``.
+MAX_GENERATION_STEPS = 256
+
+
 class GenerationRequest(BaseModel):
     style: str
     bpm: int = 128
-    steps: int = 16
+    steps: int = Field(default=16, ge=1, le=MAX_GENERATION_STEPS)
     temperature: float = 0.65
     seed: Optional[int] = None
     user: UserContext
@@ -162,6 +166,18 @@ class GenerationRequest(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+class BatchGenerationItem(BaseModel):
+    section: Literal["drums", "bassline", "melody", "chords", "arrangement"]
+    steps: Optional[int] = Field(default=None, ge=1, le=MAX_GENERATION_STEPS)
+    seed: Optional[int] = None
+    temperature: Optional[float] = None
+    sections: Optional[List[Dict[str, Any]]] = None
+
+
+class BatchGenerationRequest(GenerationRequest):
+    items: List[BatchGenerationItem] = Field(min_length=1)
+
+
 class PatternResponse(BaseModel):
     success: bool = True
     pattern: PatternPayload
@@ -197,6 +213,14 @@ class TrainingBatchPayload(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+class TrainingRunRequest(BaseModel):
+    kind: Literal["groove", "drums"] = "groove"
+    epochs: Optional[int] = Field(default=None, ge=1)
+    batch_size: Optional[int] = Field(default=None, ge=1)
+    learning_rate: Optional[float] = Field(default=None, gt=0)
+    seed: Optional[int] = None
+
+
 class PreferencePayload(BaseModel):
     style: str
     accepted: bool
@@ -1,2 +1,2 @@
 from .inference import get_inference_engine  # noqa: F401
-from .drum_service import create_drum_pattern  # noqa: F401
+from .drum_service import create_drum_pattern, create_drum_pattern_batched, warm_drum_service  # noqa: F401
@@ -0,0 +1,123 @@
+"""Asyncio micro-batching for model inference."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collect concurrent requests for a few milliseconds and run them as one batch.
+
+    ``runner`` receives the queued items in arrival order and must return one
+    result per item in the same order. Each caller awaits only its own slice.
+    When ``dispatch`` is given the runner is handed to it (e.g. ``run_inference``)
+    instead of being called on the event loop.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[Sequence[T]], Sequence[R]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        dispatch: Optional[Callable[..., Awaitable[Any]]] = None,
+    ) -> None:
+        self.runner = runner
+        self.dispatch = dispatch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue[Tuple[T, asyncio.Future[R]]]] = None
+        self._worker: Optional[asyncio.Task[None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: List[asyncio.Future[R]] = []
+        self.batches_run = 0
+        self.items_run = 0
+
+    async def submit(self, item: T) -> R:
+        queue = self._ensure_worker()
+        future: asyncio.Future[R] = asyncio.get_running_loop().create_future()
+        await queue.put((item, future))
+        return await future
+
+    async def stop(self) -> None:
+        """Cancel the worker and fail every queued or in-flight request instead of leaving it hanging."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        abandoned = list(self._in_flight)
+        if self._queue is not None:
+            while not self._queue.empty():
+                abandoned.append(self._queue.get_nowait()[1])
+        for future in abandoned:
+            if not future.done():
+                future.set_exception(RuntimeError("MicroBatcher stopped before the request ran"))
+        self._in_flight = []
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches_run,
+            "items": self.items_run,
+            "avg_batch_size": round(self.items_run / self.batches_run, 2) if self.batches_run else 0.0,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    def _ensure_worker(self) -> asyncio.Queue[Tuple[T, asyncio.Future[R]]]:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def _collect(self, queue: asyncio.Queue[Tuple[T, asyncio.Future[R]]]) -> List[Tuple[T, asyncio.Future[R]]]:
+        # Every dequeued future is recorded in ``_in_flight`` at once, so ``stop()``
+        # can fail it even while the batch is still being collected.
+        batch = [await queue.get()]
+        self._in_flight.append(batch[0][1])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            self._in_flight.append(batch[-1][1])
+        return batch
+
+    async def _execute(self, items: List[T]) -> Sequence[R]:
+        if self.dispatch is not None:
+            return await self.dispatch(self.runner, items)
+        return self.runner(items)
+
+    async def _run(self, queue: asyncio.Queue[Tuple[T, asyncio.Future[R]]]) -> None:
+        while True:
+            self._in_flight = []
+            batch = await self._collect(queue)
+            pending = [(item, future) for item, future in batch if not future.cancelled()]
+            if not pending:
+                continue
+            try:
+                results = await self._execute([item for item, _ in pending])
+                if len(results) != len(pending):
+                    raise RuntimeError(f"Batch runner returned {len(results)} results for {len(pending)} items")
+            except Exception as exc:  # propagate to every waiting caller
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.batches_run += 1
+            self.items_run += len(pending)
+            for (_, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
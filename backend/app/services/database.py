@@ -1,26 +1,43 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
-
-from supabase import Client, create_client
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from ..config import settings
+from .telemetry import TelemetrySink
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
 @dataclass
 class DatabaseGateway:
     client: Optional[Client] = None
     enabled: bool = False
+    sink: Optional[TelemetrySink] = field(default=None, repr=False)
 
     def __post_init__(self) -> None:
         if self.client is None and settings.supabase_url and settings.supabase_service_key:
             try:
+                from supabase import create_client  # deferred: only needed when Supabase is configured
+
                 self.client = create_client(settings.supabase_url, settings.supabase_service_key)
             except (RuntimeError, ValueError, Exception) as exc:
                 print(f"[Supabase] Failed to initialize client: {exc}")
                 self.client = None
         self.enabled = self.client is not None
+        if self.sink is None:
+            self.sink = TelemetrySink(
+                self._bulk_insert,
+                batch_size=settings.telemetry_batch_size,
+                flush_interval=settings.telemetry_flush_interval_seconds,
+                max_queue=settings.telemetry_max_queue,
+                max_overflow=settings.telemetry_max_overflow,
+                spill_path=settings.telemetry_spill_path,
+                max_attempts=settings.telemetry_max_attempts,
+            )
+        if self.enabled:
+            self.sink.start()  # drains a spill file left by an earlier process even if no new rows arrive
 
     def is_enabled(self) -> bool:
         return self.enabled and self.client is not None
@@ -35,20 +52,36 @@ class DatabaseGateway:
             print(f"[Supabase] Failed to insert into {table}: {exc}")
             return False
 
+    def _bulk_insert(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        if not self.is_enabled():
+            raise ConnectionError("Supabase client is not configured")
+        self.client.table(table).insert(rows).execute()
+
+    def _enqueue(self, table: str, payload: Dict[str, Any]) -> bool:
+        """Queue a telemetry row for the write-behind sink; returns without a round trip."""
+        if not self.is_enabled():
+            return False
+        return self.sink.enqueue(table, payload)
+
+    def flush(self) -> None:
+        """Drain queued telemetry rows (called on shutdown)."""
+        if self.sink is not None:
+            self.sink.drain()
+
     def log_generation(self, payload: Dict[str, Any]) -> bool:
-        return self._safe_insert("generation_events", payload)
+        return self._enqueue("generation_events", payload)
 
     def store_pattern_feedback(self, payload: Dict[str, Any]) -> bool:
-        return self._safe_insert("pattern_feedback", payload)
+        return self._enqueue("pattern_feedback", payload)
 
     def store_preference_profile(self, payload: Dict[str, Any]) -> bool:
-        return self._safe_insert("preference_profiles", payload)
+        return self._enqueue("preference_profiles", payload)
 
     def store_midi_asset(self, payload: Dict[str, Any]) -> bool:
         return self._safe_insert("midi_assets", payload)
 
     def store_training_batch(self, payload: Dict[str, Any]) -> bool:
-        return self._safe_insert("training_batches", payload)
+        return self._enqueue("training_batches", payload)
 
 
 class _GatewayHolder:
@@ -59,3 +92,8 @@ def get_database_gateway() -> DatabaseGateway:
     if _GatewayHolder.instance is None:
         _GatewayHolder.instance = DatabaseGateway()
     return _GatewayHolder.instance
+
+
+def database_gateway_started() -> DatabaseGateway | None:
+    """The gateway if something already created it; never connects to Supabase."""
+    return _GatewayHolder.instance
@@ -1,10 +1,51 @@
 from __future__ import annotations
 
-from inference.generate_drums import generate_drum_pattern
+from typing import Sequence
 
+from ..config import settings
+from .batching import MicroBatcher
+from .executors import run_inference
 
-def create_drum_pattern() -> list[dict[str, bool | int]]:
+DrumPattern = list[dict[str, bool | int]]
+
+
+def create_drum_pattern() -> DrumPattern:
     """Wrapper used by FastAPI endpoints to generate drum sequences."""
+    from inference.generate_drums import generate_drum_pattern
+
     return generate_drum_pattern()
 
-__all__ = ["create_drum_pattern"]
+
+def _run_drum_batch(thresholds: Sequence[float]) -> list[DrumPattern]:
+    from inference.generate_drums import generate_drum_patterns  # imports torch on first use
+
+    return generate_drum_patterns(list(thresholds), inference_mode=settings.model_inference_mode)
+
+
+class _BatcherHolder:
+    instance: MicroBatcher[float, DrumPattern] | None = None
+
+
+def get_drum_batcher() -> MicroBatcher[float, DrumPattern]:
+    if _BatcherHolder.instance is None:
+        _BatcherHolder.instance = MicroBatcher(
+            _run_drum_batch,
+            max_batch_size=settings.inference_batch_max_size,
+            max_wait_ms=settings.inference_batch_max_wait_ms,
+            dispatch=run_inference,
+        )
+    return _BatcherHolder.instance
+
+
+async def create_drum_pattern_batched(threshold: float = 0.5) -> DrumPattern:
+    """Queue a drum request so concurrent callers share one forward pass."""
+    return await get_drum_batcher().submit(threshold)
+
+
+async def warm_drum_service() -> None:
+    """Load the resident drum model so the first request only pays for the forward pass."""
+    from inference.generate_drums import warm_drum_model
+
+    await run_inference(warm_drum_model, inference_mode=settings.model_inference_mode)
+
+__all__ = ["create_drum_pattern", "create_drum_pattern_batched", "get_drum_batcher", "warm_drum_service"]
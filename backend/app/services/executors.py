@@ -0,0 +1,163 @@
+"""Bounded thread pools that keep blocking work off the event loop.
+
+Supabase calls go through the ``db`` pool and torch work through the
+``inference`` pool so a slow query never competes with a forward pass for
+the same workers. Each pool caps how much work may be queued; callers past
+the cap wait asynchronously instead of growing the backlog without limit.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from ..config import settings
+
+R = TypeVar("R")
+
+
+def _release_threadsafe(loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore) -> None:
+    try:
+        loop.call_soon_threadsafe(slots.release)
+    except RuntimeError:  # the loop already closed; nobody is left waiting for the slot
+        pass
+
+
+class _Ticket:
+    """Whether a submitted call has left the queue, so it is uncounted exactly once."""
+
+    __slots__ = ("dequeued",)
+
+    def __init__(self) -> None:
+        self.dequeued = False
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-pool")
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_queue_depth = 0
+
+    async def run(self, fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        slots = self._slots_for(asyncio.get_running_loop())
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+        loop = asyncio.get_running_loop()
+        ticket = _Ticket()
+        with self._lock:
+            self.queued += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queued)
+        # The slot is released when the call really finishes, not when the caller stops
+        # waiting: a cancelled caller cannot stop a call a worker thread already runs.
+        try:
+            future = self._pool.submit(self._call, ticket, fn, *args, **kwargs)
+        except RuntimeError:  # pool shut down
+            with self._lock:
+                self.queued -= 1
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: _release_threadsafe(loop, slots))
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                if not ticket.dequeued:  # cancelled before a worker picked it up
+                    ticket.dequeued = True
+                    self.queued -= 1
+
+    def _slots_for(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+            self._slots_loop = loop
+        return self._slots
+
+    def _call(self, ticket: "_Ticket", fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        with self._lock:
+            if not ticket.dequeued:
+                ticket.dequeued = True
+                self.queued -= 1
+            self.active += 1
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self.active -= 1
+                self.failed += 1
+            raise
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queued,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "peak_queue_depth": self.peak_queue_depth,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+class _ExecutorHolder:
+    db: BoundedExecutor | None = None
+    inference: BoundedExecutor | None = None
+
+
+def get_db_executor() -> BoundedExecutor:
+    if _ExecutorHolder.db is None:
+        _ExecutorHolder.db = BoundedExecutor("db", settings.db_pool_workers, settings.db_pool_max_queue)
+    return _ExecutorHolder.db
+
+
+def get_inference_executor() -> BoundedExecutor:
+    if _ExecutorHolder.inference is None:
+        _ExecutorHolder.inference = BoundedExecutor(
+            "inference", settings.inference_pool_workers, settings.inference_pool_max_queue
+        )
+    return _ExecutorHolder.inference
+
+
+async def run_db(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Run a blocking Supabase call on the DB pool."""
+    return await get_db_executor().run(fn, *args, **kwargs)
+
+
+async def run_inference(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Run torch loading or a forward pass on the inference pool."""
+    return await get_inference_executor().run(fn, *args, **kwargs)
+
+
+def executor_metrics() -> Dict[str, Dict[str, int]]:
+    return {
+        "db": get_db_executor().stats(),
+        "inference": get_inference_executor().stats(),
+    }
+
+
+def shutdown_executors() -> None:
+    for name in ("db", "inference"):
+        executor = getattr(_ExecutorHolder, name)
+        if executor is not None:
+            executor.shutdown(wait=True)
+            setattr(_ExecutorHolder, name, None)
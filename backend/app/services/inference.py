@@ -1,74 +1,361 @@
 from __future__ import annotations
 
+import asyncio
 import random
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, NamedTuple, Sequence, Tuple
 
 from ..config import settings
-from ..schemas import GenerationRequest
+from ..schemas import BatchGenerationRequest, GenerationRequest
 from ..services.database import get_database_gateway
+from ..services.executors import get_inference_executor, run_db, run_inference
 from ..services.legal import guard_inference_request
-from models import ModelRegistry
+from ..services.pattern_cache import get_pattern_cache, pattern_cache_key
+from ..services.pattern_reservoir import ReservoirKey, get_pattern_reservoir, reservoir_key
+
+if TYPE_CHECKING:
+    from models import ModelRegistry
+
+# Track name, prior hit density and the groove-model channel (a GM pitch) each lane reads.
+SECTION_BLUEPRINTS: Dict[str, Tuple[Tuple[str, float, int], ...]] = {
+    "drums": (
+        ("Kick", 0.8, 36),
+        ("Snare", 0.5, 38),
+        ("Hi-Hat", 0.9, 42),
+        ("Open Hat", 0.2, 46),
+        ("Crash", 0.1, 49),
+        ("Ride", 0.2, 51),
+        ("Clap", 0.3, 39),
+        ("Perc", 0.4, 37),
+    ),
+    "bassline": (("Bassline", 0.6, 33),),
+    "melody": (("Melody", 0.6, 72),),
+    "chords": (("Chords", 0.6, 60),),
+}
+
+# Parts streamed for every arrangement section (see InferenceEngine.stream_arrangement).
+STREAM_PARTS = ("drums", "bassline", "melody", "chords")
+
+
+def section_blueprint(section: str) -> Tuple[Tuple[str, float, int], ...]:
+    return SECTION_BLUEPRINTS.get(section, ((section.title(), 0.6, 60),))
+
+
+class PatternSpec(NamedTuple):
+    section: str
+    steps: int
+    seed: int
+    temperature: float
 
 
 class InferenceEngine:
     def __init__(self, model_dir: str | Path):
+        from models import ModelRegistry  # imports torch; deferred until the engine is first needed
+
         self.model_dir = Path(model_dir)
-        self.registry = ModelRegistry(self.model_dir)
+        self.registry: ModelRegistry = ModelRegistry(
+            self.model_dir, inference_mode=settings.model_inference_mode, keep_versions=settings.model_keep_versions
+        )
         self.loaded = False
         self.database = get_database_gateway()
+        self._load_lock: asyncio.Lock | None = None
+        self._watcher: asyncio.Task[None] | None = None
+        self._producer: asyncio.Task[None] | None = None
 
     async def ensure_loaded(self) -> None:
-        if not self.loaded:
-            self.registry.load_latest()
-            self.loaded = True
+        if self.loaded:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if not self.loaded:
+                await run_inference(self.registry.load_latest)
+                self.loaded = True
+
+    async def reload_model(self) -> bool:
+        """Swap in a newer checkpoint if there is one; returns True when the active version changed."""
+        await self.ensure_loaded()
+        return await run_inference(self.registry.refresh)
+
+    async def rollback_model(self, version: str | None = None) -> str:
+        await self.ensure_loaded()
+        restored = await run_inference(self.registry.rollback, version)
+        return restored.version
+
+    def start_model_watcher(self, interval: float) -> None:
+        """Poll for new checkpoints every ``interval`` seconds and hot-swap them in."""
+        if interval <= 0 or (self._watcher is not None and not self._watcher.done()):
+            return
+        self._watcher = asyncio.get_running_loop().create_task(self._watch(interval))
+
+    async def stop_model_watcher(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+        self._watcher = None
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload_model()
+            except Exception as exc:  # a bad checkpoint must not stop serving the current one
+                print(f"[Inference] Model reload failed: {exc}")
+
+    def start_reservoir_producer(self, interval: float) -> None:
+        """Top up the pattern reservoir every ``interval`` seconds while live inference is idle."""
+        if interval <= 0 or not get_pattern_reservoir().enabled:
+            return
+        if self._producer is not None and not self._producer.done():
+            return
+        self._producer = asyncio.get_running_loop().create_task(self._produce(interval))
+
+    async def stop_reservoir_producer(self) -> None:
+        if self._producer is not None:
+            self._producer.cancel()
+            try:
+                await self._producer
+            except asyncio.CancelledError:
+                pass
+        self._producer = None
+
+    async def _produce(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refill_reservoir()
+            except Exception as exc:  # a failed refill only means more live inference
+                print(f"[Inference] Reservoir refill failed: {exc}")
+
+    async def refill_reservoir(self) -> int:
+        """Build one batch for the neediest reservoir slot if the server is idle; returns patterns kept."""
+        reservoir = get_pattern_reservoir()
+        pool = get_inference_executor().stats()
+        if not self.loaded or not reservoir.idle() or pool["active"] or pool["queue_depth"] or pool["waiting"]:
+            return 0
+        neediest = reservoir.neediest()
+        if neediest is None:
+            return 0
+        key, deficit = neediest
+        count = min(deficit, max(1, settings.pattern_reservoir_batch_size))
+        specs = [PatternSpec(key.section, key.steps, random.randint(1, 10**6), key.temperature) for _ in range(count)]
+        with self.registry.acquire() as handle:
+            built = await run_inference(self._build_patterns, handle.model, specs)
+            version = handle.version.version
+        return reservoir.push(key, version, [(spec.seed, pattern) for spec, pattern in zip(specs, built)])
 
     async def generate_pattern(self, section: str, request: GenerationRequest) -> Dict[str, Any]:
         await self.ensure_loaded()
-        tier_meta = guard_inference_request(request.user)
+        # Quota is charged on cache hits too: a replayed seed is still a generation for billing.
+        tier_meta = await run_db(guard_inference_request, request.user)
 
         steps = request.steps or settings.default_steps
-        seed_value = request.seed or random.randint(0, 10**6)
-        rng = random.Random(seed_value)
-        pattern_id = f"{section}-{rng.randint(1, 10**9)}"
-        tracks = self._build_tracks(section, steps, rng)
+        cacheable = bool(request.seed)  # random seeds never repeat
+        reservoir = get_pattern_reservoir()
+        slot: ReservoirKey | None = None
+        popped = None
+        if not cacheable and reservoir.enabled:
+            slot = reservoir_key(request.style, section, steps, request.temperature)
+            popped = reservoir.pop(slot, self.registry.active.version)
+        if popped is not None:
+            seed_value, pattern = popped
+            cache_tier, version = "reservoir", self.registry.active.version
+        else:
+            seed_value = request.seed or random.randint(0, 10**6)
+            spec = PatternSpec(section, steps, seed_value, request.temperature)
+            (pattern,), (cache_tier,), version = await self._patterns_for([spec], request.style, [cacheable])
+        self._log_generation(pattern, request)
+        if cacheable:
+            hit_rate = get_pattern_cache().stats()["hit_rate"]
+        else:
+            hit_rate = reservoir.hit_rate if slot is not None else None
 
-        payload = {
+        return {
             "success": True,
-            "pattern": {
-                "pattern_id": pattern_id,
-                "section": section,
-                "steps": steps,
-                "tracks": tracks,
-                "clips": self._build_clips(section, tracks, rng),
-            },
+            "pattern": pattern,
             "metadata": {
                 "seed": seed_value,
                 "workflow": "pulse-local-v1",
                 "style": request.style,
                 "bpm": request.bpm,
+                "model_version": version,
+                "cache": {
+                    "hit": cache_tier is not None,
+                    "tier": cache_tier,
+                    "hit_rate": hit_rate,
+                },
+                **tier_meta,
+            },
+        }
+
+    async def generate_arrangement(self, request: GenerationRequest, summary: List[Dict[str, Any]] | None = None) -> Dict[str, Any]:
+        await self.ensure_loaded()
+        await run_db(guard_inference_request, request.user)  # validates tier / limits
+
+        seed_value = request.seed or random.randint(0, 10**6)
+        return {"success": True, **self._build_arrangement(request.style, seed_value, summary)}
+
+    async def generate_batch(self, request: BatchGenerationRequest) -> Dict[str, Any]:
+        """Generate every item of ``request`` for one quota charge and one forward pass.
+
+        Items inherit ``style``, ``steps``, ``seed`` and ``temperature`` from the
+        request unless they set their own. The quota for all items is consumed
+        in a single atomic call before anything is generated, so a batch either
+        fits in the remaining allowance or fails with 429 without charging.
+        """
+        await self.ensure_loaded()
+        tier_meta = await run_db(guard_inference_request, request.user, len(request.items))
+
+        specs: List[PatternSpec] = []
+        cacheable: List[bool] = []
+        slots: List[int] = []
+        results: List[Dict[str, Any]] = []
+        for index, item in enumerate(request.items):
+            seed = item.seed if item.seed is not None else request.seed
+            seed_value = seed or random.randint(0, 10**6)
+            if item.section == "arrangement":
+                summary = item.sections or request.sections
+                results.append({"section": "arrangement", **self._build_arrangement(request.style, seed_value, summary)})
+                continue
+            steps = item.steps or request.steps or settings.default_steps
+            temperature = item.temperature if item.temperature is not None else request.temperature
+            specs.append(PatternSpec(item.section, steps, seed_value, temperature))
+            cacheable.append(bool(seed))
+            slots.append(index)
+            results.append({})
+
+        version = None
+        cache_hits = 0
+        if specs:
+            patterns, tiers, version = await self._patterns_for(specs, request.style, cacheable)
+            for slot, spec, pattern, tier in zip(slots, specs, patterns, tiers):
+                cache_hits += tier is not None
+                results[slot] = {
+                    "section": spec.section,
+                    "pattern": pattern,
+                    "metadata": {"seed": spec.seed, "cache": {"hit": tier is not None, "tier": tier}},
+                }
+                self._log_generation(pattern, request)
+
+        return {
+            "success": True,
+            "results": results,
+            "metadata": {
+                "count": len(results),
+                "workflow": "pulse-local-v1",
+                "style": request.style,
+                "bpm": request.bpm,
+                "model_version": version,
+                "cache": {"hits": cache_hits, "hit_rate": get_pattern_cache().stats()["hit_rate"]},
                 **tier_meta,
             },
         }
 
+    async def stream_arrangement(
+        self, request: GenerationRequest, summary: List[Dict[str, Any]] | None = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the arrangement skeleton, then each section's part patterns as soon as they exist.
+
+        Quota is charged once, before the skeleton, at the same single unit
+        as ``/generate/arrangement``: the section patterns are part of the
+        arrangement, not separate generations. Each section samples its parts
+        in one forward pass, so the first playable section arrives after a
+        single section's latency.
+        """
+        await self.ensure_loaded()
+        seed_value = request.seed or random.randint(0, 10**6)
+        arrangement = self._build_arrangement(request.style, seed_value, summary)
+        tier_meta = await run_db(guard_inference_request, request.user)
+        yield {
+            "event": "skeleton",
+            "sections": arrangement["sections"],
+            "metadata": {**arrangement["metadata"], "parts": list(STREAM_PARTS), **tier_meta},
+        }
+
+        steps = request.steps or settings.default_steps
+        cacheable = [bool(request.seed)] * len(STREAM_PARTS)
+        for index, section in enumerate(arrangement["sections"]):
+            started = time.perf_counter()
+            section_seed = random.Random(f"{seed_value}/{section['label']}").randint(0, 10**6)
+            specs = [
+                PatternSpec(part, steps, section_seed + offset, request.temperature)
+                for offset, part in enumerate(STREAM_PARTS)
+            ]
+            patterns, tiers, version = await self._patterns_for(specs, request.style, cacheable)
+            for pattern in patterns:
+                self._log_generation(pattern, request)
+            yield {
+                "event": "section",
+                "index": index,
+                "section": section,
+                "patterns": patterns,
+                "metadata": {
+                    "model_version": version,
+                    "cache_hits": sum(tier is not None for tier in tiers),
+                    "seconds": round(time.perf_counter() - started, 4),
+                },
+            }
+        yield {"event": "done", "sections": len(arrangement["sections"])}
+
+    async def _patterns_for(
+        self, specs: Sequence[PatternSpec], style: str, cacheable: Sequence[bool]
+    ) -> Tuple[List[Dict[str, Any]], List[str | None], str]:
+        """Serve ``specs`` from the pattern cache where possible and build the rest in one pass.
+
+        Returns the patterns, each one's cache tier (None when it was built) and
+        the model version that served the request.
+        """
+        cache = get_pattern_cache()
+        with self.registry.acquire() as handle:
+            version = handle.version
+            shared = version.sha256 is not None
+            keys = [
+                pattern_cache_key(spec.section, spec.steps, spec.seed, style, spec.temperature, version.version)
+                for spec in specs
+            ]
+            patterns: List[Dict[str, Any] | None] = [None] * len(specs)
+            tiers: List[str | None] = [None] * len(specs)
+            # The shared disk tier is file I/O, so it runs on the I/O pool instead of the event loop.
+            on_disk = shared and cache.disk_dir is not None
+            lookups = [index for index in range(len(specs)) if cacheable[index]]
+            if lookups:
+                lookup_keys = [keys[index] for index in lookups]
+                found = await run_db(cache.get_many, lookup_keys, shared) if on_disk else cache.get_many(lookup_keys, shared)
+                for index, (tier, pattern) in zip(lookups, found):
+                    tiers[index], patterns[index] = tier, pattern
+            misses = [index for index, tier in enumerate(tiers) if tier is None]
+            if misses:
+                get_pattern_reservoir().note_live()
+                built = await run_inference(self._build_patterns, handle.model, [specs[index] for index in misses])
+                stored = []
+                for index, pattern in zip(misses, built):
+                    patterns[index] = pattern
+                    if cacheable[index]:
+                        stored.append((keys[index], pattern))
+                if stored:
+                    if on_disk:
+                        await run_db(cache.set_many, stored, shared)
+                    else:
+                        cache.set_many(stored, shared)
+        return patterns, tiers, version.version
+
+    def _log_generation(self, pattern: Dict[str, Any], request: GenerationRequest) -> None:
         if self.database.is_enabled():
             self.database.log_generation({
-                "pattern_id": pattern_id,
-                "section": section,
+                "pattern_id": pattern["pattern_id"],
+                "section": pattern["section"],
                 "style": request.style,
                 "bpm": request.bpm,
                 "user_id": request.user.id,
                 "opted_in": request.user.opted_in,
             })
 
-        return payload
-
-    async def generate_arrangement(self, request: GenerationRequest, summary: List[Dict[str, Any]] | None = None) -> Dict[str, Any]:
-        await self.ensure_loaded()
-        guard_inference_request(request.user)  # validates tier / limits
-
-        seed_value = request.seed or random.randint(0, 10**6)
-        rng = random.Random(seed_value)
+    def _build_arrangement(self, style: str, seed: int, summary: List[Dict[str, Any]] | None) -> Dict[str, Any]:
+        rng = random.Random(seed)
         cursor = 0
         slots = ["Intro", "Drop", "Verse", "Bridge", "Outro"]
         sections = []
@@ -78,49 +365,45 @@ class InferenceEngine:
                 "label": label,
                 "start": cursor,
                 "length": length,
-                "intent": f"{request.style} energy",
+                "intent": f"{style} energy",
             })
             cursor += length
 
         return {
-            "success": True,
             "sections": sections,
             "metadata": {
                 "arrangement_id": f"arr-{rng.randint(1, 10**9)}",
-                "style": request.style,
-                "seed": seed_value,
+                "style": style,
+                "seed": seed,
                 "summary": summary or [],
             },
         }
 
-    def _build_tracks(self, section: str, steps: int, rng: random.Random) -> List[Dict[str, Any]]:
-        if section == "drums":
-            blueprint = {
-                "Kick": 0.8,
-                "Snare": 0.5,
-                "Hi-Hat": 0.9,
-                "Open Hat": 0.2,
-                "Crash": 0.1,
-                "Ride": 0.2,
-                "Clap": 0.3,
-                "Perc": 0.4,
-            }
-        else:
-            blueprint = {section.title(): 0.6}
-
-        tracks = []
-        for name, density in blueprint.items():
-            hits = self._generate_hits(steps, density, rng)
-            tracks.append({
-                "name": name,
-                "hits": hits,
-                "velocity": [round(rng.uniform(0.6, 1.0), 2) for _ in hits],
-                "length": 4,
-                "offset": 0,
+    def _build_patterns(self, model: Any, specs: Sequence[PatternSpec]) -> List[Dict[str, Any]]:
+        """Sample every spec with one forward pass of ``model``; runs on the inference pool."""
+        from models.sampling import Lane, SampleRequest, sample_grids
+
+        requests = [
+            SampleRequest([Lane(*lane) for lane in section_blueprint(spec.section)], spec.steps, spec.seed, spec.temperature)
+            for spec in specs
+        ]
+        grids = sample_grids(model, requests)
+        patterns = []
+        for spec, request, grid in zip(specs, requests, grids):
+            tracks = []
+            for index, lane in enumerate(request.lanes):
+                hits, velocity = grid.lane_hits(index)
+                tracks.append({"name": lane.name, "hits": hits, "velocity": velocity, "length": 4, "offset": 0})
+            patterns.append({
+                "pattern_id": f"{spec.section}-{random.Random(spec.seed).randint(1, 10**9)}",
+                "section": spec.section,
+                "steps": spec.steps,
+                "tracks": tracks,
+                "clips": self._build_clips(spec.section, tracks),
             })
-        return tracks
+        return patterns
 
-    def _build_clips(self, section: str, tracks: List[Dict[str, Any]], _rng: random.Random) -> List[Dict[str, Any]]:
+    def _build_clips(self, section: str, tracks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         color_palette = ["#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4", "#FFEAA7"]
         clips = []
         for index, track in enumerate(tracks):
@@ -132,15 +415,6 @@ class InferenceEngine:
             })
         return clips
 
-    def _generate_hits(self, steps: int, density: float, rng: random.Random) -> List[int]:
-        hits = []
-        for step in range(steps):
-            if rng.random() < density:
-                hits.append(step)
-        if not hits:
-            hits.append(rng.randrange(steps))
-        return hits
-
 
 class _EngineHolder:
     instance: InferenceEngine | None = None
@@ -150,3 +424,8 @@ def get_inference_engine() -> InferenceEngine:
     if _EngineHolder.instance is None:
         _EngineHolder.instance = InferenceEngine(settings.model_dir)
     return _EngineHolder.instance
+
+
+def inference_engine_started() -> InferenceEngine | None:
+    """The engine if something already created it; never triggers the torch import."""
+    return _EngineHolder.instance
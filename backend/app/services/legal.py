@@ -1,7 +1,7 @@
 from fastapi import HTTPException
 
 from ..schemas import UserContext
-from .subscriptions import check_generation_allowed, increment_usage, record_ownership
+from .subscriptions import consume_generation, record_ownership
 
 
 def _ensure_user(user: UserContext | None) -> UserContext:
@@ -10,18 +10,15 @@ def _ensure_user(user: UserContext | None) -> UserContext:
     return user
 
 
-def guard_inference_request(user: UserContext | None) -> dict:
-    """Check tier-based generation limits and increment usage.
+def guard_inference_request(user: UserContext | None, amount: int = 1) -> dict:
+    """Check tier-based generation limits and count ``amount`` generations.
 
     Returns a dict with ownership and usage info to attach to the response.
     """
     user = _ensure_user(user)
 
-    # Tier-based limit check (raises 429 if exhausted)
-    check_generation_allowed(user.id)
-
-    # Increment the counter
-    updated = increment_usage(user.id)
+    # Atomic tier limit check + increment (raises 429 if exhausted)
+    updated = consume_generation(user.id, amount)
 
     return {
         "tier_id": updated.tier_id,
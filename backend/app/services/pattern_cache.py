@@ -0,0 +1,177 @@
+"""Memoized generation results keyed on the canonical generation inputs.
+
+A pattern is fully determined by its section, steps, seed, style, temperature
+and the model version that produced it. Clients replaying a seed (undo,
+reopening a project, share links) get the stored pattern back instead of a
+rebuild. The memory tier is a bounded LRU per worker. The optional disk tier
+is a directory of JSON files written atomically, so every worker pointed at
+the same ``pattern_cache_dir`` shares it. The disk tier only stores patterns
+from versioned checkpoints, because warm-start weights differ per process.
+Disk reads and writes block, so async callers run them on the I/O pool
+(``get_many`` / ``set_many`` through ``run_db``), and pruning runs on its own
+background thread.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from ..config import settings
+
+Pattern = Dict[str, Any]
+
+
+def pattern_cache_key(
+    section: str, steps: int, seed: int, style: str, temperature: float, model_version: str
+) -> str:
+    return json.dumps(
+        {
+            "section": section,
+            "steps": steps,
+            "seed": seed,
+            "style": style.strip().lower(),
+            "temperature": round(float(temperature), 4),
+            "model": model_version,
+        },
+        sort_keys=True,
+    )
+
+
+class PatternCache:
+    """Thread-safe LRU of serialized patterns with an optional shared disk tier."""
+
+    def __init__(self, maxsize: int = 1024, disk_dir: Path | str | None = None, disk_max_entries: int = 50_000) -> None:
+        self.maxsize = max(1, maxsize)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_entries = max(1, disk_max_entries)
+        self._data: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self._pruner: threading.Thread | None = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str, shared: bool = True) -> Tuple[str | None, Pattern | None]:
+        """Return ``(tier, pattern)``; ``tier`` is ``"memory"``, ``"disk"`` or None on a miss.
+
+        Each hit returns a fresh copy, so callers may modify it.
+        """
+        with self._lock:
+            blob = self._data.get(key)
+            if blob is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return "memory", json.loads(blob)
+        blob = self._read_disk(key) if shared else None
+        with self._lock:
+            if blob is None:
+                self.misses += 1
+                return None, None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, blob)
+        return "disk", json.loads(blob)
+
+    def get_many(self, keys: List[str], shared: bool = True) -> List[Tuple[str | None, Pattern | None]]:
+        return [self.get(key, shared) for key in keys]
+
+    def set_many(self, items: List[Tuple[str, Pattern]], shared: bool = True) -> None:
+        for key, pattern in items:
+            self.set(key, pattern, shared)
+
+    def set(self, key: str, pattern: Pattern, shared: bool = True) -> None:
+        blob = json.dumps(pattern, separators=(",", ":"))
+        with self._lock:
+            self._remember(key, blob)
+        if shared:
+            self._write_disk(key, blob)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "disk": str(self.disk_dir) if self.disk_dir else None,
+        }
+
+    def _remember(self, key: str, blob: str) -> None:
+        self._data[key] = blob
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.disk_dir / digest[:2] / f"{digest}.json"
+
+    def _read_disk(self, key: str) -> str | None:
+        if self.disk_dir is None:
+            return None
+        try:
+            entry = json.loads(self._disk_path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key:  # digest collision or foreign file
+            return None
+        return json.dumps(entry["pattern"], separators=(",", ":"))
+
+    def _write_disk(self, key: str, blob: str) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(f'{{"key":{json.dumps(key)},"pattern":{blob}}}', encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            print(f"[PatternCache] Could not write {path}: {exc}")
+            return
+        with self._lock:
+            self._disk_writes += 1
+            if self._disk_writes % 256 or (self._pruner is not None and self._pruner.is_alive()):
+                return
+            self._pruner = threading.Thread(target=self._prune_disk, name="pattern-cache-prune", daemon=True)
+            self._pruner.start()
+
+    def _prune_disk(self) -> None:
+        """Drop the least recently written files once the disk tier exceeds ``disk_max_entries``."""
+        assert self.disk_dir is not None
+        try:
+            files = sorted(self.disk_dir.glob("*/*.json"), key=lambda path: path.stat().st_mtime)
+        except OSError:
+            return  # another worker pruned a file mid-scan; try again on a later write
+        for path in files[: max(0, len(files) - self.disk_max_entries)]:
+            path.unlink(missing_ok=True)
+
+
+class _PatternCacheHolder:
+    instance: PatternCache | None = None
+
+
+def get_pattern_cache() -> PatternCache:
+    if _PatternCacheHolder.instance is None:
+        _PatternCacheHolder.instance = PatternCache(
+            maxsize=settings.pattern_cache_size,
+            disk_dir=settings.pattern_cache_dir,
+            disk_max_entries=settings.pattern_cache_disk_max_entries,
+        )
+    return _PatternCacheHolder.instance
+
+
+def pattern_cache_stats() -> Dict[str, Any]:
+    return get_pattern_cache().stats()
@@ -0,0 +1,195 @@
+"""Pre-generated patterns for unseeded requests, refilled while the server is idle.
+
+An unseeded generation can return any fresh random pattern, so these patterns
+can be made ahead of time. The reservoir keeps a bounded deque of ready
+patterns per ``(style, section, steps, temperature)``. A request pops one in
+O(1) and falls back to live inference only when its slot is empty. The
+engine's background producer refills the slot with the largest deficit in one
+batched forward pass, but only after the inference pool has been quiet for
+``idle_ms``, so live traffic never waits behind it.
+
+A slot's target depth follows its demand over the last
+``demand_window_seconds``, between ``min_depth`` and ``max_depth``. Slots
+nobody asked for during the window drain and are forgotten. Every entry
+records the model version that built it, and a hot swap drops the whole
+reservoir on the next pop or refill.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, NamedTuple, Tuple
+
+from ..config import settings
+
+Pattern = Dict[str, Any]
+
+
+class ReservoirKey(NamedTuple):
+    style: str
+    section: str
+    steps: int
+    temperature: float
+
+
+def reservoir_key(style: str, section: str, steps: int, temperature: float) -> ReservoirKey:
+    return ReservoirKey(style.strip().lower(), section, steps, round(float(temperature), 4))
+
+
+@dataclass
+class _Slot:
+    entries: Deque[Tuple[int, Pattern]] = field(default_factory=deque)  # (seed, pattern)
+    demand: Deque[float] = field(default_factory=deque)  # request times inside the demand window
+
+
+class PatternReservoir:
+    """Thread-safe per-slot queues of ready patterns, sized by recent demand."""
+
+    def __init__(
+        self,
+        max_depth: int = 32,
+        min_depth: int = 4,
+        max_slots: int = 64,
+        demand_window_seconds: float = 300.0,
+        idle_ms: float = 250.0,
+    ) -> None:
+        self.max_depth = max(0, max_depth)
+        self.min_depth = min(max(0, min_depth), self.max_depth)
+        self.max_slots = max(1, max_slots)
+        self.demand_window = max(1.0, demand_window_seconds)
+        self.idle_seconds = max(0.0, idle_ms) / 1000
+        self._slots: OrderedDict[ReservoirKey, _Slot] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._last_live = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+        self.discarded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_depth > 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def pop(self, key: ReservoirKey, version: str) -> Tuple[int, Pattern] | None:
+        """Take one ``(seed, pattern)`` built by ``version``, or None when the slot is empty."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = _Slot()
+                self._evict_slots()
+            self._slots.move_to_end(key)
+            slot.demand.append(now)
+            if slot.entries:
+                self.hits += 1
+                return slot.entries.popleft()
+            self.misses += 1
+            self._last_live = now  # the caller is about to run live inference
+            return None
+
+    def push(self, key: ReservoirKey, version: str, entries: List[Tuple[int, Pattern]]) -> int:
+        """Store freshly built entries for ``key``; returns how many were kept."""
+        with self._lock:
+            self._check_version(version)
+            slot = self._slots.get(key)
+            if slot is None:
+                self.discarded += len(entries)
+                return 0
+            room = max(0, self.max_depth - len(slot.entries))
+            slot.entries.extend(entries[:room])
+            self.produced += min(room, len(entries))
+            self.discarded += max(0, len(entries) - room)
+            return min(room, len(entries))
+
+    def note_live(self) -> None:
+        """Record live inference so the producer stays out of its way for ``idle_ms``."""
+        with self._lock:
+            self._last_live = time.monotonic()
+
+    def idle(self) -> bool:
+        return time.monotonic() - self._last_live >= self.idle_seconds
+
+    def neediest(self) -> Tuple[ReservoirKey, int] | None:
+        """The slot furthest below its target depth and that deficit, or None when all are full."""
+        now = time.monotonic()
+        best: Tuple[ReservoirKey, int] | None = None
+        with self._lock:
+            for key in list(self._slots):
+                slot = self._slots[key]
+                deficit = self._target(slot, now) - len(slot.entries)
+                if not slot.demand and not slot.entries:
+                    del self._slots[key]  # nobody asked for it within the window
+                elif deficit > 0 and (best is None or deficit > best[1]):
+                    best = (key, deficit)
+        return best
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            slots = [
+                {**key._asdict(), "depth": len(slot.entries), "target": self._target(slot, now)}
+                for key, slot in self._slots.items()
+            ]
+        return {
+            "enabled": self.enabled,
+            "model_version": self._version,
+            "depth": sum(slot["depth"] for slot in slots),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "produced": self.produced,
+            "discarded": self.discarded,
+            "slots": slots,
+        }
+
+    def _target(self, slot: _Slot, now: float) -> int:
+        while slot.demand and now - slot.demand[0] > self.demand_window:
+            slot.demand.popleft()
+        if not slot.demand:
+            return 0
+        return min(self.max_depth, max(self.min_depth, len(slot.demand)))
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            self.discarded += sum(len(slot.entries) for slot in self._slots.values())
+            for slot in self._slots.values():
+                slot.entries.clear()
+            self._version = version
+
+    def _evict_slots(self) -> None:
+        while len(self._slots) > self.max_slots:
+            _, slot = self._slots.popitem(last=False)
+            self.discarded += len(slot.entries)
+
+
+class _PatternReservoirHolder:
+    instance: PatternReservoir | None = None
+
+
+def get_pattern_reservoir() -> PatternReservoir:
+    if _PatternReservoirHolder.instance is None:
+        _PatternReservoirHolder.instance = PatternReservoir(
+            max_depth=settings.pattern_reservoir_max_depth,
+            min_depth=settings.pattern_reservoir_min_depth,
+            max_slots=settings.pattern_reservoir_max_slots,
+            demand_window_seconds=settings.pattern_reservoir_demand_window_seconds,
+            idle_ms=settings.pattern_reservoir_idle_ms,
+        )
+    return _PatternReservoirHolder.instance
+
+
+def pattern_reservoir_stats() -> Dict[str, Any]:
+    return get_pattern_reservoir().stats()
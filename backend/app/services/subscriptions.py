@@ -1,8 +1,11 @@
 """Subscription & tier management backed by Supabase."""
 from __future__ import annotations
 
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Hashable, Optional
 
 from fastapi import HTTPException
 
@@ -14,6 +17,7 @@ from ..schemas import (
     UserAddon,
     UserSubscription,
 )
+from ..config import settings
 from .database import get_database_gateway
 
 
@@ -109,6 +113,72 @@ def _current_period() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m")
 
 
+# ── Entitlement cache ───────────────────────────────────────
+
+
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_TIER_CACHE = _TTLCache(settings.subscription_cache_size, settings.subscription_cache_ttl_seconds)
+_ADDON_CACHE = _TTLCache(settings.subscription_cache_size, settings.subscription_cache_ttl_seconds)
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Drop cached tier and add-on entitlements after a plan change."""
+    _TIER_CACHE.invalidate(user_id)
+    _ADDON_CACHE.invalidate(user_id)
+
+
+def subscription_cache_stats() -> dict:
+    return {"tiers": _TIER_CACHE.stats(), "addons": _ADDON_CACHE.stats()}
+
+
 # ── User management ─────────────────────────────────────────
 
 
@@ -160,6 +230,10 @@ def get_user_tier(user_id: str) -> TierInfo:
     if not db.is_enabled():
         return TIERS["free"]
 
+    found, tier_id = _TIER_CACHE.get(user_id)
+    if found:
+        return TIERS.get(tier_id, TIERS["free"])
+
     try:
         result = (
             db.client.table("user_subscriptions")
@@ -176,10 +250,9 @@ def get_user_tier(user_id: str) -> TierInfo:
             return TIERS["free"]  # Graceful fallback
         raise
 
-    if result.data:
-        tier_id = result.data[0]["tier_id"]
-        return TIERS.get(tier_id, TIERS["free"])
-    return TIERS["free"]
+    tier_id = result.data[0]["tier_id"] if result.data else "free"
+    _TIER_CACHE.set(user_id, tier_id)
+    return TIERS.get(tier_id, TIERS["free"])
 
 
 def subscribe_user(user_id: str, tier_id: TierID) -> UserSubscription:
@@ -200,6 +273,7 @@ def subscribe_user(user_id: str, tier_id: TierID) -> UserSubscription:
         "tier_id": tier_id.value,
         "status": "active",
     }).execute()
+    invalidate_user_cache(user_id)
 
     row = result.data[0]
     return UserSubscription(
@@ -337,17 +411,72 @@ def increment_usage(user_id: str) -> UsageInfo:
     )
 
 
+def _limit_reached(usage: UsageInfo) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=(
+            f"Monthly generation limit reached ({usage.limit} "
+            f"for {usage.tier_id} tier). Upgrade your plan for more."
+        ),
+    )
+
+
 def check_generation_allowed(user_id: str) -> UsageInfo:
     """Raise 429 if the user has exhausted their monthly generations."""
     usage = get_usage(user_id)
     if usage.remaining <= 0:
-        raise HTTPException(
-            status_code=429,
-            detail=(
-                f"Monthly generation limit reached ({usage.limit} "
-                f"for {usage.tier_id} tier). Upgrade your plan for more."
-            ),
-        )
+        raise _limit_reached(usage)
+    return usage
+
+
+def _rpc_missing(exc: Exception) -> bool:
+    msg = str(exc)
+    return "PGRST202" in msg or "Could not find the function" in msg
+
+
+def consume_generation(user_id: str, amount: int = 1) -> UsageInfo:
+    """Check the quota and count ``amount`` generations in one atomic call.
+
+    Uses the ``consume_generation`` Postgres function, which looks up the tier,
+    enforces the monthly limit and upserts the counter in a single statement,
+    so concurrent requests cannot both pass the check on the last generation.
+    Raises 429 without counting anything if the limit would be exceeded.
+    """
+    period = _current_period()
+    db = get_database_gateway()
+    if not db.is_enabled():
+        return increment_usage(user_id)
+
+    try:
+        result = db.client.rpc("consume_generation", {
+            "p_user_id": user_id,
+            "p_period": period,
+            "p_amount": amount,
+        }).execute()
+    except Exception as exc:
+        if not _rpc_missing(exc):
+            raise
+        print("[Supabase] consume_generation() not found; run the migration. Using per-row fallback.")
+        usage = check_generation_allowed(user_id)
+        if usage.remaining < amount:
+            raise _limit_reached(usage) from exc
+        for _ in range(amount):
+            usage = increment_usage(user_id)
+        return usage
+
+    row = result.data[0] if isinstance(result.data, list) else result.data
+    _TIER_CACHE.set(user_id, row["tier"])
+    usage = UsageInfo(
+        user_id=user_id,
+        period=period,
+        count=row["usage_count"],
+        limit=row["usage_limit"],
+        remaining=max(0, row["usage_limit"] - row["usage_count"]),
+        tier_id=row["tier"],
+        owns_creations=row["owns"],
+    )
+    if not row["allowed"]:
+        raise _limit_reached(usage)
     return usage
 
 
@@ -374,11 +503,14 @@ def record_ownership(user_id: str, generation_id: str) -> bool:
 # ── Add-on management ───────────────────────────────────────
 
 
-def get_user_addons(user_id: str) -> list[AddonInfo]:
-    """Return the list of active add-ons for a user."""
+def _active_addon_ids(user_id: str) -> frozenset[str]:
     db = get_database_gateway()
     if not db.is_enabled():
-        return []
+        return frozenset()
+
+    found, addon_ids = _ADDON_CACHE.get(user_id)
+    if found:
+        return addon_ids
 
     try:
         result = (
@@ -391,14 +523,18 @@ def get_user_addons(user_id: str) -> list[AddonInfo]:
     except Exception as exc:
         msg = str(exc)
         if "PGRST205" in msg or "schema cache" in msg:
-            return []  # Graceful fallback
+            return frozenset()  # Graceful fallback
         raise
 
-    return [
-        ADDONS[row["addon_id"]]
-        for row in result.data
-        if row["addon_id"] in ADDONS
-    ]
+    addon_ids = frozenset(row["addon_id"] for row in result.data)
+    _ADDON_CACHE.set(user_id, addon_ids)
+    return addon_ids
+
+
+def get_user_addons(user_id: str) -> list[AddonInfo]:
+    """Return the list of active add-ons for a user."""
+    addon_ids = _active_addon_ids(user_id)
+    return [addon for addon_id, addon in ADDONS.items() if addon_id in addon_ids]
 
 
 def subscribe_addon(user_id: str, addon_id: str) -> UserAddon:
@@ -444,6 +580,7 @@ def subscribe_addon(user_id: str, addon_id: str) -> UserAddon:
             "status": "active",
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }).eq("id", row["id"]).execute()
+        invalidate_user_cache(user_id)
         return UserAddon(id=row["id"], user_id=user_id, addon_id=addon_id, status="active")
 
     result = db.client.table("user_addons").insert({
@@ -451,6 +588,7 @@ def subscribe_addon(user_id: str, addon_id: str) -> UserAddon:
         "addon_id": addon_id,
         "status": "active",
     }).execute()
+    invalidate_user_cache(user_id)
 
     r = result.data[0]
     return UserAddon(id=r["id"], user_id=user_id, addon_id=addon_id, status="active")
@@ -480,23 +618,11 @@ def cancel_addon(user_id: str, addon_id: str) -> UserAddon:
         "status": "cancelled",
         "updated_at": datetime.now(timezone.utc).isoformat(),
     }).eq("id", row_id).execute()
+    invalidate_user_cache(user_id)
 
     return UserAddon(id=row_id, user_id=user_id, addon_id=addon_id, status="cancelled")
 
 
 def user_has_addon(user_id: str, addon_id: str) -> bool:
     """Check if a user has a specific active add-on."""
-    db = get_database_gateway()
-    if not db.is_enabled():
-        return False
-
-    result = (
-        db.client.table("user_addons")
-        .select("id")
-        .eq("user_id", user_id)
-        .eq("addon_id", addon_id)
-        .eq("status", "active")
-        .limit(1)
-        .execute()
-    )
-    return bool(result.data)
+    return addon_id in _active_addon_ids(user_id)
@@ -0,0 +1,256 @@
+"""Write-behind sink that batches telemetry rows into multi-row inserts."""
+from __future__ import annotations
+
+import json
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, TextIO, Tuple
+
+Row = Dict[str, Any]
+BulkWriter = Callable[[str, List[Row]], None]
+Pending = Tuple[str, Row, int]  # table, row, failed attempts so far
+_MAX_REPLAY_BACKOFF = 300.0
+
+
+class TelemetrySink:
+    """Buffer rows in memory and flush them per table on a size or time trigger.
+
+    ``writer`` performs one bulk insert per table and raises on failure. Rows
+    that cannot be written are appended to ``spill_path`` as JSON lines. Rows
+    that arrive while the buffer is full go to a bounded overflow list that
+    the background thread spills, so ``enqueue`` never touches the disk; once
+    that list is full too, rows are dropped and counted. The thread replays
+    the spill in ``batch_size`` chunks on every flush that had no failures,
+    including idle ones, and backs off after a failed replay. A row that fails
+    ``max_attempts`` times (a schema or constraint error never succeeds) moves
+    to ``dead_letter_path`` instead of being spilled again.
+    """
+
+    def __init__(
+        self,
+        writer: BulkWriter,
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+        max_queue: int = 10_000,
+        max_overflow: int = 1_000,
+        spill_path: Path | str | None = None,
+        max_attempts: int = 8,
+        dead_letter_path: Path | str | None = None,
+    ) -> None:
+        self.writer = writer
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max(1, max_queue)
+        self.max_overflow = max(1, max_overflow)
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.max_attempts = max(1, max_attempts)
+        if dead_letter_path is None and self.spill_path is not None:
+            dead_letter_path = self.spill_path.with_name(f"{self.spill_path.stem}.dead{self.spill_path.suffix}")
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+        self._buffer: Deque[Tuple[str, Row]] = deque()
+        self._overflow: Deque[Pending] = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._replay_failures = 0
+        self._replay_after = 0.0
+        self.enqueued = 0
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def enqueue(self, table: str, row: Row) -> bool:
+        """Queue a row and return immediately. Returns False only if it was lost."""
+        with self._cond:
+            if len(self._buffer) < self.max_queue:
+                self._buffer.append((table, row))
+                self.enqueued += 1
+                if len(self._buffer) >= self.batch_size:
+                    self._cond.notify()
+            elif self.spill_path is not None and len(self._overflow) < self.max_overflow:
+                self._overflow.append((table, row, 0))
+                self._cond.notify()  # the flush thread spills it
+            else:
+                self.dropped += 1
+                return False
+        self.start()
+        return True
+
+    def flush(self) -> int:
+        """Spill the overflow, write everything buffered, then replay the spill file if that worked.
+
+        Returns the number of buffered rows written.
+        """
+        with self._flush_lock:
+            with self._cond:
+                overflow = list(self._overflow)
+                self._overflow.clear()
+                pending = [(table, row, 0) for table, row in self._buffer]
+                self._buffer.clear()
+            if overflow:
+                self._spill(overflow)
+            written = self._write(pending)
+            replayed = self._replay_spill() if written == len(pending) else 0
+            if pending or replayed:
+                self.flushes += 1
+            return written
+
+    def drain(self) -> None:
+        """Stop the background thread and flush what is left (called on shutdown)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.flush_interval * 2, 5.0))
+            self._thread = None
+        self.flush()
+        with self._cond:
+            self._stopping = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._buffer),
+            "overflow": len(self._overflow),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dead_lettered": self.dead_lettered,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+    def start(self) -> None:
+        """Start the flush thread; it also drains a spill file left by an earlier process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telemetry-sink", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._stopping and not self._overflow and len(self._buffer) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            self.flush()
+
+    def _write(self, rows: List[Pending]) -> int:
+        by_table: Dict[str, List[Tuple[Row, int]]] = {}
+        for table, row, attempts in rows:
+            by_table.setdefault(table, []).append((row, attempts))
+
+        written = 0
+        failed: List[Pending] = []
+        dead: List[Pending] = []
+        for table, table_rows in by_table.items():
+            for start in range(0, len(table_rows), self.batch_size):
+                chunk = table_rows[start:start + self.batch_size]
+                try:
+                    self.writer(table, [row for row, _ in chunk])
+                    written += len(chunk)
+                except Exception as exc:  # network, auth or schema errors all end up spilled
+                    print(f"[Telemetry] Bulk insert into {table} failed ({len(chunk)} rows): {exc}")
+                    self.failures += 1
+                    for row, attempts in chunk:
+                        (dead if attempts + 1 >= self.max_attempts else failed).append((table, row, attempts + 1))
+        self.written += written
+        if failed:
+            self._spill(failed)
+        if dead:
+            self._spill(dead, dead_letter=True)
+        return written
+
+    def _spill(self, rows: List[Pending], dead_letter: bool = False) -> bool:
+        path = self.dead_letter_path if dead_letter else self.spill_path
+        if path is None:
+            print(f"[Telemetry] Dropping {len(rows)} rows (no spill file configured)")
+            return False
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as fh:
+                for table, row, attempts in rows:
+                    fh.write(json.dumps({"table": table, "row": row, "attempts": attempts}, default=str) + "\n")
+        except OSError as exc:
+            print(f"[Telemetry] Failed to spill {len(rows)} rows to {path}: {exc}")
+            return False
+        if dead_letter:
+            print(f"[Telemetry] Moved {len(rows)} rows to {path} after {self.max_attempts} failed attempts")
+            self.dead_lettered += len(rows)
+        else:
+            self.spilled += len(rows)
+        return True
+
+    def _replay_spill(self) -> int:
+        """Stream the spill file back in ``batch_size`` chunks; stop at the first failed chunk."""
+        if self.spill_path is None or time.monotonic() < self._replay_after:
+            return 0
+        replay_path = self.spill_path.with_suffix(self.spill_path.suffix + ".replay")
+        try:
+            if not replay_path.exists():  # otherwise finish a replay an earlier process left behind
+                if not self.spill_path.exists():
+                    return 0
+                self.spill_path.replace(replay_path)
+            replayed, complete = self._replay_file(replay_path)
+            replay_path.unlink()
+        except OSError as exc:
+            print(f"[Telemetry] Could not replay spill file: {exc}")
+            return 0
+        self.replayed += replayed
+        if complete:
+            self._replay_failures = 0
+        else:
+            self._replay_failures += 1
+            backoff = min(self.flush_interval * 2 ** self._replay_failures, _MAX_REPLAY_BACKOFF)
+            self._replay_after = time.monotonic() + backoff
+        return replayed
+
+    def _replay_file(self, replay_path: Path) -> Tuple[int, bool]:
+        replayed = 0
+        chunk: List[Pending] = []
+        with replay_path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    chunk.append((entry["table"], entry["row"], int(entry.get("attempts", 0))))
+                except (ValueError, KeyError, TypeError):
+                    print(f"[Telemetry] Skipping unreadable spill line: {line[:80]!r}")
+                    continue
+                if len(chunk) < self.batch_size:
+                    continue
+                written = self._write(chunk)
+                replayed += written
+                if written < len(chunk):
+                    self._respill_rest(fh)
+                    return replayed, False
+                chunk = []
+            if chunk:
+                written = self._write(chunk)
+                replayed += written
+                if written < len(chunk):
+                    return replayed, False
+        return replayed, True
+
+    def _respill_rest(self, fh: TextIO) -> None:
+        """Copy the unread remainder of a replay back to the spill file, untouched."""
+        assert self.spill_path is not None
+        with self.spill_path.open("a", encoding="utf-8") as out:
+            shutil.copyfileobj(fh, out)
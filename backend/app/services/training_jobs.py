@@ -0,0 +1,334 @@
+"""Run training jobs in supervised subprocesses, never inside the API worker.
+
+Each job runs one of the training CLIs (``training.run_training`` or
+``training.train_drums``) with ``--json-progress``, so the runner can read one
+JSON event per epoch from stdout next to the normal log output. A supervisor
+thread per job pipes that output into ``<log_dir>/<job_id>.log``, keeps the last
+lines in memory for the log endpoint and records progress and loss on the job.
+
+Submissions are single-flight: a request matching a queued or running job
+(same kind and parameters) gets that job back instead of starting a second
+run. Jobs of the same kind never run at the same time because they share a
+checkpoint directory and resume state.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from ..config import settings
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent.parent
+TRAINING_MODULES = {
+    "groove": "training.run_training",
+    "drums": "training.train_drums",
+}
+_CLI_FLAGS = {
+    "epochs": "--epochs",
+    "batch_size": "--batch-size",
+    "learning_rate": "--learning-rate",
+    "seed": "--seed",
+}
+ACTIVE_STATUSES = ("queued", "running")
+
+
+@dataclass
+class TrainingJob:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    log_path: Path
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    epoch: int = 0
+    epochs: int | None = None
+    loss: float | None = None
+    val_loss: float | None = None
+    losses: List[Dict[str, float]] = field(default_factory=list)
+    checkpoint: str | None = None
+    returncode: int | None = None
+    error: str | None = None
+    cancel_requested: bool = False
+    tail: Deque[str] = field(default_factory=deque, repr=False)
+    process: subprocess.Popen | None = field(default=None, repr=False)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.kind, json.dumps(self.params, sort_keys=True)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "epoch": self.epoch,
+            "epochs": self.epochs,
+            "progress": self.epoch / self.epochs if self.epochs else None,
+            "loss": self.loss,
+            "val_loss": self.val_loss,
+            "losses": list(self.losses),
+            "checkpoint": self.checkpoint,
+            "returncode": self.returncode,
+            "error": self.error,
+        }
+
+
+CommandFactory = Callable[[TrainingJob], List[str]]
+
+
+def training_command(job: TrainingJob) -> List[str]:
+    """The CLI invocation for ``job``: the kind's training module plus its parameters."""
+    command = [sys.executable, "-m", TRAINING_MODULES[job.kind], "--json-progress"]
+    for name, value in job.params.items():
+        command += [_CLI_FLAGS[name], str(value)]
+    return command
+
+
+class TrainingJobRunner:
+    def __init__(
+        self,
+        log_dir: Path | str,
+        max_concurrent: int = 1,
+        history: int = 50,
+        tail_lines: int = 200,
+        cancel_grace: float = 10.0,
+        command_factory: CommandFactory | None = None,
+    ) -> None:
+        self.log_dir = Path(log_dir)
+        self.max_concurrent = max(1, max_concurrent)
+        self.history = max(1, history)
+        self.tail_lines = max(1, tail_lines)
+        self.cancel_grace = cancel_grace
+        self.command_factory = command_factory or training_command
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._pending: Deque[TrainingJob] = deque()
+        self._running: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def submit(self, kind: str, params: Dict[str, Any] | None = None) -> Tuple[TrainingJob, bool]:
+        """Queue a job, or return the active job with the same kind and parameters.
+
+        Returns ``(job, created)``; ``created`` is False when the request was
+        folded into an existing job.
+        """
+        if kind not in TRAINING_MODULES:
+            raise ValueError(f"unknown training kind {kind!r}; expected one of {sorted(TRAINING_MODULES)}")
+        params = {name: value for name, value in (params or {}).items() if value is not None}
+        unknown = set(params) - set(_CLI_FLAGS)
+        if unknown:
+            raise ValueError(f"unsupported training parameters: {sorted(unknown)}")
+        job_id = uuid.uuid4().hex[:12]
+        job = TrainingJob(id=job_id, kind=kind, params=params, log_path=self.log_dir / f"{job_id}.log")
+        job.tail = deque(maxlen=self.tail_lines)
+        with self._lock:
+            for existing in self._jobs.values():
+                if existing.active and existing.key == job.key:
+                    self.deduplicated += 1
+                    return existing, False
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self.submitted += 1
+            self._prune()
+            self._dispatch()
+        return job, True
+
+    def get(self, job_id: str) -> TrainingJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[TrainingJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def logs(self, job_id: str, tail: int | None = None) -> List[str] | None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            lines = list(job.tail)
+        return lines[-tail:] if tail else lines
+
+    def cancel(self, job_id: str) -> TrainingJob | None:
+        """Drop a queued job, or terminate a running one (killed after ``cancel_grace`` seconds)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return job
+            job.cancel_requested = True
+            if job.status == "queued":
+                self._pending.remove(job)
+                self._finish(job, "cancelled")
+                return job
+            process = job.process
+        if process is not None:
+            self._terminate(process)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "max_concurrent": self.max_concurrent,
+                "queued": len(self._pending),
+                "running": len(self._running),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "by_status": counts,
+            }
+
+    def shutdown(self, timeout: float | None = None) -> None:
+        """Cancel queued and running jobs and wait for their supervisors to exit."""
+        for job in self.list():
+            self.cancel(job.id)
+        with self._lock:
+            threads = list(self._running.values())
+        for thread in threads:
+            thread.join(timeout=self.cancel_grace + 5.0 if timeout is None else timeout)
+
+    def _dispatch(self) -> None:
+        """Start pending jobs while slots are free; call with ``_lock`` held."""
+        busy_kinds = {self._jobs[job_id].kind for job_id in self._running}
+        for job in list(self._pending):
+            if len(self._running) >= self.max_concurrent:
+                return
+            if job.kind in busy_kinds:
+                continue
+            self._pending.remove(job)
+            job.status = "running"
+            job.started_at = time.time()
+            busy_kinds.add(job.kind)
+            thread = threading.Thread(target=self._supervise, args=(job,), name=f"training-job-{job.id}", daemon=True)
+            self._running[job.id] = thread
+            thread.start()
+
+    def _supervise(self, job: TrainingJob) -> None:
+        try:
+            command = self.command_factory(job)
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            with job.log_path.open("a", encoding="utf-8") as log:
+                log.write(f"$ {' '.join(command)}\n")
+                env = dict(os.environ, PYTHONUNBUFFERED="1")
+                process = subprocess.Popen(
+                    command,
+                    cwd=BACKEND_ROOT,
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                )
+                with self._lock:
+                    job.process = process
+                    cancelled = job.cancel_requested
+                if cancelled:
+                    self._terminate(process)
+                assert process.stdout is not None
+                for line in process.stdout:
+                    log.write(line)
+                    log.flush()
+                    self._record(job, line.rstrip("\n"))
+                returncode = process.wait()
+        except Exception as exc:  # bad command, unwritable log dir: fail the job, keep the runner alive
+            with self._lock:
+                job.error = str(exc)
+                self._finish(job, "failed")
+                self._running.pop(job.id, None)
+                self._dispatch()
+            return
+
+        with self._lock:
+            job.returncode = returncode
+            job.process = None
+            if job.cancel_requested:
+                status = "cancelled"
+            elif returncode == 0:
+                status = "succeeded"
+            else:
+                status = "failed"
+                job.error = f"training exited with code {returncode}"
+            self._finish(job, status)
+            self._running.pop(job.id, None)
+            self._dispatch()
+
+    def _record(self, job: TrainingJob, line: str) -> None:
+        event = None
+        if line.startswith("{"):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = None
+        with self._lock:
+            job.tail.append(line)
+            if not isinstance(event, dict):
+                return
+            if event.get("event") == "epoch":
+                job.epoch = int(event.get("epoch", job.epoch))
+                job.epochs = event.get("epochs", job.epochs)
+                job.loss = event.get("loss")
+                job.val_loss = event.get("val_loss")
+                job.losses.append({"epoch": job.epoch, "loss": job.loss, "val_loss": job.val_loss})
+            elif event.get("event") == "checkpoint":
+                job.checkpoint = event.get("path")
+
+    def _terminate(self, process: subprocess.Popen) -> None:
+        if process.poll() is not None:
+            return
+        process.terminate()
+        timer = threading.Timer(self.cancel_grace, lambda: process.poll() is None and process.kill())
+        timer.daemon = True
+        timer.start()
+
+    def _finish(self, job: TrainingJob, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond ``history``; call with ``_lock`` held."""
+        finished = [job for job in self._jobs.values() if not job.active]
+        excess = len(finished) - self.history
+        if excess <= 0:
+            return
+        for job in sorted(finished, key=lambda job: job.created_at)[:excess]:
+            del self._jobs[job.id]
+
+
+class _RunnerHolder:
+    instance: TrainingJobRunner | None = None
+
+
+def get_training_job_runner() -> TrainingJobRunner:
+    if _RunnerHolder.instance is None:
+        _RunnerHolder.instance = TrainingJobRunner(
+            log_dir=settings.training_job_log_dir,
+            max_concurrent=settings.training_job_max_concurrent,
+            history=settings.training_job_history,
+        )
+    return _RunnerHolder.instance
+
+
+def shutdown_training_jobs() -> None:
+    if _RunnerHolder.instance is not None:
+        _RunnerHolder.instance.shutdown()
+        _RunnerHolder.instance = None
@@ -0,0 +1,103 @@
+"""Background warm-up of heavy components, reported by ``/ready``.
+
+The app starts serving as soon as its (light) modules are imported. Model
+loading runs as warm-up steps on a background task, so ``/health`` answers
+during the whole deploy. ``/ready`` returns 200 only once every step has
+succeeded. A step that fails is reported as failed and retried in the
+background every ``retry_seconds`` (doubling up to ``MAX_RETRY_SECONDS``);
+requests meanwhile load the component lazily. Once a retry succeeds the step
+turns ready, so a transient failure at boot does not keep ``/ready`` at 503.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from ..config import settings
+
+WarmupStep = Callable[[], Awaitable[Any]]
+MAX_RETRY_SECONDS = 300.0
+
+
+class WarmupTracker:
+    def __init__(self, retry_seconds: float = 0.0) -> None:
+        self.retry_seconds = retry_seconds  # 0 disables retries
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._retries: List[asyncio.Task[None]] = []
+        self.started_at: float | None = None
+
+    def start(self, steps: Dict[str, WarmupStep]) -> None:
+        """Run ``steps`` concurrently on a background task and return immediately."""
+        self.started_at = time.perf_counter()
+        for name in steps:
+            self.components[name] = {"status": "pending", "seconds": None, "error": None}
+        self._task = asyncio.get_running_loop().create_task(
+            self._run_all(steps), name="startup-warmup"
+        )
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self) -> None:
+        for task in [self._task, *self._retries]:
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._retries = []
+
+    @property
+    def ready(self) -> bool:
+        return all(component["status"] == "ready" for component in self.components.values())
+
+    def report(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "components": {name: dict(state) for name, state in self.components.items()}}
+
+    async def _run_all(self, steps: Dict[str, WarmupStep]) -> None:
+        await asyncio.gather(*(self._run(name, step) for name, step in steps.items()))
+
+    async def _run(self, name: str, step: WarmupStep) -> None:
+        state = self.components[name]
+        state["status"] = "warming"
+        started = time.perf_counter()
+        try:
+            await step()
+        except Exception as exc:  # keep serving; the component loads on first use instead
+            print(f"[Warmup] {name} failed: {exc}")
+            state.update(status="failed", error=str(exc))
+            if self.retry_seconds > 0:
+                self._retries.append(asyncio.get_running_loop().create_task(self._retry(name, step)))
+        else:
+            state["status"] = "ready"
+        state["seconds"] = round(time.perf_counter() - started, 3)
+
+    async def _retry(self, name: str, step: WarmupStep) -> None:
+        state = self.components[name]
+        delay = self.retry_seconds
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await step()
+            except Exception as exc:
+                print(f"[Warmup] {name} retry failed: {exc}")
+                state["error"] = str(exc)
+                delay = min(delay * 2, MAX_RETRY_SECONDS)
+            else:
+                state.update(status="ready", error=None)
+                return
+
+
+class _TrackerHolder:
+    instance: WarmupTracker | None = None
+
+
+def get_warmup_tracker() -> WarmupTracker:
+    if _TrackerHolder.instance is None:
+        _TrackerHolder.instance = WarmupTracker(retry_seconds=settings.warmup_retry_seconds)
+    return _TrackerHolder.instance
@@ -0,0 +1,95 @@
+"""Import-time profile of the API's cold start.
+
+Imports ``app.main`` in a fresh interpreter with ``-X importtime`` and lists
+the modules with the largest cumulative import time. It also flags heavy
+dependencies that are loaded at import time; those should only load on the
+first request that needs them. Run from ``backend/``:
+
+    python -m app.startup_profile --top 20
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("torch", "numpy", "pretty_midi", "stripe", "supabase")
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    target: str
+    wall_seconds: float
+    timings: List[ImportTiming]
+
+    def slowest(self, count: int) -> List[ImportTiming]:
+        return sorted(self.timings, key=lambda timing: timing.cumulative_us, reverse=True)[:count]
+
+    def heavy_modules(self) -> List[str]:
+        loaded = {timing.module for timing in self.timings}
+        return [name for name in HEAVY_MODULES if name in loaded]
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Parse ``-X importtime`` stderr lines (``import time: self | cumulative | name``)."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header row
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        timings.append(ImportTiming(module, int(fields[0]), int(fields[1]), (len(name) - len(module)) // 2))
+    return timings
+
+
+def profile_imports(target: str = "app.main") -> ImportProfile:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return ImportProfile(target, time.perf_counter() - started, parse_importtime(result.stderr))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile the import time of the FastAPI app")
+    parser.add_argument("--target", default="app.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=15, help="Number of modules to list")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero if a heavy module is imported eagerly")
+    args = parser.parse_args()
+
+    profile = profile_imports(args.target)
+    print(f"import {profile.target}: {profile.wall_seconds:.2f}s wall (including interpreter start)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for timing in profile.slowest(args.top):
+        print(f"{timing.cumulative_us / 1000:>14.1f} {timing.self_us / 1000:>9.1f}  {timing.module}")
+    heavy = profile.heavy_modules()
+    if heavy:
+        print(f"Heavy modules imported at startup: {', '.join(heavy)}")
+        if args.strict:
+            sys.exit(1)
+    else:
+        print("No heavy modules imported at startup.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1 @@
-from .generate_drums import generate_drum_pattern  # noqa: F401
+from .generate_drums import generate_drum_pattern, generate_drum_patterns, get_drum_model, warm_drum_model  # noqa: F401
@@ -1,36 +1,107 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence, Tuple
 
 import torch
 
 from models.drum_model import DrumModel
+from models.export import artifact_path, load_artifact, resolve_artifact
 from training.drum_dataset import LANE_NAMES
 
 _CHECKPOINT_PATH = Path(__file__).resolve().parent.parent / "models" / "checkpoints" / "drums" / "drums.pt"
 
 
-def _load_model(checkpoint_path: Path | None = None) -> DrumModel:
+def _load_model(checkpoint_path: Path | None = None, inference_mode: str = "eager") -> torch.nn.Module:
+    ckpt_path = checkpoint_path or _CHECKPOINT_PATH
+    artifact = resolve_artifact(ckpt_path, ckpt_path.parent, ckpt_path.stem, inference_mode)
+    if artifact is not None:
+        return load_artifact(artifact)
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     model = DrumModel().to(device)
     model.eval()
-    ckpt_path = checkpoint_path or _CHECKPOINT_PATH
     if ckpt_path.exists():
         state = torch.load(ckpt_path, map_location=device)
+        if isinstance(state, dict) and "state_dict" in state:
+            state = state["state_dict"]
         model.load_state_dict(state)
     else:
         print(f"[generate_drums] Checkpoint not found at {ckpt_path}. Using untrained weights.")
     return model
 
 
-def generate_drum_pattern(threshold: float = 0.5, checkpoint_path: Path | None = None) -> List[Dict[str, bool | int]]:
-    model = _load_model(checkpoint_path)
-    device = next(model.parameters()).device
-    seed = torch.zeros((1, 32, len(LANE_NAMES)), dtype=torch.float32, device=device)
-    with torch.no_grad():
-        output = model(seed)
-    grid = (output.squeeze(0).cpu().numpy() >= threshold)
+def _model_device(model: torch.nn.Module) -> torch.device:
+    parameter = next(model.parameters(), None)
+    return parameter.device if parameter is not None else torch.device("cpu")
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _source_signature(checkpoint_path: Path, inference_mode: str) -> Tuple[Optional[int], Optional[int]]:
+    """mtimes of the checkpoint and, outside eager mode, of the exported artifact that would serve it."""
+    if inference_mode == "eager":
+        return _mtime_ns(checkpoint_path), None
+    artifact = artifact_path(checkpoint_path.parent, checkpoint_path.stem, inference_mode)
+    return _mtime_ns(checkpoint_path), _mtime_ns(artifact)
+
+
+class _ResidentModelCache:
+    """Process-wide DrumModel instances keyed by checkpoint path and inference mode.
+
+    Each entry remembers the mtimes of the checkpoint and, for scripted or
+    quantized mode, of its exported artifact. Readers take the current entry
+    without locking; a changed mtime (a new checkpoint or a re-export) triggers
+    a reload under the lock and the new model replaces the old entry in a single
+    assignment, so in-flight forward passes keep the weights they started with.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[Path, str], Tuple[Tuple[Optional[int], Optional[int]], torch.nn.Module]] = {}
+
+    def get(self, checkpoint_path: Path | None = None, inference_mode: str = "eager") -> torch.nn.Module:
+        ckpt_path = (checkpoint_path or _CHECKPOINT_PATH).resolve()
+        key = (ckpt_path, inference_mode)
+        signature = _source_signature(ckpt_path, inference_mode)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+            model = _load_model(ckpt_path, inference_mode)
+            self._entries[key] = (signature, model)
+            if entry is not None:
+                print(f"[generate_drums] Reloaded {ckpt_path.name} after a checkpoint or artifact change.")
+            return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_MODEL_CACHE = _ResidentModelCache()
+
+
+def get_drum_model(checkpoint_path: Path | None = None, inference_mode: str = "eager") -> torch.nn.Module:
+    """Return the resident model, reloading it only if the checkpoint changed on disk."""
+    return _MODEL_CACHE.get(checkpoint_path, inference_mode)
+
+
+def warm_drum_model(checkpoint_path: Path | None = None, inference_mode: str = "eager") -> None:
+    """Load the drum checkpoint ahead of the first request."""
+    get_drum_model(checkpoint_path, inference_mode)
+
+
+def _grid_to_pattern(grid) -> List[Dict[str, bool | int]]:
     pattern: List[Dict[str, bool | int]] = []
     for step_index, lane_state in enumerate(grid):
         step_payload: Dict[str, bool | int] = {"step": int(step_index)}
@@ -39,4 +110,26 @@ def generate_drum_pattern(threshold: float = 0.5, checkpoint_path: Path | None =
         pattern.append(step_payload)
     return pattern
 
-__all__ = ["generate_drum_pattern"]
+
+def generate_drum_patterns(
+    thresholds: Sequence[float],
+    checkpoint_path: Path | None = None,
+    inference_mode: str = "eager",
+) -> List[List[Dict[str, bool | int]]]:
+    """Run one batched forward pass and return one pattern per threshold."""
+    if not thresholds:
+        return []
+    model = get_drum_model(checkpoint_path, inference_mode)
+    device = _model_device(model)
+    seed = torch.zeros((len(thresholds), 32, len(LANE_NAMES)), dtype=torch.float32, device=device)
+    with torch.no_grad():
+        output = model(seed)
+    cutoffs = torch.tensor(thresholds, dtype=output.dtype, device=output.device).view(-1, 1, 1)
+    grids = (output >= cutoffs).cpu().numpy()
+    return [_grid_to_pattern(grid) for grid in grids]
+
+
+def generate_drum_pattern(threshold: float = 0.5, checkpoint_path: Path | None = None) -> List[Dict[str, bool | int]]:
+    return generate_drum_patterns([threshold], checkpoint_path)[0]
+
+__all__ = ["generate_drum_pattern", "generate_drum_patterns", "get_drum_model", "warm_drum_model"]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Optional
+
 import torch
 import torch.nn as nn
 
@@ -14,7 +16,7 @@ class GrooveTransformer(nn.Module):
         self.encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
         self.output = nn.Linear(hidden_dim, input_dim)
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
+    def forward(self, x: torch.Tensor, src_key_padding_mask: Optional[torch.Tensor] = None) -> torch.Tensor:
         x = self.embedding(x)
-        x = self.encoder(x)
+        x = self.encoder(x, src_key_padding_mask=src_key_padding_mask)
         return torch.sigmoid(self.output(x))
@@ -0,0 +1,99 @@
+"""Compare eager, scripted and quantized CPU latency and check output agreement.
+
+Usage:
+    python -m models.benchmark_inference --batch-size 8 --runs 200
+
+Exits with status 1 if an exported model disagrees with eager output by more
+than the configured tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import torch
+from torch import nn
+
+from .base_model import GrooveTransformer
+from .drum_model import DrumModel
+from .export import artifact_path, example_input, export_model, load_artifact
+
+TOLERANCES = {"scripted": 1e-5, "quantized": 5e-2}
+
+
+def _latency_ms(model: nn.Module, inputs: torch.Tensor, runs: int, warmup: int = 10) -> Dict[str, float]:
+    timings: List[float] = []
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(inputs)
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(inputs)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings),
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def benchmark_model(name: str, model: nn.Module, batch_size: int, runs: int, workdir: Path) -> List[Dict[str, object]]:
+    model = model.cpu().eval()
+    inputs = example_input(model, batch=batch_size)
+    with torch.no_grad():
+        reference = model(inputs)
+
+    variants: Dict[str, nn.Module] = {"eager": model}
+    for mode in ("scripted", "quantized"):
+        path = export_model(model, artifact_path(workdir, name, mode), quantize=mode == "quantized")
+        variants[mode] = load_artifact(path)
+
+    rows = []
+    for mode, variant in variants.items():
+        with torch.no_grad():
+            max_error = (variant(inputs) - reference).abs().max().item()
+        rows.append({
+            "model": name,
+            "mode": mode,
+            **_latency_ms(variant, inputs, runs),
+            "max_abs_error": max_error,
+            "within_tolerance": max_error <= TOLERANCES.get(mode, 0.0),
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark eager vs TorchScript vs int8 inference")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+
+    rows: List[Dict[str, object]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        rows += benchmark_model("drums", DrumModel(), args.batch_size, args.runs, workdir)
+        rows += benchmark_model("groove", GrooveTransformer(), args.batch_size, args.runs, workdir)
+
+    print(f"{'model':<8} {'mode':<10} {'p50 ms':>9} {'p99 ms':>9} {'max err':>10}  ok")
+    for row in rows:
+        print(
+            f"{row['model']:<8} {row['mode']:<10} {row['p50_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+            f"{row['max_abs_error']:>10.2e}  {'yes' if row['within_tolerance'] else 'NO'}"
+        )
+
+    if not all(row["within_tolerance"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Export DrumModel and GrooveTransformer as TorchScript artifacts for CPU inference.
+
+Two artifacts are written next to each checkpoint:
+
+- ``<name>.scripted.ts``: the float model traced to TorchScript.
+- ``<name>.quantized.ts``: the same graph with dynamic int8 quantization of
+  the Linear (and, for DrumModel, LSTM) layers.
+
+The drum artifacts are named after their checkpoint. GrooveTransformer
+artifacts are named after the registry version (``groove-<stem>-<sha8>``), so a
+rollback or hot swap only ever serves the weights of the version it reports.
+Warm-start weights are random per process and are never exported. The ``.ts``
+suffix keeps artifacts out of ``ModelRegistry``'s ``*.pt`` checkpoint scan.
+
+Usage:
+    python -m models.export
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import warnings
+from pathlib import Path
+from typing import Iterator, Optional
+
+import torch
+from torch import nn
+
+from .base_model import GrooveTransformer
+from .drum_model import INPUT_SIZE, SEQUENCE_LENGTH, DrumModel
+
+INFERENCE_MODES = ("eager", "scripted", "quantized")
+ARTIFACT_SUFFIX = ".ts"
+
+_MODEL_DIR = Path(__file__).resolve().parent
+GROOVE_ARTIFACT_NAME = "groove"
+DRUM_CHECKPOINT = _MODEL_DIR / "checkpoints" / "drums" / "drums.pt"
+
+
+def artifact_path(checkpoint_dir: Path, name: str, mode: str) -> Path:
+    if mode not in INFERENCE_MODES or mode == "eager":
+        raise ValueError(f"No exported artifact for inference mode '{mode}'")
+    return Path(checkpoint_dir) / f"{name}.{mode}{ARTIFACT_SUFFIX}"
+
+
+def groove_artifact_name(version: str) -> str:
+    return f"{GROOVE_ARTIFACT_NAME}-{version}"
+
+
+def example_input(model: nn.Module, batch: int = 2) -> torch.Tensor:
+    if isinstance(model, DrumModel):
+        return torch.zeros((batch, SEQUENCE_LENGTH, INPUT_SIZE), dtype=torch.float32)
+    input_dim = model.embedding.in_features
+    return torch.rand((batch, 16, input_dim), dtype=torch.float32)
+
+
+@contextlib.contextmanager
+def _transformer_fastpath_disabled() -> Iterator[None]:
+    # The fused encoder fast path reads ``linear1.weight`` as a tensor, which
+    # dynamically quantized Linear layers expose as a method. Tracing through the
+    # regular path records the same math without that check.
+    previous = torch.backends.mha.get_fastpath_enabled()
+    torch.backends.mha.set_fastpath_enabled(False)
+    try:
+        yield
+    finally:
+        torch.backends.mha.set_fastpath_enabled(previous)
+
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """Dynamic int8 quantization of Linear and LSTM layers."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return torch.ao.quantization.quantize_dynamic(
+            model.cpu().eval(), {nn.Linear, nn.LSTM}, dtype=torch.qint8
+        )
+
+
+def export_model(model: nn.Module, path: Path, quantize: bool = False) -> Path:
+    model = model.cpu().eval()
+    example = example_input(model)
+    target = quantize_model(model) if quantize else model
+    with torch.no_grad(), _transformer_fastpath_disabled(), warnings.catch_warnings():
+        warnings.simplefilter("ignore", torch.jit.TracerWarning)
+        traced = torch.jit.trace(target, example, check_trace=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(traced, str(path))
+    return path
+
+
+def load_artifact(path: Path) -> torch.jit.ScriptModule:
+    module = torch.jit.load(str(path), map_location="cpu")
+    module.eval()
+    return module
+
+
+def resolve_artifact(checkpoint: Optional[Path], checkpoint_dir: Path, name: str, mode: str) -> Optional[Path]:
+    """Return the artifact for ``mode`` if it exists and is not older than its checkpoint."""
+    if mode == "eager":
+        return None
+    path = artifact_path(checkpoint_dir, name, mode)
+    if not path.exists():
+        print(f"[export] {path.name} not found; falling back to eager inference. Run python -m models.export.")
+        return None
+    if checkpoint is not None and checkpoint.exists() and checkpoint.stat().st_mtime > path.stat().st_mtime:
+        print(f"[export] {path.name} is older than {checkpoint.name}; falling back to eager inference.")
+        return None
+    return path
+
+
+def export_drum_model(checkpoint: Path = DRUM_CHECKPOINT) -> list[Path]:
+    model = DrumModel()
+    if checkpoint.exists():
+        state = torch.load(checkpoint, map_location="cpu")
+        if isinstance(state, dict) and "state_dict" in state:
+            state = state["state_dict"]
+        model.load_state_dict(state)
+    name = checkpoint.stem
+    return [
+        export_model(model, artifact_path(checkpoint.parent, name, "scripted")),
+        export_model(model, artifact_path(checkpoint.parent, name, "quantized"), quantize=True),
+    ]
+
+
+def export_groove_model(model_dir: Path = _MODEL_DIR) -> list[Path]:
+    from .registry import ModelRegistry
+
+    registry = ModelRegistry(model_dir)
+    version = registry.load_latest()
+    if version.checkpoint is None:
+        print("[export] No groove checkpoint found; warm-start weights are not exported.")
+        return []
+    model: GrooveTransformer = version.model
+    name = groove_artifact_name(version.version)
+    checkpoint_dir = registry.checkpoint_dir
+    return [
+        export_model(model, artifact_path(checkpoint_dir, name, "scripted")),
+        export_model(model, artifact_path(checkpoint_dir, name, "quantized"), quantize=True),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export TorchScript and int8 artifacts for CPU inference")
+    parser.add_argument("--model-dir", type=Path, default=_MODEL_DIR)
+    parser.add_argument("--drum-checkpoint", type=Path, default=DRUM_CHECKPOINT)
+    args = parser.parse_args()
+
+    for path in export_drum_model(args.drum_checkpoint) + export_groove_model(args.model_dir):
+        print(f"[export] Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,372 @@
+"""Versioned checkpoint registry with atomic hot swap and rollback.
+
+Each checkpoint becomes a ``ModelVersion``. Its id is ``<stem>-<sha256[:8]>``,
+and it carries the checkpoint's metadata (epoch, validation loss) and
+per-version latency counters. The registry also records every version it has
+seen in ``checkpoints/registry.json``.
+
+Serving code borrows the active version through ``acquire()``. The returned
+handle pins that version for the duration of the request. ``refresh`` loads a
+newer checkpoint off the request path and then swaps the active pointer under
+a lock. Requests already holding a handle finish on the old weights; new
+requests see the new version. The previous versions stay loaded, so
+``rollback`` is only another pointer swap. A rolled-back version is marked
+rejected and ``refresh`` will not promote it again.
+"""
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
 
 from .base_model import GrooveTransformer
 
+MANIFEST_NAME = "registry.json"
+WARM_START_VERSION = "warm-start"
+
+
+def checkpoint_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LatencyCounter:
+    """Request count, error count and latency totals for one model version."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += 0 if ok else 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_ms": round(1000 * self.total_seconds / self.requests, 3) if self.requests else 0.0,
+            "max_ms": round(1000 * self.max_seconds, 3),
+        }
+
+
+@dataclass
+class ModelVersion:
+    version: str
+    checkpoint: Optional[Path]
+    sha256: Optional[str]
+    model: GrooveTransformer
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    inference_model: Optional[torch.nn.Module] = None
+    artifact: Optional[Path] = None
+    loaded_at: float = field(default_factory=time.time)
+    latency: LatencyCounter = field(default_factory=LatencyCounter)
+    in_flight: int = 0
+
+    def serving_model(self) -> torch.nn.Module:
+        if self.inference_model is not None:
+            return self.inference_model
+        return self.model.eval()
+
+
+class ModelHandle:
+    """Pins one ``ModelVersion`` while a request uses it and times the request."""
+
+    def __init__(self, registry: "ModelRegistry", version: ModelVersion) -> None:
+        self._registry = registry
+        self.version = version
+        self._started = 0.0
+
+    @property
+    def model(self) -> torch.nn.Module:
+        return self.version.serving_model()
+
+    def __enter__(self) -> "ModelHandle":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.version.latency.record(time.perf_counter() - self._started, ok=exc_type is None)
+        self._registry._release(self.version)
+
 
 class ModelRegistry:
-    def __init__(self, model_dir: Path | str):
+    def __init__(self, model_dir: Path | str, inference_mode: str = "eager", keep_versions: int = 3):
+        from .export import INFERENCE_MODES
+
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode '{inference_mode}'. Expected one of {INFERENCE_MODES}.")
         self.model_dir = Path(model_dir)
         self.checkpoint_dir = self.model_dir / "checkpoints"
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
-        self.model = GrooveTransformer()
-        self.loaded_checkpoint: Optional[Path] = None
+        self.inference_mode = inference_mode
+        self.keep_versions = max(1, keep_versions)
+        self.manifest_path = self.checkpoint_dir / MANIFEST_NAME
+        self._manifest = self._read_manifest()
+        self._active: Optional[ModelVersion] = None
+        self._standby: List[ModelVersion] = []  # previously active versions, newest last
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.swaps = 0
+        self.rollbacks = 0
 
-    def load_latest(self) -> None:
-        checkpoint = self._latest_checkpoint()
-        if checkpoint is None:
-            self._warm_start()
-            return
+    # -- compatibility accessors for the active version -------------------------------
 
-        state_dict = torch.load(checkpoint, map_location="cpu")
-        if isinstance(state_dict, dict) and "state_dict" in state_dict:
-            state_dict = state_dict["state_dict"]
-        self.model.load_state_dict(state_dict)
-        self.loaded_checkpoint = checkpoint
+    @property
+    def active(self) -> ModelVersion:
+        if self._active is None:
+            raise RuntimeError("No model version loaded; call load_latest() first.")
+        return self._active
 
-    def _latest_checkpoint(self) -> Optional[Path]:
-        checkpoints = sorted(self.checkpoint_dir.glob("*.pt"), reverse=True)
-        return checkpoints[0] if checkpoints else None
+    @property
+    def model(self) -> GrooveTransformer:
+        return self.active.model
+
+    @property
+    def loaded_checkpoint(self) -> Optional[Path]:
+        return self._active.checkpoint if self._active is not None else None
 
-    def _warm_start(self) -> None:
-        def init_weights(module):
-            if isinstance(module, torch.nn.Linear):
-                torch.nn.init.xavier_uniform_(module.weight)
-                if module.bias is not None:
-                    torch.nn.init.zeros_(module.bias)
+    @property
+    def inference_model(self) -> Optional[torch.nn.Module]:
+        return self._active.inference_model if self._active is not None else None
 
-        self.model.apply(init_weights)
-        self.loaded_checkpoint = None
+    @property
+    def loaded_artifact(self) -> Optional[Path]:
+        return self._active.artifact if self._active is not None else None
 
     def get_model(self) -> GrooveTransformer:
         return self.model
+
+    def get_inference_model(self) -> torch.nn.Module:
+        """Model used for serving: the exported artifact if one was loaded, else the eager model."""
+        return self.active.serving_model()
+
+    # -- loading and swapping ---------------------------------------------------------
+
+    def load_latest(self) -> ModelVersion:
+        """Load the most recently written checkpoint (or warm-start weights) and make it active."""
+        with self._load_lock:
+            version = self.load_version(self._latest_checkpoint())
+            self.activate(version)
+        return version
+
+    def refresh(self) -> bool:
+        """Load and activate the newest checkpoint if it differs from the active one.
+
+        Meant for a background task: the slow part (``torch.load``) runs before
+        the swap, and requests keep using the current version until then.
+        """
+        with self._load_lock:
+            checkpoint = self._latest_checkpoint()
+            if checkpoint is None:
+                return False
+            sha = self._hash(checkpoint)
+            if self._active is not None and self._active.sha256 == sha:
+                return False
+            self.activate(self.load_version(checkpoint))
+        return True
+
+    def load_version(self, checkpoint: Optional[Path]) -> ModelVersion:
+        """Build a ``ModelVersion`` for ``checkpoint`` without touching the active one."""
+        model = GrooveTransformer()
+        if checkpoint is None:
+            _warm_start(model)
+            version = ModelVersion(WARM_START_VERSION, None, None, model)
+        else:
+            payload = torch.load(checkpoint, map_location="cpu")
+            if not isinstance(payload, dict) or "state_dict" not in payload:
+                payload = {"state_dict": payload}
+            model.load_state_dict(payload["state_dict"])
+            sha = self._hash(checkpoint)
+            metadata = dict(payload.get("state") or {})
+            if "epoch" in payload:
+                metadata.setdefault("epoch", payload["epoch"])
+            version = ModelVersion(f"{checkpoint.stem}-{sha[:8]}", checkpoint, sha, model, metadata=metadata)
+            self._record(version)
+        version.artifact, version.inference_model = self._load_inference_artifact(version)
+        return version
+
+    def activate(self, version: ModelVersion) -> None:
+        """Swap ``version`` in; in-flight handles keep the version they already hold."""
+        with self._lock:
+            previous = self._active
+            self._active = version
+            self._standby = [v for v in self._standby if v.version != version.version]
+            if previous is not None and previous.version != version.version:
+                self._standby.append(previous)
+                del self._standby[: max(0, len(self._standby) - (self.keep_versions - 1))]
+            self.swaps += 1
+        if version.sha256 is not None:
+            self._update_entry(version.version, activated_at=time.time())
+        print(f"[registry] Serving model version {version.version}")
+
+    def rollback(self, version: Optional[str] = None) -> ModelVersion:
+        """Reactivate ``version`` (default: the previously active one) and reject the current one.
+
+        Standby versions swap back instantly; older versions listed in the
+        manifest are reloaded from their checkpoint first.
+        """
+        with self._load_lock:
+            with self._lock:
+                candidates = [v for v in self._standby if version is None or v.version == version]
+                target = candidates[-1] if candidates else None
+            if target is None:
+                target = self._load_from_manifest(version)
+            current = self._active
+            self.activate(target)
+            if current is not None and current is not target:
+                with self._lock:
+                    self._standby = [v for v in self._standby if v is not current]
+                if current.sha256 is not None:
+                    self._update_entry(current.version, rejected=True)
+            self._update_entry(target.version, rejected=False)
+            self.rollbacks += 1
+        return target
+
+    def acquire(self) -> ModelHandle:
+        """Borrow the active version; use as ``with registry.acquire() as handle``."""
+        with self._lock:
+            version = self.active
+            version.in_flight += 1
+        return ModelHandle(self, version)
+
+    def _release(self, version: ModelVersion) -> None:
+        with self._lock:
+            version.in_flight -= 1
+
+    # -- reporting --------------------------------------------------------------------
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Manifest entries with their serving state and, for loaded versions, latency."""
+        with self._lock:
+            loaded = {v.version: v for v in self._standby}
+            if self._active is not None:
+                loaded[self._active.version] = self._active
+            active_id = self._active.version if self._active is not None else None
+            entries = {name: dict(entry) for name, entry in self._manifest.items()}
+        for name, version in loaded.items():
+            entry = entries.setdefault(name, {"version": name, "checkpoint": None, "sha256": None})
+            entry["state"] = "active" if name == active_id else "standby"
+            entry["in_flight"] = version.in_flight
+            entry["artifact"] = str(version.artifact) if version.artifact else None
+            entry["latency"] = version.latency.stats()
+        for entry in entries.values():
+            entry.setdefault("state", "rejected" if entry.get("rejected") else "available")
+        return sorted(entries.values(), key=lambda entry: entry.get("first_seen") or 0, reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            loaded = ([self._active] if self._active is not None else []) + list(reversed(self._standby))
+            return {
+                "active": self._active.version if self._active is not None else None,
+                "swaps": self.swaps,
+                "rollbacks": self.rollbacks,
+                "versions": {
+                    v.version: {"in_flight": v.in_flight, **v.latency.stats()} for v in loaded
+                },
+            }
+
+    # -- internals --------------------------------------------------------------------
+
+    def _load_inference_artifact(self, version: ModelVersion):
+        from .export import groove_artifact_name, load_artifact, resolve_artifact
+
+        if version.checkpoint is None:  # warm-start weights differ per process; no artifact matches them
+            return None, None
+        name = groove_artifact_name(version.version)
+        artifact = resolve_artifact(version.checkpoint, self.checkpoint_dir, name, self.inference_mode)
+        if artifact is None:
+            return None, None
+        return artifact, load_artifact(artifact)
+
+    def _latest_checkpoint(self) -> Optional[Path]:
+        rejected = {entry["checkpoint"]: entry["sha256"] for entry in list(self._manifest.values()) if entry.get("rejected")}
+        for checkpoint in sorted(self.checkpoint_dir.glob("*.pt"), key=_newest_first_key, reverse=True):
+            if checkpoint.name in rejected and rejected[checkpoint.name] == self._hash(checkpoint):
+                continue
+            return checkpoint
+        return None
+
+    def _load_from_manifest(self, version: Optional[str]) -> ModelVersion:
+        entry = self._manifest.get(version or "")
+        if entry is None:
+            raise KeyError(f"Unknown or unavailable model version: {version!r}")
+        checkpoint = self.checkpoint_dir / entry["checkpoint"]
+        if not checkpoint.exists() or self._hash(checkpoint) != entry["sha256"]:
+            raise KeyError(f"Checkpoint for model version {version!r} is missing or has changed")
+        return self.load_version(checkpoint)
+
+    def _hash(self, checkpoint: Path) -> str:
+        """SHA-256 of ``checkpoint``, reused from the manifest while size and mtime are unchanged."""
+        stat = checkpoint.stat()
+        for entry in list(self._manifest.values()):
+            if (entry["checkpoint"], entry["size"], entry["mtime_ns"]) == (checkpoint.name, stat.st_size, stat.st_mtime_ns):
+                return entry["sha256"]
+        return checkpoint_sha256(checkpoint)
+
+    def _record(self, version: ModelVersion) -> None:
+        assert version.checkpoint is not None and version.sha256 is not None
+        stat = version.checkpoint.stat()
+        with self._lock:
+            entry = self._manifest.get(version.version, {"first_seen": time.time()})
+            entry.update(
+                version=version.version,
+                checkpoint=version.checkpoint.name,
+                sha256=version.sha256,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                metadata=version.metadata,
+            )
+            self._manifest[version.version] = dict(entry)
+            self._write_manifest()
+
+    def _update_entry(self, name: str, **fields: Any) -> None:
+        with self._lock:
+            if name in self._manifest:
+                self._manifest[name] = {**self._manifest[name], **fields}
+                self._write_manifest()
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))["versions"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _write_manifest(self) -> None:
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps({"versions": self._manifest}, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+
+def _newest_first_key(checkpoint: Path) -> Tuple[int, str]:
+    """Sort key: modification time, then name as a tie-break. Names alone miss renamed schemes."""
+    try:
+        return checkpoint.stat().st_mtime_ns, checkpoint.name
+    except OSError:
+        return -1, checkpoint.name
+
+
+def _warm_start(model: GrooveTransformer) -> None:
+    def init_weights(module):
+        if isinstance(module, torch.nn.Linear):
+            torch.nn.init.xavier_uniform_(module.weight)
+            if module.bias is not None:
+                torch.nn.init.zeros_(module.bias)
+
+    model.apply(init_weights)
@@ -0,0 +1,126 @@
+"""Batched, on-tensor sampling of step patterns from the groove model.
+
+Each request asks for a set of lanes (a track name, a prior hit density and
+the model channel it reads) over ``steps`` steps. Requests with the same
+``steps`` share one batch, with lanes padded to the widest request, and the
+model runs one forward pass per distinct step count over a primed input.
+Grouping by length instead of masking padded steps keeps the call to
+``model(x)``, the only signature the exported TorchScript artifacts take. The hit probability for a lane at a step is
+
+    sigmoid(logit(density) + (logit(model_prob) - lane_mean) / temperature)
+
+with the model logits centred per lane. The blueprint density sets the overall
+busyness and the model shapes where the hits land. A high temperature flattens
+toward the prior, a low one follows the model. Random draws come from a
+generator seeded per request, so a seed reproduces its pattern whatever else
+shares the batch.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import torch
+
+_EPS = 1e-4
+_SEED_MODULUS = 2**63  # torch generators take 64-bit seeds; API seeds are unbounded Python ints
+MIN_VELOCITY = 0.6
+MAX_VELOCITY = 1.0
+
+
+@dataclass(frozen=True)
+class Lane:
+    name: str
+    density: float
+    channel: int
+
+
+@dataclass(frozen=True)
+class SampleRequest:
+    lanes: Sequence[Lane]
+    steps: int
+    seed: int
+    temperature: float = 1.0
+
+
+@dataclass
+class SampledGrid:
+    hits: np.ndarray  # (steps, lanes) bool
+    velocity: np.ndarray  # (steps, lanes) float64, rounded to 2 decimals, 0 where there is no hit
+
+    def lane_hits(self, lane: int) -> Tuple[List[int], List[float]]:
+        """Hit steps and their velocities for one lane, as plain lists."""
+        column = self.hits[:, lane]
+        return np.flatnonzero(column).tolist(), self.velocity[column, lane].tolist()
+
+
+def _input_dim(model: torch.nn.Module) -> int:
+    return getattr(getattr(model, "embedding", None), "in_features", 128)
+
+
+def sample_grids(model: torch.nn.Module, requests: Sequence[SampleRequest]) -> List[SampledGrid]:
+    """Sample every request with one forward pass of ``model`` per distinct step count."""
+    groups: Dict[int, List[int]] = {}
+    for index, request in enumerate(requests):
+        groups.setdefault(request.steps, []).append(index)
+    grids: List[SampledGrid] = [None] * len(requests)  # type: ignore[list-item]
+    for rows in groups.values():
+        for index, grid in zip(rows, _sample_uniform(model, [requests[index] for index in rows])):
+            grids[index] = grid
+    return grids
+
+
+def _sample_uniform(model: torch.nn.Module, requests: Sequence[SampleRequest]) -> List[SampledGrid]:
+    batch = len(requests)
+    steps = requests[0].steps
+    max_lanes = max(len(request.lanes) for request in requests)
+    channels = _input_dim(model)
+
+    density = torch.full((batch, max_lanes), 0.5)
+    lane_channel = torch.zeros((batch, max_lanes), dtype=torch.long)
+    lane_mask = torch.zeros((batch, max_lanes), dtype=torch.bool)
+    temperature = torch.empty(batch)
+    noise = torch.zeros((batch, steps, channels))
+    draws = torch.ones((batch, 2, steps, max_lanes))
+    for row, request in enumerate(requests):
+        lanes = len(request.lanes)
+        density[row, :lanes] = torch.tensor([lane.density for lane in request.lanes])
+        lane_channel[row, :lanes] = torch.tensor([lane.channel for lane in request.lanes])
+        lane_mask[row, :lanes] = True
+        temperature[row] = max(float(request.temperature), 1e-3)
+        generator = torch.Generator().manual_seed(int(request.seed) % _SEED_MODULUS)
+        noise[row] = torch.randn((steps, channels), generator=generator)
+        draws[row, :, :, :lanes] = torch.rand((2, steps, lanes), generator=generator)
+
+    # Prime each lane's channel with its density so the model sees the intended texture.
+    per_step_channel = lane_channel[:, None, :].expand(-1, steps, -1)
+    primed = (0.05 * noise).scatter_add_(2, per_step_channel, (density * lane_mask)[:, None, :].expand(-1, steps, -1))
+    with torch.inference_mode():
+        output = model(primed)
+    model_prob = output.float().gather(2, per_step_channel)
+
+    # Centre the model's logits per lane: the model decides where hits land, while
+    # the density prior (not an untrained model's bias) sets how many.
+    valid = lane_mask[:, None, :].expand(-1, steps, -1)
+    model_logit = torch.logit(model_prob.clamp(_EPS, 1 - _EPS)) * valid
+    model_logit = model_logit - model_logit.mean(dim=1, keepdim=True)
+    logits = torch.logit(density.clamp(_EPS, 1 - _EPS))[:, None, :] + model_logit / temperature[:, None, None]
+    prob = torch.sigmoid(logits)
+    hits = (draws[:, 0] < prob) & valid
+
+    # A lane never comes back empty: it gets its single most likely step instead.
+    empty = lane_mask & ~hits.any(dim=1)
+    best_step = prob.masked_fill(~valid, -1.0).argmax(dim=1)
+    hits |= torch.nn.functional.one_hot(best_step, steps).transpose(1, 2).bool() & empty[:, None, :]
+
+    velocity = MIN_VELOCITY + (MAX_VELOCITY - MIN_VELOCITY) * draws[:, 1].double()
+    velocity = torch.where(hits, velocity, torch.zeros_like(velocity)).numpy().round(2)
+    hits_np = hits.numpy()
+    return [
+        SampledGrid(hits_np[row, :, : len(request.lanes)], velocity[row, :, : len(request.lanes)])
+        for row, request in enumerate(requests)
+    ]
+
+
+__all__ = ["Lane", "SampleRequest", "SampledGrid", "sample_grids"]
@@ -60,6 +60,30 @@ def get_connection(password: str):
     return None
 
 
+def split_statements(sql: str) -> list[str]:
+    """Split a SQL script on semicolons, keeping $$-quoted function bodies intact.
+
+    Comment-only lines are dropped so a statement preceded by a section
+    header comment is still executed.
+    """
+    statements = []
+    current = []
+    in_dollar_quote = False
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not in_dollar_quote and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        if stripped.count("$$") % 2 == 1:
+            in_dollar_quote = not in_dollar_quote
+        if not in_dollar_quote and stripped.endswith(";"):
+            statements.append("\n".join(current).strip().rstrip(";"))
+            current = []
+    if current:
+        statements.append("\n".join(current).strip().rstrip(";"))
+    return [s for s in statements if s]
+
+
 def run_migration(conn):
     """Execute the migration SQL file."""
     with open(MIGRATION_FILE, "r", encoding="utf-8") as f:
@@ -68,17 +92,13 @@ def run_migration(conn):
     conn.autocommit = True
     cur = conn.cursor()
 
-    # Split on semicolons to execute statements individually
+    # Execute statements individually
     # (needed because CREATE POLICY can't be in a transaction block on some configs)
-    statements = [s.strip() for s in sql.split(";") if s.strip() and not s.strip().startswith("--")]
+    statements = split_statements(sql)
 
     success = 0
     errors = 0
     for stmt in statements:
-        # Skip comment-only blocks
-        lines = [l for l in stmt.split("\n") if l.strip() and not l.strip().startswith("--")]
-        if not lines:
-            continue
         try:
             cur.execute(stmt)
             success += 1
@@ -120,3 +120,58 @@ CREATE POLICY "service_role_all" ON user_subscriptions FOR ALL USING (true) WITH
 CREATE POLICY "service_role_all" ON generation_usage   FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY "service_role_all" ON user_addons        FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY "service_role_all" ON content_ownership  FOR ALL USING (true) WITH CHECK (true);
+
+-- 9. Atomic generation quota: check the tier limit and count the generation
+--    in one round trip. Returns allowed = FALSE (and leaves the counter
+--    untouched) when p_amount more generations would exceed the limit.
+CREATE OR REPLACE FUNCTION consume_generation(
+    p_user_id   UUID,
+    p_period    TEXT,
+    p_amount    INTEGER DEFAULT 1
+)
+RETURNS TABLE (
+    tier            TEXT,
+    usage_count     INTEGER,
+    usage_limit     INTEGER,
+    owns            BOOLEAN,
+    allowed         BOOLEAN
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_tier  subscription_tiers%ROWTYPE;
+    v_count INTEGER;
+BEGIN
+    SELECT t.* INTO v_tier
+    FROM user_subscriptions s
+    JOIN subscription_tiers t ON t.id = s.tier_id
+    WHERE s.user_id = p_user_id AND s.status = 'active'
+    ORDER BY s.created_at DESC
+    LIMIT 1;
+
+    IF NOT FOUND THEN
+        SELECT t.* INTO v_tier FROM subscription_tiers t WHERE t.id = 'free';
+    END IF;
+
+    IF p_amount <= v_tier.monthly_generations THEN
+        INSERT INTO generation_usage AS g (user_id, period, count)
+        VALUES (p_user_id, p_period, p_amount)
+        ON CONFLICT (user_id, period) DO UPDATE
+            SET count = g.count + p_amount,
+                updated_at = now()
+            WHERE g.count + p_amount <= v_tier.monthly_generations
+        RETURNING g.count INTO v_count;
+    END IF;
+
+    IF v_count IS NOT NULL THEN
+        RETURN QUERY SELECT v_tier.id, v_count, v_tier.monthly_generations, v_tier.owns_creations, TRUE;
+        RETURN;
+    END IF;
+
+    SELECT g.count INTO v_count
+    FROM generation_usage g
+    WHERE g.user_id = p_user_id AND g.period = p_period;
+
+    RETURN QUERY SELECT v_tier.id, COALESCE(v_count, 0), v_tier.monthly_generations, v_tier.owns_creations, FALSE;
+END;
+$$;
@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _training_cache_in_tmp(tmp_path_factory, monkeypatch):
+    # Dataset indexes and grid caches default to training/data/cache; keep test roots out of the tree.
+    monkeypatch.setenv("TRAINING_CACHE_DIR", str(tmp_path_factory.mktemp("training-cache")))
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.schemas import GenerationRequest, UserContext
+from app.services import inference, pattern_cache
+from app.services.inference import STREAM_PARTS, InferenceEngine
+from app.services.pattern_cache import PatternCache
+
+
+@pytest.fixture
+def charges(monkeypatch):
+    charges = []
+    monkeypatch.setattr(inference, "guard_inference_request", lambda user, amount=1: charges.append(amount) or {"tier_id": "pro"})
+    monkeypatch.setattr(pattern_cache._PatternCacheHolder, "instance", PatternCache(maxsize=64))
+    return charges
+
+
+def _collect(engine, request):
+    async def scenario():
+        return [event async for event in engine.stream_arrangement(request)]
+
+    return asyncio.run(scenario())
+
+
+def test_stream_sends_skeleton_then_each_section(tmp_path, charges):
+    engine = InferenceEngine(tmp_path)
+    request = GenerationRequest(style="techno", seed=99, user=UserContext(id="u1"))
+
+    events = _collect(engine, request)
+    replay = _collect(engine, request)
+
+    assert [event["event"] for event in events] == ["skeleton"] + ["section"] * 5 + ["done"]
+    skeleton, sections = events[0], events[1:-1]
+    assert skeleton["metadata"]["parts"] == list(STREAM_PARTS) and skeleton["metadata"]["tier_id"] == "pro"
+    assert [event["section"] for event in sections] == skeleton["sections"]
+    assert all([pattern["section"] for pattern in event["patterns"]] == list(STREAM_PARTS) for event in sections)
+    assert charges == [1, 1]  # same single unit as /generate/arrangement
+    assert [event["patterns"] for event in replay[1:-1]] == [event["patterns"] for event in sections]
+    assert replay[1]["metadata"]["cache_hits"] == len(STREAM_PARTS)
+
+
+def test_stream_over_quota_fails_before_the_skeleton(tmp_path, monkeypatch):
+    def reject(user, amount=1):
+        raise HTTPException(status_code=429, detail="limit reached")
+
+    monkeypatch.setattr(inference, "guard_inference_request", reject)
+    request = GenerationRequest(style="house", user=UserContext(id="u1"))
+
+    with pytest.raises(HTTPException) as exc_info:
+        _collect(InferenceEngine(tmp_path), request)
+    assert exc_info.value.status_code == 429
+
+
+def test_free_tier_allowance_covers_streamed_arrangements(tmp_path, monkeypatch):
+    remaining = [4]  # free tier: four generations a month
+
+    def guard(user, amount=1):
+        if amount > remaining[0]:
+            raise HTTPException(status_code=429, detail="limit reached")
+        remaining[0] -= amount
+        return {"tier_id": "free", "generations_remaining": remaining[0]}
+
+    monkeypatch.setattr(inference, "guard_inference_request", guard)
+    monkeypatch.setattr(pattern_cache._PatternCacheHolder, "instance", PatternCache(maxsize=64))
+    engine = InferenceEngine(tmp_path)
+
+    for left in (3, 2, 1, 0):
+        events = _collect(engine, GenerationRequest(style="house", user=UserContext(id="free")))
+        assert events[0]["metadata"]["generations_remaining"] == left
+        assert events[-1]["event"] == "done"
+    with pytest.raises(HTTPException) as exc_info:
+        _collect(engine, GenerationRequest(style="house", user=UserContext(id="free")))
+    assert exc_info.value.status_code == 429
+
+
+def test_sse_and_websocket_endpoints(tmp_path, charges, monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(inference._EngineHolder, "instance", InferenceEngine(tmp_path))
+    client = TestClient(app)
+    body = {"style": "house", "seed": 7, "user": {"id": "u1"}}
+
+    response = client.post("/generate/arrangement/stream", json=body)
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+    names = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert names == ["skeleton"] + ["section"] * 5 + ["done"]
+
+    with client.websocket_connect("/generate/arrangement/ws") as socket:
+        socket.send_json(body)
+        received = [socket.receive_json() for _ in range(7)]
+    assert [event["event"] for event in received] == names
+
+    with client.websocket_connect("/generate/arrangement/ws") as socket:
+        socket.send_json({"style": 5})
+        assert socket.receive_json()["status"] == 422
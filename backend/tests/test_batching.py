@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.services.batching import MicroBatcher
+
+
+def test_concurrent_submissions_share_one_batch():
+    batches = []
+
+    def runner(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+
+
+def test_batch_size_is_capped():
+    batches = []
+
+    def runner(items):
+        batches.append(len(items))
+        return list(items)
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch_size=2, max_wait_ms=20)
+        await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+
+    asyncio.run(scenario())
+    assert max(batches) == 2
+    assert sum(batches) == 5
+
+
+def test_runner_errors_reach_every_caller():
+    def runner(_items):
+        raise ValueError("boom")
+
+    async def scenario():
+        batcher = MicroBatcher(runner, max_batch_size=4, max_wait_ms=5)
+        outcomes = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.stop()
+        return outcomes
+
+    outcomes = asyncio.run(scenario())
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+
+def test_stop_fails_queued_and_in_flight_requests():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_dispatch(runner, items):
+            await release.wait()
+            return runner(items)
+
+        batcher = MicroBatcher(list, max_batch_size=1, max_wait_ms=0, dispatch=slow_dispatch)
+        calls = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0.01)  # the first item is in flight, the others are queued
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), timeout=1)
+
+    outcomes = asyncio.run(scenario())
+    assert len(outcomes) == 3 and all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+def test_stop_fails_requests_still_being_collected():
+    async def scenario():
+        batcher = MicroBatcher(list, max_batch_size=8, max_wait_ms=500)
+        call = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.05)  # the worker holds the item while it waits for more
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(call, return_exceptions=True), timeout=1)
+
+    (outcome,) = asyncio.run(scenario())
+    assert isinstance(outcome, RuntimeError)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import numpy as np
+import torch
+
+from training.trainer import TrainingConfig, train
+from training.utils import EarlyStopping, ResumableRun, load_checkpoint, split_indices
+
+
+def _model_and_optimizer():
+    model = torch.nn.Linear(3, 2)
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.1)
+    return model, optimizer
+
+
+def _train_step(model, optimizer):
+    optimizer.zero_grad()
+    model(torch.ones(4, 3)).sum().backward()
+    optimizer.step()
+
+
+def test_early_stopping_waits_for_patience():
+    stopper = EarlyStopping(patience=2)
+    assert stopper.step(1.0, 0)
+    assert not stopper.step(1.5, 1)
+    assert not stopper.should_stop
+    assert not stopper.step(1.2, 2)
+    assert stopper.should_stop
+    assert (stopper.best, stopper.best_epoch) == (1.0, 0)
+
+
+def test_interrupted_run_resumes_and_publishes_best(tmp_path):
+    model, optimizer = _model_and_optimizer()
+    run = ResumableRun(tmp_path, patience=3)
+    _train_step(model, optimizer)
+    run.end_epoch(model, optimizer, 0, val_loss=0.5)
+    best_weights = {key: value.clone() for key, value in model.state_dict().items()}
+    _train_step(model, optimizer)
+    run.end_epoch(model, optimizer, 1, val_loss=0.9)
+    last_weights = {key: value.clone() for key, value in model.state_dict().items()}
+
+    resumed_model, resumed_optimizer = _model_and_optimizer()
+    resumed = ResumableRun(tmp_path, patience=3)
+    assert resumed.resume(resumed_model, resumed_optimizer) == 2
+    assert all(torch.equal(resumed_model.state_dict()[key], last_weights[key]) for key in last_weights)
+    assert resumed_optimizer.state_dict()["state"]
+    assert resumed.early_stopping.bad_epochs == 1
+
+    path = resumed.finish(resumed_model, tmp_path, "final")
+    assert not (tmp_path / "resume").exists()
+    published, _ = _model_and_optimizer()
+    load_checkpoint(path, published)
+    assert all(torch.equal(published.state_dict()[key], best_weights[key]) for key in best_weights)
+
+
+def test_split_indices_is_deterministic_and_disjoint():
+    train_idx, val_idx = split_indices(20, 0.2, seed=3)
+    assert (train_idx, val_idx) == split_indices(20, 0.2, seed=3)
+    assert len(val_idx) == 4 and not set(train_idx) & set(val_idx)
+    assert split_indices(1, 0.2, seed=3) == ([0], [])
+
+
+def test_trainer_keeps_resume_state_out_of_registry_glob(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for idx in range(5):
+        np.save(data_dir / f"seq_{idx}.npy", np.random.rand(6, 128).astype(np.float32))
+    checkpoint_dir = tmp_path / "model" / "checkpoints"
+    config = TrainingConfig(data_dir=data_dir, checkpoint_dir=checkpoint_dir, epochs=2, batch_size=2, num_workers=0)
+
+    path = train(config)
+
+    assert path.parent == checkpoint_dir
+    assert [p.name for p in checkpoint_dir.glob("*.pt")] == [path.name]
+    assert not (checkpoint_dir / "resume").exists()
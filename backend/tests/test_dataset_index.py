@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import time
+
+from training.dataset_index import DatasetIndex, file_sha1
+from tests.test_drum_dataset import _write_dummy_midi
+
+
+def _age(*paths):
+    # Push mtimes out of the racy window so the index trusts them.
+    old = time.time() - 60
+    for path in paths:
+        os.utime(path, (old, old))
+
+
+def test_index_lists_nested_midis_sorted(tmp_path):
+    root = tmp_path / "drums"
+    (root / "kits" / "deep").mkdir(parents=True)
+    _write_dummy_midi(root / "b.mid")
+    _write_dummy_midi(root / "kits" / "deep" / "a.MIDI")
+    (root / "kits" / "notes.txt").write_text("noise")
+    index = DatasetIndex(root, index_path=tmp_path / "index.sqlite")
+    assert index.files() == [root / "b.mid", root / "kits" / "deep" / "a.MIDI"]
+
+
+def test_index_reuses_unchanged_directories_across_processes(tmp_path):
+    root = tmp_path / "drums"
+    (root / "kits").mkdir(parents=True)
+    _write_dummy_midi(root / "kits" / "one.mid")
+    _age(root / "kits", root)
+    db = tmp_path / "index.sqlite"
+    assert len(DatasetIndex(root, index_path=db).files()) == 1
+
+    reopened = DatasetIndex(root, index_path=db)
+    assert reopened.files() == [root / "kits" / "one.mid"]
+    assert reopened.scanned_dirs == 0
+
+    _write_dummy_midi(root / "kits" / "two.mid")
+    assert reopened.files() == [root / "kits" / "one.mid", root / "kits" / "two.mid"]
+    assert reopened.scanned_dirs == 1
+
+
+def test_index_drops_removed_files_and_directories(tmp_path):
+    root = tmp_path / "drums"
+    (root / "gone").mkdir(parents=True)
+    _write_dummy_midi(root / "keep.mid")
+    _write_dummy_midi(root / "gone" / "old.mid")
+    index = DatasetIndex(root, index_path=tmp_path / "index.sqlite")
+    assert len(index.files()) == 2
+    (root / "gone" / "old.mid").unlink()
+    (root / "gone").rmdir()
+    assert index.files() == [root / "keep.mid"]
+
+
+def test_entries_rehash_files_edited_in_place(tmp_path):
+    root = tmp_path / "drums"
+    root.mkdir()
+    path = root / "clip.mid"
+    _write_dummy_midi(path, pitch=36)
+    index = DatasetIndex(root, index_path=tmp_path / "index.sqlite")
+    first = index.entries()[0]
+    assert first.sha1 == file_sha1(path)
+
+    _write_dummy_midi(path, pitch=38, end=1.0)
+    os.utime(path, ns=(first.mtime_ns + 1_000_000, first.mtime_ns + 1_000_000))
+    second = index.entries()[0]
+    assert second.sha1 == file_sha1(path) != first.sha1
+
+
+def test_recently_modified_directory_is_rescanned_every_time(tmp_path):
+    root = tmp_path / "drums"
+    root.mkdir()
+    index = DatasetIndex(root, index_path=tmp_path / "index.sqlite")
+    _write_dummy_midi(root / "a.mid")
+    assert index.files() == [root / "a.mid"]
+
+    _write_dummy_midi(root / "b.mid")  # still inside the racy window of the first sync
+    assert index.files() == [root / "a.mid", root / "b.mid"]
+
+
+def test_default_index_location_follows_the_cache_setting(tmp_path, monkeypatch):
+    from training.dataset_index import index_path_for
+
+    monkeypatch.setenv("TRAINING_CACHE_DIR", str(tmp_path / "cache"))
+    assert index_path_for(tmp_path / "drums").parent == tmp_path / "cache"
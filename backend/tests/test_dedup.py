@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import shutil
+
+import numpy as np
+import pretty_midi
+
+from training.dedup import find_duplicates, find_duplicates_by_key, grid_from_key, grid_key
+from training.drum_dataset import DrumDataset
+from tests.test_drum_dataset import _write_dummy_midi
+
+
+def test_find_duplicates_prefers_bytes_then_grid():
+    kick = np.zeros((32, 6), dtype=np.uint8)
+    kick[0, 0] = 1
+    snare = np.zeros((32, 6), dtype=np.uint8)
+    snare[4, 1] = 1
+    empty = np.zeros((32, 6), dtype=np.uint8)
+    paths = ["a", "b", "c", "d", "e", "f"]
+    hashes = ["h1", "h1", "h2", "h3", "h4", "h5"]
+    result = find_duplicates(paths, hashes, [kick, kick, kick, snare, empty, empty])
+
+    assert result.canonical_paths == ["a", "d", "e", "f"]
+    assert result.duplicates == {1: (0, "bytes"), 2: (0, "grid")}
+    assert result.summary() == {"files": 6, "canonical": 4, "byte_duplicates": 1, "grid_duplicates": 1}
+    assert result.duplicate_map() == {"a": [{"path": "b", "match": "bytes"}, {"path": "c", "match": "grid"}]}
+
+    keys = [grid_key(grid) for grid in (kick, kick, kick, snare, empty, empty)]
+    assert np.array_equal(grid_from_key(keys[3]), snare)
+    assert find_duplicates_by_key(paths, hashes, keys) == result
+
+
+def test_dataset_dedupe_trains_on_canonical_files(tmp_path):
+    root = tmp_path / "drums"
+    root.mkdir()
+    _write_dummy_midi(root / "a_kick.mid", pitch=36)
+    shutil.copy(root / "a_kick.mid", root / "b_kick_copy.mid")
+    louder = pretty_midi.PrettyMIDI(str(root / "a_kick.mid"))
+    louder.instruments[0].notes[0].velocity = 127
+    louder.write(str(root / "c_kick_louder.mid"))
+    _write_dummy_midi(root / "d_snare.mid", pitch=38)
+
+    dataset = DrumDataset(root_path=root, dedupe=True, cache_dir=tmp_path / "cache")
+
+    assert dataset.files == [root / "a_kick.mid", root / "d_snare.mid"]
+    assert len(dataset) == 2
+    assert dataset.duplicates.summary()["byte_duplicates"] == 1
+    assert dataset.duplicates.summary()["grid_duplicates"] == 1
+    assert dataset[1][0, 1] == 1.0
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import numpy as np
+
+from training.drum_dataset import LANE_NAMES
+from training.drum_stats import DrumStats, accumulate
+
+
+def _random_grids(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random((count, 32, len(LANE_NAMES))) < 0.15).astype(np.uint8)
+
+
+def test_stats_match_direct_computation():
+    grids = _random_grids(50)
+    report = accumulate(grids, chunk=7).to_report(LANE_NAMES)
+
+    assert report["patterns"] == 50
+    expected_density = grids.sum(axis=(0, 1)) / (50 * 32)
+    assert np.allclose(list(report["density_per_lane"].values()), expected_density)
+    assert report["step_histogram"] == grids.sum(axis=(0, 2)).tolist()
+    hits = grids.sum(axis=(1, 2))
+    assert report["hits_per_pattern_distribution"] == {int(v): int((hits == v).sum()) for v in np.unique(hits)}
+    cooc = np.einsum("nsl,nsm->lm", grids.astype(np.int64), grids.astype(np.int64))
+    assert report["lane_cooccurrence"]["kick"]["snare"] == cooc[0, 1]
+    assert report["lane_cooccurrence"]["snare"]["snare"] == grids[:, :, 1].sum()
+
+
+def test_sharded_merge_equals_single_pass():
+    grids = _random_grids(9000, seed=1)
+    single = DrumStats().update(grids)
+    sharded = DrumStats()
+    for start in range(0, len(grids), 4096):
+        sharded.merge(accumulate(grids[start:start + 4096]))
+    assert sharded.patterns == single.patterns
+    assert np.array_equal(sharded.cooccurrence, single.cooccurrence)
+    assert np.array_equal(sharded.hit_histogram, single.hit_histogram)
+    assert sharded.to_report(LANE_NAMES) == single.to_report(LANE_NAMES)
+
+
+def test_snapshot_round_trip(tmp_path):
+    stats = DrumStats().update(_random_grids(10, seed=2))
+    loaded = DrumStats.load(stats.save(tmp_path / "stats.npz"))
+    assert loaded.to_report(LANE_NAMES) == stats.to_report(LANE_NAMES)
+    assert DrumStats().to_report(LANE_NAMES)["patterns"] == 0
+
+
+def test_subtract_undoes_merge():
+    grids = _random_grids(20, seed=3)
+    kept = DrumStats().update(grids[:15])
+    total = DrumStats().update(grids).subtract(accumulate(grids[15:], chunk=2))
+    assert total.to_report(LANE_NAMES) == kept.to_report(LANE_NAMES)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from app.services.executors import BoundedExecutor
+
+
+def test_cancelled_queued_call_leaves_the_queue_count():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=4)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(executor.run(lambda: None))
+        await asyncio.sleep(0.05)
+        depth_while_queued = executor.stats()["queue_depth"]
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await running
+        return depth_while_queued
+
+    assert asyncio.run(scenario()) == 1
+    stats = executor.stats()
+    assert stats["queue_depth"] == 0 and stats["active"] == 0
+    executor.shutdown()
+
+
+def test_failures_are_not_counted_as_completed():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+
+    def boom():
+        raise ValueError("boom")
+
+    async def scenario():
+        await executor.run(lambda: None)
+        with pytest.raises(ValueError):
+            await executor.run(boom)
+
+    asyncio.run(scenario())
+    assert executor.stats()["completed"] == 1 and executor.stats()["failed"] == 1
+    executor.shutdown()
+
+
+def test_cancelling_a_running_call_keeps_its_slot_until_the_thread_returns():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        follower = asyncio.ensure_future(executor.run(lambda: "ran"))
+        await asyncio.sleep(0.05)
+        blocked = not follower.done() and executor.stats()["waiting"] == 1
+        release.set()
+        return blocked, await asyncio.wait_for(follower, timeout=5)
+
+    assert asyncio.run(scenario()) == (True, "ran")
+    assert executor.stats()["active"] == 0 and executor.stats()["queue_depth"] == 0
+    executor.shutdown()
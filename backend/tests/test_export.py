@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import torch
+
+from models.drum_model import DrumModel
+from models.base_model import GrooveTransformer
+from models.export import artifact_path, example_input, export_model, groove_artifact_name, load_artifact
+from models.registry import ModelRegistry
+from training.utils import save_checkpoint
+
+
+def test_quantized_drum_artifact_matches_eager(tmp_path):
+    torch.manual_seed(0)
+    model = DrumModel().eval()
+    path = export_model(model, artifact_path(tmp_path, "drums", "quantized"), quantize=True)
+
+    artifact = load_artifact(path)
+    inputs = example_input(model, batch=3)
+    with torch.no_grad():
+        error = (artifact(inputs) - model(inputs)).abs().max().item()
+
+    assert path.suffix == ".ts"
+    assert error < 5e-2
+
+
+def test_registry_uses_exported_artifact_when_present(tmp_path):
+    save_checkpoint(GrooveTransformer(), tmp_path / "checkpoints", "ckpt-1", epoch=1)
+    registry = ModelRegistry(tmp_path, inference_mode="scripted")
+    registry.load_latest()
+    assert registry.inference_model is None
+
+    name = groove_artifact_name(registry.active.version)
+    export_model(registry.get_model(), artifact_path(registry.checkpoint_dir, name, "scripted"))
+    registry.load_latest()
+
+    assert registry.loaded_artifact is not None
+    assert registry.get_inference_model() is registry.inference_model
+
+
+def test_artifacts_are_never_shared_between_versions(tmp_path):
+    first_checkpoint = save_checkpoint(GrooveTransformer(), tmp_path / "checkpoints", "ckpt-1", epoch=1)
+    registry = ModelRegistry(tmp_path, inference_mode="scripted")
+    first = registry.load_latest()
+    artifact = export_model(first.model, artifact_path(registry.checkpoint_dir, groove_artifact_name(first.version), "scripted"))
+    assert registry.load_latest().artifact == artifact
+
+    save_checkpoint(GrooveTransformer(), tmp_path / "checkpoints", "ckpt-2", epoch=2)
+    assert registry.refresh() and registry.loaded_artifact is None  # ckpt-2 has not been exported
+    restored = registry.rollback()
+    assert restored.version == first.version and restored.artifact == artifact
+
+    first_checkpoint.unlink()
+    (tmp_path / "checkpoints" / "ckpt-2.pt").unlink()
+    export_model(first.model, artifact_path(registry.checkpoint_dir, "groove", "scripted"))  # a legacy unversioned export
+    assert ModelRegistry(tmp_path, inference_mode="scripted").load_latest().artifact is None
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import os
+
+import torch
+
+from inference import generate_drums
+from inference.generate_drums import _ResidentModelCache
+from models.drum_model import DrumModel
+from models.export import artifact_path, export_model
+
+
+def _save_checkpoint(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    torch.save({"state_dict": DrumModel().state_dict()}, path)
+    return path
+
+
+def _bump_mtime(path, seconds):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+
+def _counting_loads(monkeypatch):
+    loads = []
+    load = generate_drums._load_model
+    monkeypatch.setattr(generate_drums, "_load_model", lambda *args: loads.append(args) or load(*args))
+    return loads
+
+
+def test_one_load_serves_repeated_calls_until_the_checkpoint_changes(tmp_path, monkeypatch):
+    loads = _counting_loads(monkeypatch)
+    checkpoint = _save_checkpoint(tmp_path / "drums.pt")
+    cache = _ResidentModelCache()
+
+    first = cache.get(checkpoint)
+    assert cache.get(checkpoint) is first and len(loads) == 1
+
+    _bump_mtime(checkpoint, 5)
+    assert cache.get(checkpoint) is not first and len(loads) == 2
+
+
+def test_re_exported_artifact_is_picked_up(tmp_path, monkeypatch):
+    loads = _counting_loads(monkeypatch)
+    checkpoint = _save_checkpoint(tmp_path / "drums.pt")
+    artifact = export_model(DrumModel(), artifact_path(tmp_path, "drums", "scripted"))
+    _bump_mtime(artifact, 5)  # newer than the checkpoint, so it is served
+    cache = _ResidentModelCache()
+
+    first = cache.get(checkpoint, "scripted")
+    assert isinstance(first, torch.jit.ScriptModule)
+    assert cache.get(checkpoint, "scripted") is first
+
+    export_model(DrumModel(), artifact)
+    _bump_mtime(artifact, 10)
+    assert cache.get(checkpoint, "scripted") is not first and len(loads) == 2
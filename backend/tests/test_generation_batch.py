@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.schemas import BatchGenerationRequest, GenerationRequest, UserContext
+from app.services import inference, pattern_cache
+from app.services.inference import InferenceEngine
+from app.services.pattern_cache import PatternCache
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(pattern_cache._PatternCacheHolder, "instance", PatternCache(maxsize=32))
+    engine = InferenceEngine(tmp_path)
+    build_calls = []
+    build = engine._build_patterns
+    monkeypatch.setattr(engine, "_build_patterns", lambda model, specs: build_calls.append(len(specs)) or build(model, specs))
+    engine.build_calls = build_calls
+    return engine
+
+
+def test_batch_charges_once_and_builds_in_one_pass(engine, monkeypatch):
+    charges = []
+    monkeypatch.setattr(inference, "guard_inference_request", lambda user, amount=1: charges.append(amount) or {"tier_id": "studio"})
+    user = UserContext(id="u1")
+    single = asyncio.run(engine.generate_pattern("melody", GenerationRequest(style="house", seed=11, user=user)))
+    request = BatchGenerationRequest(
+        style="house",
+        seed=42,
+        user=user,
+        items=[
+            {"section": "drums"},
+            {"section": "bassline", "steps": 32},
+            {"section": "melody", "seed": 11},
+            {"section": "arrangement"},
+        ],
+    )
+
+    response = asyncio.run(engine.generate_batch(request))
+
+    assert charges == [1, 4]
+    assert engine.build_calls == [1, 2]  # the replayed melody came from the cache
+    results = response["results"]
+    assert [result["section"] for result in results] == ["drums", "bassline", "melody", "arrangement"]
+    assert len(results[0]["pattern"]["tracks"]) == 8 and results[1]["pattern"]["steps"] == 32
+    assert results[2]["pattern"] == single["pattern"] and results[2]["metadata"]["cache"]["tier"] == "memory"
+    assert [section["label"] for section in results[3]["sections"]][0] == "Intro"
+    assert response["metadata"]["count"] == 4 and response["metadata"]["tier_id"] == "studio"
+
+
+def test_batch_over_quota_generates_nothing(engine, monkeypatch):
+    def reject(user, amount=1):
+        raise HTTPException(status_code=429, detail="limit reached")
+
+    monkeypatch.setattr(inference, "guard_inference_request", reject)
+    request = BatchGenerationRequest(style="house", user=UserContext(id="u1"), items=[{"section": "drums"}] * 3)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(engine.generate_batch(request))
+    assert exc_info.value.status_code == 429
+    assert engine.build_calls == []
+
+
+def test_steps_are_bounded_in_requests_and_items():
+    from pydantic import ValidationError
+
+    for steps in (0, -4, 10_000):
+        with pytest.raises(ValidationError):
+            GenerationRequest(style="house", steps=steps, user=UserContext(id="u1"))
+        with pytest.raises(ValidationError):
+            BatchGenerationRequest(style="house", user=UserContext(id="u1"), items=[{"section": "drums", "steps": steps}])
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+from training.drum_dataset import DrumDataset
+from training.grid_cache import GridCache
+from tests.test_drum_dataset import _write_dummy_midi
+
+
+def test_cached_dataset_matches_direct_encoding(tmp_path):
+    data_root = tmp_path / "midi"
+    data_root.mkdir()
+    _write_dummy_midi(data_root / "kick.mid", pitch=36)
+    _write_dummy_midi(data_root / "snare.mid", pitch=38, start=1.0, end=1.5)
+
+    direct = DrumDataset(root_path=data_root)
+    cached = DrumDataset(root_path=data_root, cache_dir=tmp_path / "cache")
+
+    assert cached.cache.encoded == 2
+    for idx in range(len(direct)):
+        assert np.array_equal(direct[idx].numpy(), cached[idx].numpy())
+    assert cached[0].dtype == direct[0].dtype
+
+
+def test_only_changed_files_are_reencoded(tmp_path):
+    data_root = tmp_path / "midi"
+    data_root.mkdir()
+    kick = data_root / "kick.mid"
+    snare = data_root / "snare.mid"
+    _write_dummy_midi(kick, pitch=36)
+    _write_dummy_midi(snare, pitch=38)
+    cache_dir = tmp_path / "cache"
+
+    DrumDataset(root_path=data_root, cache_dir=cache_dir)
+    unchanged = DrumDataset(root_path=data_root, cache_dir=cache_dir)
+    assert (unchanged.cache.encoded, unchanged.cache.reused) == (0, 2)
+
+    _write_dummy_midi(snare, pitch=42)
+    stat = snare.stat()
+    os.utime(snare, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    changed = DrumDataset(root_path=data_root, cache_dir=cache_dir)
+
+    assert (changed.cache.encoded, changed.cache.reused) == (1, 1)
+    assert changed[1][0, 2].item() == 1.0
+
+
+def test_grid_cache_is_uint8_memmap(tmp_path):
+    path = tmp_path / "a.mid"
+    _write_dummy_midi(path)
+    cache = GridCache(tmp_path / "cache")
+    grids = cache.build([path], lambda _p: np.ones((32, 6), dtype=np.float32))
+
+    assert grids.dtype == np.uint8
+    assert grids.shape == (1, 32, 6)
+    assert isinstance(grids, np.memmap)
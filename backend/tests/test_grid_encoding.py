@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pretty_midi
+
+from training.benchmark_encoding import encode_per_note, synthetic_corpus
+from training.drum_dataset import LANE_NAMES, PITCH_LUT, DrumDataset
+from training.grid_encoding import encode_hits, first_unique, round_steps
+from training.normalize_drums import normalize_midi
+
+
+def test_encode_hits_matches_per_note_loop():
+    for starts, pitches, end_time in synthetic_corpus(files=20, notes=200, seed=3):
+        expected = encode_per_note(starts, pitches, end_time)
+        actual = encode_hits(starts, pitches, end_time, PITCH_LUT, len(LANE_NAMES))
+        assert np.array_equal(actual, expected)
+
+
+def test_encode_hits_velocity_keeps_loudest_hit():
+    starts = np.array([0.0, 0.01, 1.0])
+    pitches = np.array([36, 36, 38])
+    velocities = np.array([40, 127, 64])
+    grid = encode_hits(starts, pitches, 2.0, PITCH_LUT, len(LANE_NAMES), steps=16, velocities=velocities)
+    assert grid.shape == (16, len(LANE_NAMES))
+    assert grid[0, 0] == 1.0
+    assert np.isclose(grid[8, 1], 64 / 127)
+    assert np.count_nonzero(grid) == 2
+
+
+def test_encode_hits_ignores_unmapped_and_out_of_range_pitches():
+    grid = encode_hits(np.array([0.0, 0.5]), np.array([200, 60]), 1.0, PITCH_LUT, len(LANE_NAMES))
+    assert not grid.any()
+
+
+def test_round_steps_and_first_unique():
+    assert round_steps(np.array([0.0, 0.26, 0.74, 5.0]), 0.5, 4).tolist() == [0, 1, 1, 3]
+    assert first_unique(np.array([7, 3, 7, 1, 3])).tolist() == [0, 1, 3]
+
+
+def test_encode_midi_supports_velocity_grids():
+    midi = pretty_midi.PrettyMIDI()
+    drums = pretty_midi.Instrument(program=0, is_drum=True)
+    drums.notes.append(pretty_midi.Note(velocity=127, pitch=36, start=0.0, end=0.1))
+    drums.notes.append(pretty_midi.Note(velocity=64, pitch=38, start=1.0, end=2.0))
+    midi.instruments.append(drums)
+    binary = DrumDataset.encode_midi(midi)
+    scaled = DrumDataset.encode_midi(midi, steps=64, velocity=True)
+    assert binary.shape == (32, len(LANE_NAMES)) and binary.sum() == 2
+    assert scaled.shape == (64, len(LANE_NAMES))
+    assert scaled[0, 0] == 1.0 and np.isclose(scaled.max(axis=0)[1], 64 / 127)
+
+
+def test_normalize_midi_drops_disallowed_and_duplicate_hits(tmp_path):
+    path = tmp_path / "groove.mid"
+    midi = pretty_midi.PrettyMIDI()
+    drums = pretty_midi.Instrument(program=0, is_drum=True)
+    drums.notes.append(pretty_midi.Note(velocity=127, pitch=36, start=0.0, end=0.1))
+    drums.notes.append(pretty_midi.Note(velocity=20, pitch=36, start=0.01, end=0.1))
+    drums.notes.append(pretty_midi.Note(velocity=90, pitch=60, start=1.0, end=1.1))
+    drums.notes.append(pretty_midi.Note(velocity=20, pitch=38, start=2.0, end=3.2))
+    midi.instruments.append(drums)
+    midi.write(str(path))
+
+    assert normalize_midi(path)
+    notes = pretty_midi.PrettyMIDI(str(path)).instruments[0].notes
+    assert [(note.pitch, note.velocity) for note in notes] == [(36, 110), (38, 30)]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+
+from training import report_drums
+from training.dedup import DedupResult
+from training.drum_dataset import LANE_NAMES
+from training.ingest import IngestEngine
+from tests.test_drum_dataset import _write_dummy_midi
+
+
+def _fail_on_bad(path):
+    if path.name.startswith("bad"):
+        raise ValueError("corrupt")
+    return path.name
+
+
+def _count_names(seen, path):
+    if path.name.startswith("bad"):
+        raise ValueError("corrupt")
+    seen.append(path.name)
+    return len(path.name)
+
+
+def _merge_lists(total, partial):
+    total.extend(partial)
+    return total
+
+
+def test_map_captures_per_file_errors_and_keeps_order(tmp_path):
+    paths = [tmp_path / name for name in ("a.mid", "bad.mid", "c.mid")]
+    engine = IngestEngine(workers=2, chunk_size=1, progress=False)
+
+    results = engine.map(_fail_on_bad, paths)
+
+    assert [result.path for result in results] == paths
+    assert [result.value for result in results] == ["a.mid", None, "c.mid"]
+    assert "corrupt" in results[1].error
+
+
+def test_summarize_parses_each_file_once(tmp_path, monkeypatch):
+    midi_path = tmp_path / "kick.mid"
+    _write_dummy_midi(midi_path, pitch=36)
+    (tmp_path / "broken.mid").write_bytes(b"not midi")
+    engine = IngestEngine(workers=1, progress=False)
+
+    first = engine.summarize([midi_path, tmp_path / "broken.mid"])
+    assert first[0].ok and first[0].value.drum_pitches == (36,)
+    assert first[0].value.grid[0, 0] == 1
+    assert not first[1].ok
+
+    calls = []
+    monkeypatch.setattr(engine, "map", lambda fn, paths, label="": calls.append(paths) or [])
+    engine.summarize([midi_path])
+    assert calls == [[]]
+
+
+def test_fold_merges_one_accumulator_per_chunk(tmp_path):
+    paths = [tmp_path / name for name in ("a.mid", "bad.mid", "ccc.mid", "dd.mid")]
+    engine = IngestEngine(workers=2, chunk_size=2, progress=False)
+
+    total, results = engine.fold(_count_names, list, _merge_lists, paths)
+
+    assert total == ["a.mid", "ccc.mid", "dd.mid"]
+    assert [result.value for result in results] == [5, None, 7, 6]
+    assert "corrupt" in results[1].error
+    assert engine.fold(_count_names, list, _merge_lists, []) == ([], [])
+
+
+def test_report_counts_each_pattern_once_without_keeping_summaries(tmp_path, monkeypatch):
+    root = tmp_path / "drums"
+    root.mkdir()
+    _write_dummy_midi(root / "kick.mid", pitch=36)
+    (root / "kick_copy.mid").write_bytes((root / "kick.mid").read_bytes())
+    _write_dummy_midi(root / "kick_long.mid", pitch=36, end=0.6)  # other bytes, same grid
+    _write_dummy_midi(root / "snare.mid", pitch=38)
+    (root / "broken.mid").write_bytes(b"not midi")
+    engine = IngestEngine(workers=1, progress=False)
+    monkeypatch.setattr(report_drums, "DATASET_ROOT", str(root))
+    monkeypatch.setattr(report_drums, "REPORT_PATH", tmp_path / "report.json")
+    monkeypatch.setattr(report_drums, "STATS_SNAPSHOT_PATH", tmp_path / "stats.npz")
+    monkeypatch.setattr(report_drums, "get_ingest_engine", lambda: engine)
+    monkeypatch.setattr(DedupResult, "write_report", lambda self: tmp_path / "duplicates.json")
+
+    report = json.loads(report_drums.generate_report().read_text())
+
+    assert report["patterns"] == 2
+    assert report["parse_errors"] == 1
+    assert report["deduplication"]["byte_duplicates"] == 1
+    assert report["deduplication"]["grid_duplicates"] == 1
+    assert report["density_per_lane"][LANE_NAMES[0]] == report["density_per_lane"][LANE_NAMES[1]]
+    assert engine._summaries == {}
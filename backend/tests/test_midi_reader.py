@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import numpy as np
+import pretty_midi
+import pytest
+
+from training.drum_dataset import DrumDataset
+from training.midi_reader import DrumNotes, MidiParseError, parse_drum_notes, read_drum_notes
+from tests.test_drum_dataset import _write_dummy_midi
+
+
+def _assert_same_notes(path):
+    expected = DrumNotes.from_pretty_midi(pretty_midi.PrettyMIDI(str(path)))
+    actual = read_drum_notes(path)
+    assert actual.end_time == expected.end_time
+    order_expected = np.lexsort((expected.pitches, expected.starts))
+    order_actual = np.lexsort((actual.pitches, actual.starts))
+    assert np.array_equal(actual.starts[order_actual], expected.starts[order_expected])
+    assert np.array_equal(actual.pitches[order_actual], expected.pitches[order_expected])
+    assert np.array_equal(actual.velocities[order_actual], expected.velocities[order_expected])
+
+
+@pytest.mark.parametrize("pitch,start,end", [(36, 0.0, 0.5), (38, 1.25, 1.5), (42, 3.0, 3.1), (60, 0.5, 2.0)])
+def test_reader_matches_pretty_midi_on_fixture_files(tmp_path, pitch, start, end):
+    path = tmp_path / "clip.mid"
+    _write_dummy_midi(path, pitch=pitch, start=start, end=end)
+    _assert_same_notes(path)
+    assert np.array_equal(
+        DrumDataset(root_path=tmp_path)._encode_file(path),
+        DrumDataset.encode_midi(pretty_midi.PrettyMIDI(str(path))),
+    )
+
+
+def test_reader_matches_pretty_midi_with_tempo_changes_and_other_tracks(tmp_path):
+    midi = pretty_midi.PrettyMIDI(initial_tempo=97.0)
+    drums = pretty_midi.Instrument(program=0, is_drum=True)
+    for step in range(24):
+        drums.notes.append(pretty_midi.Note(velocity=40 + step, pitch=(36, 38, 42, 46)[step % 4], start=step * 0.21, end=step * 0.21 + 0.1))
+    bass = pretty_midi.Instrument(program=33)
+    bass.notes.append(pretty_midi.Note(velocity=90, pitch=40, start=0.0, end=9.5))
+    bass.control_changes.append(pretty_midi.ControlChange(number=7, value=100, time=11.0))
+    midi.instruments.extend([drums, bass])
+    midi.lyrics.append(pretty_midi.Lyric("la", 12.5))
+    path = tmp_path / "song.mid"
+    midi.write(str(path))
+    _assert_same_notes(path)
+
+
+def test_reader_rejects_non_midi_bytes():
+    with pytest.raises(MidiParseError):
+        parse_drum_notes(b"RIFF0000WAVEfmt ")
+
+
+def test_dataset_falls_back_to_pretty_midi_for_rejected_files(tmp_path):
+    path = tmp_path / "broken.mid"
+    path.write_bytes(b"not a midi file")
+    grid = DrumDataset(root_path=tmp_path)._encode_file(path)
+    assert not grid.any()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import pytest
+import torch
+
+from models.base_model import GrooveTransformer
+from models.registry import ModelRegistry
+from training.utils import save_checkpoint
+
+
+def _save(tmp_path, tag, seed, val_loss):
+    torch.manual_seed(seed)
+    return save_checkpoint(GrooveTransformer(), tmp_path / "checkpoints", tag, epoch=3, state={"val_loss": val_loss})
+
+
+def _weights(model):
+    return next(model.parameters()).detach().clone()
+
+
+def test_refresh_swaps_without_disturbing_in_flight_requests(tmp_path):
+    _save(tmp_path, "ckpt-1", seed=1, val_loss=0.5)
+    registry = ModelRegistry(tmp_path)
+    first = registry.load_latest()
+    assert first.version.startswith("ckpt-1-") and first.metadata == {"val_loss": 0.5, "epoch": 3}
+    assert not registry.refresh()
+
+    in_flight = registry.acquire()
+    with in_flight:
+        old_weights = _weights(in_flight.model)
+        _save(tmp_path, "ckpt-2", seed=2, val_loss=0.4)
+        assert registry.refresh()
+        with registry.acquire() as handle:
+            assert handle.version.version.startswith("ckpt-2-")
+        assert in_flight.version is first and first.in_flight == 1
+        assert torch.equal(_weights(in_flight.model), old_weights)
+
+    stats = registry.stats()
+    assert stats["active"] == registry.active.version and stats["swaps"] == 2
+    assert stats["versions"][first.version]["requests"] == 1
+    assert stats["versions"][first.version]["in_flight"] == 0
+    assert [entry["state"] for entry in registry.versions()] == ["active", "standby"]
+
+
+def test_rollback_rejects_the_bad_version_across_restarts(tmp_path):
+    _save(tmp_path, "ckpt-1", seed=1, val_loss=0.5)
+    registry = ModelRegistry(tmp_path)
+    good = registry.load_latest()
+    _save(tmp_path, "ckpt-2", seed=2, val_loss=0.9)
+    registry.refresh()
+    bad = registry.active
+
+    assert registry.rollback() is good
+    assert not registry.refresh()
+    assert {entry["version"]: entry["state"] for entry in registry.versions()}[bad.version] == "rejected"
+
+    restarted = ModelRegistry(tmp_path)
+    assert restarted.load_latest().sha256 == good.sha256
+    assert restarted.rollback(bad.version).sha256 == bad.sha256  # explicit rollback can restore it
+    with pytest.raises(KeyError):
+        restarted.rollback("ckpt-0-deadbeef")
+
+
+def test_newest_checkpoint_wins_even_with_the_lowest_name(tmp_path):
+    import os
+
+    older = _save(tmp_path, "groove_v2", seed=1, val_loss=0.5)
+    os.utime(older, (1_000_000, 1_000_000))
+    registry = ModelRegistry(tmp_path)
+    assert registry.load_latest().version.startswith("groove_v2-")
+
+    _save(tmp_path, "drum_model", seed=2, val_loss=0.4)
+    assert registry.refresh()
+    assert registry.active.version.startswith("drum_model-")
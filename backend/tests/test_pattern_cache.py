@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.schemas import GenerationRequest, UserContext
+from app.services import inference, pattern_cache
+from app.services.inference import InferenceEngine
+from app.services.pattern_cache import PatternCache, pattern_cache_key
+
+
+def _key(seed, model="ckpt-1-abcd"):
+    return pattern_cache_key("drums", 16, seed, "House", 0.65, model)
+
+
+def test_memory_tier_is_bounded_lru_and_returns_copies():
+    cache = PatternCache(maxsize=2)
+    cache.set(_key(1), {"tracks": [1]})
+    cache.set(_key(2), {"tracks": [2]})
+    tier, pattern = cache.get(_key(1))
+    pattern["tracks"].append(99)
+    cache.set(_key(3), {"tracks": [3]})  # evicts seed 2, the least recently used
+
+    assert tier == "memory" and cache.get(_key(1)) == ("memory", {"tracks": [1]})
+    assert cache.get(_key(2)) == (None, None)
+    assert _key(1) == pattern_cache_key("drums", 16, 1, " house", 0.65000001, "ckpt-1-abcd")
+    assert cache.stats()["hit_rate"] == round(2 / 3, 4)
+
+
+def test_disk_tier_is_shared_between_workers(tmp_path):
+    first = PatternCache(disk_dir=tmp_path)
+    second = PatternCache(disk_dir=tmp_path)
+    first.set(_key(7), {"tracks": [7]})
+    first.set(_key(8), {"tracks": [8]}, shared=False)
+
+    assert second.get(_key(7)) == ("disk", {"tracks": [7]})
+    assert second.get(_key(7))[0] == "memory"
+    assert second.get(_key(8)) == (None, None)
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_replayed_seed_is_served_from_cache_and_still_charged(tmp_path, monkeypatch):
+    charges = []
+    monkeypatch.setattr(inference, "guard_inference_request", lambda user: charges.append(user.id) or {"tier": "free"})
+    monkeypatch.setattr(pattern_cache._PatternCacheHolder, "instance", PatternCache(maxsize=8))
+    engine = InferenceEngine(tmp_path)
+    request = GenerationRequest(style="house", seed=1234, user=UserContext(id="u1"))
+
+    async def scenario():
+        return [await engine.generate_pattern("drums", request) for _ in range(2)]
+
+    first, second = asyncio.run(scenario())
+    assert first["pattern"] == second["pattern"]
+    assert first["metadata"]["cache"] == {"hit": False, "tier": None, "hit_rate": 0.0}
+    assert second["metadata"]["cache"] == {"hit": True, "tier": "memory", "hit_rate": 0.5}
+    assert charges == ["u1", "u1"]
+
+
+def test_disk_pruning_runs_off_the_writing_thread(tmp_path):
+    cache = PatternCache(maxsize=4, disk_dir=tmp_path, disk_max_entries=10)
+    cache.set_many([(_key(seed), {"tracks": [seed]}) for seed in range(256)])
+    cache._pruner.join(timeout=10)
+
+    assert cache._pruner.name == "pattern-cache-prune"
+    assert len(list(tmp_path.glob("*/*.json"))) == 10
+
+
+def test_engine_reads_the_disk_tier_on_the_io_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference, "guard_inference_request", lambda user: {})
+    monkeypatch.setattr(pattern_cache._PatternCacheHolder, "instance", PatternCache(maxsize=8, disk_dir=tmp_path / "cache"))
+    offloaded = []
+    run_db = inference.run_db
+    monkeypatch.setattr(inference, "run_db", lambda fn, *args: offloaded.append(fn.__name__) or run_db(fn, *args))
+    engine = InferenceEngine(tmp_path)
+    asyncio.run(engine.ensure_loaded())
+    engine.registry.active.sha256 = "0" * 64  # pretend a versioned checkpoint is serving
+    request = GenerationRequest(style="house", seed=99, user=UserContext(id="u1"))
+
+    asyncio.run(engine.generate_pattern("drums", request))
+    assert offloaded[-2:] == ["get_many", "set_many"]
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.schemas import GenerationRequest, UserContext
+from app.services import inference, pattern_reservoir
+from app.services.inference import InferenceEngine
+from app.services.pattern_reservoir import PatternReservoir, reservoir_key
+
+KEY = reservoir_key("House", "drums", 16, 0.65)
+
+
+def test_depth_follows_demand_and_model_version():
+    reservoir = PatternReservoir(max_depth=3, min_depth=2, idle_ms=0)
+    assert reservoir.neediest() is None  # nothing requested yet
+
+    assert reservoir.pop(KEY, "v1") is None
+    assert reservoir.neediest() == (KEY, 2)
+    assert reservoir.push(KEY, "v1", [(seed, {"seed": seed}) for seed in range(5)]) == 3
+    assert reservoir.pop(reservoir_key(" house", "drums", 16, 0.65000001), "v1") == (0, {"seed": 0})
+    assert reservoir.neediest() is None  # two requests, two patterns left
+
+    assert reservoir.pop(KEY, "v2") is None  # a hot swap drops patterns from the old model
+    stats = reservoir.stats()
+    assert stats["depth"] == 0 and stats["hit_rate"] == round(1 / 3, 4) and stats["discarded"] == 4
+    assert stats["slots"] == [{"style": "house", "section": "drums", "steps": 16, "temperature": 0.65, "depth": 0, "target": 3}]
+
+
+def test_unseeded_requests_pop_refilled_patterns(tmp_path, monkeypatch):
+    reservoir = PatternReservoir(max_depth=4, min_depth=4, idle_ms=0)
+    monkeypatch.setattr(pattern_reservoir._PatternReservoirHolder, "instance", reservoir)
+    monkeypatch.setattr(inference, "guard_inference_request", lambda user: {"tier_id": "free"})
+    engine = InferenceEngine(tmp_path)
+    request = GenerationRequest(style="house", user=UserContext(id="u1"))
+
+    async def scenario():
+        live = await engine.generate_pattern("drums", request)
+        refilled = await engine.refill_reservoir()
+        served = await engine.generate_pattern("drums", request)
+        return live, refilled, served
+
+    live, refilled, served = asyncio.run(scenario())
+    assert live["metadata"]["cache"] == {"hit": False, "tier": None, "hit_rate": 0.0}
+    assert refilled == 4
+    assert served["metadata"]["cache"] == {"hit": True, "tier": "reservoir", "hit_rate": 0.5}
+    assert len(served["pattern"]["tracks"]) == 8
+    assert reservoir.stats()["depth"] == 3
+
+    # A served pattern is the one its seed reproduces, so replaying it still works.
+    replay = GenerationRequest(style="house", seed=served["metadata"]["seed"], user=UserContext(id="u1"))
+    assert asyncio.run(engine.generate_pattern("drums", replay))["pattern"] == served["pattern"]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import numpy as np
+import torch
+
+from models.base_model import GrooveTransformer
+from models.sampling import Lane, SampleRequest, sample_grids
+
+_LANES = [Lane("Kick", 0.8, 36), Lane("Crash", 0.05, 49)]
+
+
+def _model():
+    torch.manual_seed(0)
+    return GrooveTransformer(hidden_dim=32, num_layers=1, num_heads=2).eval()
+
+
+def test_seed_reproduces_pattern_whatever_shares_the_batch():
+    model = _model()
+    alone = sample_grids(model, [SampleRequest(_LANES, 16, seed=5)])[0]
+    batched = sample_grids(model, [SampleRequest(_LANES, 16, seed=9), SampleRequest(_LANES, 16, seed=5)])
+    assert np.array_equal(alone.hits, batched[1].hits)
+    assert np.array_equal(alone.velocity, batched[1].velocity)
+    assert not np.array_equal(batched[0].hits, batched[1].hits)
+
+
+def test_padded_requests_keep_their_own_shape_and_never_come_back_empty():
+    short, long = sample_grids(_model(), [SampleRequest(_LANES[:1], 8, seed=1), SampleRequest(_LANES, 32, seed=2)])
+    assert short.hits.shape == (8, 1) and long.hits.shape == (32, 2)
+    for grid in (short, long):
+        assert grid.hits.any(axis=0).all()
+        assert ((grid.velocity >= 0.6) & (grid.velocity <= 1.0))[grid.hits].all()
+        assert (grid.velocity[~grid.hits] == 0).all()
+    hits, velocity = long.lane_hits(0)
+    assert hits == sorted(hits) and len(hits) == len(velocity)
+
+
+def test_high_temperature_falls_back_to_the_density_prior():
+    requests = [SampleRequest(_LANES, 64, seed=seed, temperature=1e4) for seed in range(16)]
+    grids = sample_grids(_model(), requests)
+    rates = np.mean([grid.hits.mean(axis=0) for grid in grids], axis=0)
+    assert abs(rates[0] - 0.8) < 0.05
+    assert rates[1] < 0.1
+
+
+def test_mixed_step_batches_run_on_exported_artifacts(tmp_path):
+    from models.export import artifact_path, export_model, load_artifact
+
+    model = _model()
+    requests = [SampleRequest(_LANES, 16, seed=3), SampleRequest(_LANES[:1], 32, seed=4), SampleRequest(_LANES, 16, seed=5)]
+    eager = sample_grids(model, requests)
+    for mode in ("scripted", "quantized"):
+        artifact = load_artifact(export_model(model, artifact_path(tmp_path, "groove", mode), quantize=mode == "quantized"))
+        grids = sample_grids(artifact, requests)
+        assert [grid.hits.shape for grid in grids] == [(16, 2), (32, 1), (16, 2)]
+        if mode == "scripted":
+            assert all(np.array_equal(a.hits, b.hits) for a, b in zip(grids, eager))
+
+
+def test_seeds_beyond_64_bits_are_reduced_not_rejected():
+    big = sample_grids(_model(), [SampleRequest(_LANES, 16, seed=2**70 + 5)])[0]
+    assert big.hits.shape == (16, 2)
+    assert np.array_equal(big.hits, sample_grids(_model(), [SampleRequest(_LANES, 16, seed=2**70 + 5)])[0].hits)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.services.warmup import WarmupTracker
+from app.startup_profile import parse_importtime, profile_imports
+
+
+def test_app_import_defers_heavy_modules():
+    profile = profile_imports("app.main")
+    assert profile.heavy_modules() == []
+    assert any(timing.module == "app.main" for timing in profile.timings)
+
+
+def test_parse_importtime_reads_nesting():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   app.config",
+        "import time:        80 |        200 | app",
+    ])
+    timings = parse_importtime(output)
+    assert [(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings] == [
+        ("app.config", 120, 120, 1),
+        ("app", 80, 200, 0),
+    ]
+
+
+def test_tracker_is_ready_only_after_every_step_succeeds():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+
+        async def broken():
+            raise RuntimeError("no checkpoint")
+
+        tracker = WarmupTracker()
+        tracker.start({"models": slow, "cache": broken})
+        await asyncio.sleep(0)
+        before = tracker.report()
+        release.set()
+        await tracker.wait()
+        return before, tracker.report()
+
+    before, after = asyncio.run(scenario())
+    assert not before["ready"] and before["components"]["models"]["status"] in ("pending", "warming")
+    assert after["components"]["models"]["status"] == "ready"
+    assert after["components"]["cache"] == {"status": "failed", "seconds": after["components"]["cache"]["seconds"], "error": "no checkpoint"}
+    assert not after["ready"]
+    assert WarmupTracker().ready  # nothing to warm: ready immediately
+
+
+def test_failed_step_turns_ready_once_a_retry_succeeds():
+    async def scenario():
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError("database unreachable")
+
+        tracker = WarmupTracker(retry_seconds=0.01)
+        tracker.start({"database": flaky})
+        await tracker.wait()
+        failed = tracker.report()
+        for _ in range(100):
+            if tracker.ready:
+                break
+            await asyncio.sleep(0.01)
+        await tracker.stop()
+        return failed, tracker.report(), len(attempts)
+
+    failed, recovered, attempts = asyncio.run(scenario())
+    assert failed["components"]["database"]["status"] == "failed" and not failed["ready"]
+    assert recovered["ready"] and recovered["components"]["database"]["error"] is None
+    assert attempts == 3
+
+
+def test_admin_metrics_does_not_construct_heavy_services():
+    import subprocess
+    import sys
+
+    script = (
+        "import sys\n"
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "metrics = TestClient(app).get('/admin/metrics').json()\n"
+        "assert metrics['models'] is None and metrics['telemetry'] is None, metrics\n"
+        "assert 'torch' not in sys.modules and 'supabase' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import database
+from app.services.database import DatabaseGateway
+from app.services import subscriptions
+from app.services.subscriptions import consume_generation, get_user_tier, invalidate_user_cache
+
+
+class _FakeQuery:
+    def __init__(self, data, on_execute=None):
+        self._data = data
+        self._on_execute = on_execute
+
+    def __getattr__(self, _name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        if self._on_execute is not None:
+            self._on_execute()
+        return SimpleNamespace(data=self._data)
+
+
+class _FakeClient:
+    def __init__(self, rpc_rows=None, table_rows=None):
+        self.rpc_rows = rpc_rows
+        self.table_rows = table_rows or {}
+        self.rpc_calls = []
+        self.table_queries = 0
+
+    def rpc(self, name, params):
+        self.rpc_calls.append((name, params))
+        return _FakeQuery(self.rpc_rows)
+
+    def table(self, name):
+        def count():
+            self.table_queries += 1
+        return _FakeQuery(self.table_rows.get(name, []), on_execute=count)
+
+
+@pytest.fixture
+def fake_gateway(monkeypatch):
+    subscriptions._TIER_CACHE.clear()
+    subscriptions._ADDON_CACHE.clear()
+
+    def install(client):
+        gateway = DatabaseGateway(client=client)
+        monkeypatch.setattr(database._GatewayHolder, "instance", gateway)
+        return gateway
+
+    return install
+
+
+def test_consume_generation_uses_single_rpc(fake_gateway):
+    client = _FakeClient(rpc_rows=[{"tier": "starter", "usage_count": 3, "usage_limit": 25, "owns": True, "allowed": True}])
+    fake_gateway(client)
+
+    usage = consume_generation("user-1")
+
+    assert len(client.rpc_calls) == 1
+    name, params = client.rpc_calls[0]
+    assert name == "consume_generation"
+    assert params["p_user_id"] == "user-1"
+    assert params["p_amount"] == 1
+    assert usage.count == 3
+    assert usage.remaining == 22
+    assert usage.tier_id == "starter"
+    assert usage.owns_creations is True
+
+
+def test_consume_generation_rejects_when_limit_reached(fake_gateway):
+    client = _FakeClient(rpc_rows=[{"tier": "free", "usage_count": 4, "usage_limit": 4, "owns": False, "allowed": False}])
+    fake_gateway(client)
+
+    with pytest.raises(HTTPException) as excinfo:
+        consume_generation("user-1")
+
+    assert excinfo.value.status_code == 429
+
+
+def test_user_tier_is_cached_until_invalidated(fake_gateway):
+    client = _FakeClient(table_rows={"user_subscriptions": [{"tier_id": "studio"}]})
+    fake_gateway(client)
+
+    assert get_user_tier("user-1").id == "studio"
+    assert get_user_tier("user-1").id == "studio"
+    assert client.table_queries == 1
+
+    invalidate_user_cache("user-1")
+    assert get_user_tier("user-1").id == "studio"
+    assert client.table_queries == 2
+    assert subscriptions.subscription_cache_stats()["tiers"]["hits"] == 1
+
+
+def test_consume_generation_primes_tier_cache(fake_gateway):
+    client = _FakeClient(rpc_rows=[{"tier": "starter", "usage_count": 1, "usage_limit": 25, "owns": True, "allowed": True}])
+    fake_gateway(client)
+
+    consume_generation("user-1")
+
+    assert get_user_tier("user-1").id == "starter"
+    assert client.table_queries == 0
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+from app.services.telemetry import TelemetrySink
+
+
+class _RecordingWriter:
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, table, rows):
+        if self.fail:
+            raise ConnectionError("supabase unreachable")
+        self.calls.append((table, list(rows)))
+
+
+def test_rows_are_flushed_as_one_insert_per_table(tmp_path):
+    writer = _RecordingWriter()
+    sink = TelemetrySink(writer, batch_size=50, flush_interval=60, spill_path=tmp_path / "spill.jsonl")
+    for idx in range(3):
+        sink.enqueue("generation_events", {"n": idx})
+    sink.enqueue("pattern_feedback", {"n": 99})
+
+    assert sink.flush() == 4
+    assert sorted(writer.calls) == [
+        ("generation_events", [{"n": 0}, {"n": 1}, {"n": 2}]),
+        ("pattern_feedback", [{"n": 99}]),
+    ]
+    sink.drain()
+
+
+def test_failed_rows_spill_to_disk_and_replay(tmp_path):
+    writer = _RecordingWriter()
+    spill = tmp_path / "spill.jsonl"
+    sink = TelemetrySink(writer, batch_size=50, flush_interval=60, spill_path=spill)
+
+    writer.fail = True
+    sink.enqueue("generation_events", {"n": 1})
+    assert sink.flush() == 0
+    assert spill.exists()
+
+    writer.fail = False
+    sink.enqueue("generation_events", {"n": 2})
+    sink.flush()
+
+    written = [row for _, rows in writer.calls for row in rows]
+    assert {"n": 1} in written and {"n": 2} in written
+    assert not spill.exists()
+    sink.drain()
+
+
+def test_full_buffer_spills_on_the_flush_thread_instead_of_growing(tmp_path):
+    writer = _RecordingWriter()
+    spill = tmp_path / "spill.jsonl"
+    sink = TelemetrySink(writer, batch_size=50, flush_interval=60, max_queue=2, spill_path=spill)
+    spilled_on = []
+    spill_rows = sink._spill
+    sink._spill = lambda rows, dead_letter=False: spilled_on.append(threading.current_thread().name) or spill_rows(rows, dead_letter)
+    for idx in range(5):
+        assert sink.enqueue("generation_events", {"n": idx})
+
+    deadline = time.monotonic() + 5
+    while sink.spilled < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert set(spilled_on) == {"telemetry-sink"}
+    sink.drain()
+    assert sorted(row["n"] for _, rows in writer.calls for row in rows) == [0, 1, 2, 3, 4]
+
+    unspilled = TelemetrySink(writer, flush_interval=60, max_queue=1)
+    assert unspilled.enqueue("generation_events", {"n": 5})
+    assert not unspilled.enqueue("generation_events", {"n": 6})
+    assert unspilled.stats()["dropped"] == 1
+    unspilled.drain()
+
+
+def test_rows_that_keep_failing_move_to_the_dead_letter_file(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+
+    def reject(table, rows):
+        raise ValueError("violates not-null constraint")
+
+    sink = TelemetrySink(reject, batch_size=50, flush_interval=60, max_attempts=2, spill_path=spill)
+    sink.enqueue("generation_events", {"n": 1})
+    sink.flush()  # first failure: spilled
+    sink.flush()  # replay fails again: dead-lettered
+    sink.drain()
+
+    assert not spill.exists()
+    assert json.loads((tmp_path / "spill.dead.jsonl").read_text()) == {"table": "generation_events", "row": {"n": 1}, "attempts": 2}
+    assert sink.stats()["dead_lettered"] == 1
+
+
+def test_idle_flush_streams_the_spill_in_chunks(tmp_path):
+    writer = _RecordingWriter()
+    spill = tmp_path / "spill.jsonl"
+    spill.write_text("".join(json.dumps({"table": "generation_events", "row": {"n": n}}) + "\n" for n in range(5)))
+    sink = TelemetrySink(writer, batch_size=2, flush_interval=0.01, spill_path=spill)
+
+    sink.start()
+    deadline = time.monotonic() + 5
+    while spill.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sink.drain()
+
+    assert [len(rows) for _, rows in writer.calls] == [2, 2, 1]
+    assert sink.stats()["replayed"] == 5
+
+
+def test_failed_replay_keeps_the_unread_rest_of_the_spill(tmp_path):
+    writer = _RecordingWriter()
+    spill = tmp_path / "spill.jsonl"
+    spill.write_text("".join(json.dumps({"table": "generation_events", "row": {"n": n}}) + "\n" for n in range(5)))
+    sink = TelemetrySink(writer, batch_size=2, flush_interval=60, spill_path=spill)
+
+    writer.fail = True
+    sink.flush()
+    entries = [json.loads(line) for line in spill.read_text().splitlines()]
+    assert sorted(entry["row"]["n"] for entry in entries) == [0, 1, 2, 3, 4]
+    assert [entry.get("attempts", 0) for entry in entries].count(1) == 2  # only the chunk that was tried
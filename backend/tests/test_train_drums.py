@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import torch
+from torch import nn
+
+from training.drum_dataset import DrumDataset
+from training.train_drums import DrumTrainingConfig, _build_loader, _run_epoch
+from tests.test_drum_dataset import _write_dummy_midi
+from models.drum_model import DrumModel
+
+
+def test_epoch_reports_throughput_with_worker_loader(tmp_path):
+    for pitch in (36, 38, 42):
+        _write_dummy_midi(tmp_path / f"{pitch}.mid", pitch=pitch)
+    dataset = DrumDataset(root_path=tmp_path, cache_dir=tmp_path / "cache")
+    config = DrumTrainingConfig(batch_size=2, num_workers=1, prefetch_factor=2)
+    loader = _build_loader(dataset, config, torch.device("cpu"))
+    model = DrumModel()
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+
+    loss, timings = _run_epoch(model, loader, nn.BCELoss(), optimizer, torch.device("cpu"))
+
+    assert loss > 0
+    assert timings.samples == 3
+    assert timings.compute > 0 and timings.data_wait >= 0
+    assert timings.wall >= timings.compute
+    assert timings.samples_per_second > 0
+
+
+def test_compile_failure_on_first_call_falls_back_to_eager(monkeypatch):
+    from models.export import example_input
+    from training.utils import maybe_compile
+
+    def lazy_compile(model):
+        def broken(*args):
+            raise RuntimeError("no C++ compiler found")
+
+        return broken
+
+    monkeypatch.setattr(torch, "compile", lazy_compile)
+    model = DrumModel()
+    assert maybe_compile(model, True, example_input(model)) is model
+    assert all(parameter.grad is None for parameter in model.parameters())
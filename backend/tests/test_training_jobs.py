@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import sys
+import time
+
+from app.services.training_jobs import TrainingJob, TrainingJobRunner, training_command
+
+_FAKE_TRAINING = """
+import json, sys, time
+epochs = int(sys.argv[1])
+for epoch in range(1, epochs + 1):
+    print(f"epoch {epoch} done")
+    print(json.dumps({"event": "epoch", "epoch": epoch, "epochs": epochs, "loss": 1.0 / epoch, "val_loss": 2.0 / epoch}))
+    time.sleep(float(sys.argv[2]))
+print(json.dumps({"event": "checkpoint", "path": "ckpt.pt"}))
+sys.exit(int(sys.argv[3]))
+"""
+
+
+def _fake_command(job):
+    params = job.params
+    return [sys.executable, "-c", _FAKE_TRAINING, str(params.get("epochs", 2)), str(params.get("seed", 0)), str(params.get("batch_size", 0))]
+
+
+def _runner(tmp_path, **kwargs):
+    return TrainingJobRunner(tmp_path / "jobs", command_factory=_fake_command, cancel_grace=1.0, **kwargs)
+
+
+def _wait(runner, job, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while runner.get(job.id).active and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return runner.get(job.id)
+
+
+def test_job_streams_progress_and_logs(tmp_path):
+    runner = _runner(tmp_path)
+    job, created = runner.submit("groove", {"epochs": 3})
+    job = _wait(runner, job)
+
+    assert created and job.status == "succeeded" and job.returncode == 0
+    assert (job.epoch, job.epochs, job.loss, job.val_loss) == (3, 3, 1.0 / 3, 2.0 / 3)
+    assert [entry["epoch"] for entry in job.losses] == [1, 2, 3]
+    assert job.checkpoint == "ckpt.pt"
+    assert runner.logs(job.id, tail=3)[0] == "epoch 3 done"
+    assert "epoch 1 done" in job.log_path.read_text()
+    assert job.to_dict()["progress"] == 1.0
+
+
+def test_identical_requests_share_one_job(tmp_path):
+    runner = _runner(tmp_path)
+    first, created = runner.submit("drums", {"epochs": 2, "seed": 1})
+    second, deduplicated = runner.submit("drums", {"seed": 1, "epochs": 2})
+    other, _ = runner.submit("drums", {"epochs": 3, "seed": 1})
+
+    assert created and not deduplicated and second is first
+    assert other is not first and other.status == "queued"  # same kind waits for the running job
+    runner.shutdown()
+    assert runner.stats()["deduplicated"] == 1
+
+
+def test_cancel_terminates_running_job_and_reports_failures(tmp_path):
+    runner = _runner(tmp_path)
+    job, _ = runner.submit("groove", {"epochs": 50, "seed": 1})
+    deadline = time.monotonic() + 10
+    while job.epoch == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    runner.cancel(job.id)
+    assert _wait(runner, job).status == "cancelled"
+
+    failing, _ = runner.submit("groove", {"epochs": 1, "batch_size": 3})
+    failing = _wait(runner, failing)
+    assert failing.status == "failed" and failing.returncode == 3
+    assert runner.stats()["by_status"] == {"cancelled": 1, "failed": 1}
+
+
+def test_default_command_runs_training_cli(tmp_path):
+    job = TrainingJob(id="abc", kind="drums", params={"epochs": 4, "learning_rate": 0.01}, log_path=tmp_path / "abc.log")
+    command = training_command(job)
+    assert command[1:] == ["-m", "training.train_drums", "--json-progress", "--epochs", "4", "--learning-rate", "0.01"]
@@ -0,0 +1,104 @@
+"""Compare the per-note grid encoder with the vectorized one.
+
+Usage:
+    python -m training.benchmark_encoding --files 2000 --notes 400
+    python -m training.benchmark_encoding --root /path/to/midi
+
+Without ``--root`` a synthetic corpus of note arrays is generated, so the
+timing covers encoding only and not MIDI parsing. Exits with status 1 if the
+two encoders disagree on any grid.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pretty_midi
+
+from .drum_dataset import LANE_NAMES, PITCH_LUT, _PITCH_TO_LANE, DrumDataset
+from .grid_encoding import encode_hits, step_duration_for
+
+Corpus = List[Tuple[np.ndarray, np.ndarray, float]]
+
+
+def encode_per_note(starts: np.ndarray, pitches: np.ndarray, end_time: float, steps: int = 32) -> np.ndarray:
+    """The original loop: one dict lookup, quantize and cell write per note."""
+    lane_index = {name: idx for idx, name in enumerate(LANE_NAMES)}
+    grid = np.zeros((steps, len(LANE_NAMES)), dtype=np.float32)
+    step_duration = step_duration_for(end_time, steps)
+    for start, pitch in zip(starts.tolist(), pitches.tolist()):
+        lane_name = _PITCH_TO_LANE.get(pitch)
+        if lane_name is None:
+            continue
+        step = max(0, min(steps - 1, int(start / step_duration)))
+        grid[step, lane_index[lane_name]] = 1.0
+    return grid
+
+
+def synthetic_corpus(files: int, notes: int, seed: int = 0) -> Corpus:
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for _ in range(files):
+        end_time = float(rng.uniform(2.0, 16.0))
+        starts = np.sort(rng.uniform(0.0, end_time, size=notes))
+        pitches = rng.integers(35, 82, size=notes)
+        corpus.append((starts, pitches, end_time))
+    return corpus
+
+
+def midi_corpus(root: Path) -> Corpus:
+    corpus = []
+    for path in DrumDataset(root_path=root).files:
+        try:
+            midi = pretty_midi.PrettyMIDI(str(path))
+        except Exception as exc:  # a broken file should not end the benchmark
+            print(f"[benchmark_encoding] Skipping {path.name}: {exc}")
+            continue
+        notes = [note for instrument in midi.instruments if instrument.is_drum for note in instrument.notes]
+        starts = np.array([note.start for note in notes], dtype=np.float64)
+        pitches = np.array([note.pitch for note in notes], dtype=np.int64)
+        corpus.append((starts, pitches, midi.get_end_time()))
+    return corpus
+
+
+def benchmark(corpus: Corpus, steps: int) -> int:
+    started = time.perf_counter()
+    legacy = [encode_per_note(starts, pitches, end_time, steps) for starts, pitches, end_time in corpus]
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectorized = [
+        encode_hits(starts, pitches, end_time, PITCH_LUT, len(LANE_NAMES), steps=steps)
+        for starts, pitches, end_time in corpus
+    ]
+    vectorized_s = time.perf_counter() - started
+
+    mismatches = sum(1 for a, b in zip(legacy, vectorized) if not np.array_equal(a, b))
+    total_notes = sum(len(pitches) for _, pitches, _ in corpus)
+    print(f"{len(corpus)} files, {total_notes} notes, {steps} steps")
+    print(f"per-note:   {legacy_s * 1000:9.1f} ms  ({total_notes / max(legacy_s, 1e-9):,.0f} notes/s)")
+    print(f"vectorized: {vectorized_s * 1000:9.1f} ms  ({total_notes / max(vectorized_s, 1e-9):,.0f} notes/s)")
+    print(f"speedup:    {legacy_s / max(vectorized_s, 1e-9):9.1f}x")
+    if mismatches:
+        print(f"FAIL: {mismatches} grids differ")
+        return 1
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark drum grid encoding")
+    parser.add_argument("--root", type=Path, default=None, help="Encode the MIDI files under this directory")
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--notes", type=int, default=400)
+    parser.add_argument("--steps", type=int, default=32)
+    args = parser.parse_args(argv)
+    corpus = midi_corpus(args.root) if args.root else synthetic_corpus(args.files, args.notes)
+    return benchmark(corpus, args.steps)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
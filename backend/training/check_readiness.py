@@ -6,19 +6,14 @@ from typing import List
 import pretty_midi
 
 from .dataset_config import DATASET_ROOT
+from .dataset_index import get_dataset_index
 from .drum_dataset import DrumDataset
 
-_MIDI_EXTENSIONS = {".mid", ".midi"}
-
 
 def _discover_midi_files(root: Path) -> List[Path]:
-    files: List[Path] = []
     if not root.exists():
-        return files
-    for path in root.rglob("*"):
-        if path.is_file() and path.suffix.lower() in _MIDI_EXTENSIONS:
-            files.append(path)
-    return files
+        return []
+    return get_dataset_index(root).files()
 
 
 def check_readiness(verbose: bool = True) -> bool:
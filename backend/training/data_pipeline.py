@@ -1,23 +1,139 @@
 from __future__ import annotations
 
+import random
 from pathlib import Path
-from typing import Iterator, Tuple
+from typing import Iterator, List, Sequence, Tuple
 
 import numpy as np
 import torch
+from torch.utils.data import DataLoader, Dataset, Sampler, Subset
 
+from .utils import make_generator, seed_worker
 
-class DataPipeline:
-    """Loads MIDI or JSON pattern files and converts them into tensors."""
+Batch = Tuple[torch.Tensor, torch.Tensor, torch.Tensor]
+
+
+class DataPipeline(Dataset[Tuple[torch.Tensor, torch.Tensor]]):
+    """Loads MIDI or JSON pattern files and converts them into tensors.
+
+    Each ``.npy`` file holds a ``(steps, features)`` sequence; item ``i`` is the
+    next-step pair ``(array[:-1], array[1:])``. ``loader`` batches items of
+    different lengths by padding them and returns a mask of the real steps.
+    """
 
     def __init__(self, data_dir: str | Path):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.files: List[Path] = sorted(self.data_dir.glob("**/*.npy"))
+        self._lengths: List[int] | None = None
+
+    def __getitem__(self, index: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        array = np.load(self.files[index])
+        return torch.tensor(array[:-1], dtype=torch.float32), torch.tensor(array[1:], dtype=torch.float32)
+
+    def __len__(self) -> int:
+        return len(self.files)
 
     def dataset(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
-        for file_path in self.data_dir.glob("**/*.npy"):
-            array = np.load(file_path)
-            yield torch.tensor(array[:-1], dtype=torch.float32), torch.tensor(array[1:], dtype=torch.float32)
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def lengths(self) -> List[int]:
+        """Sequence length of every item, read from the ``.npy`` headers only."""
+        if self._lengths is None:
+            self._lengths = [max(0, np.load(path, mmap_mode="r").shape[0] - 1) for path in self.files]
+        return self._lengths
+
+    def loader(
+        self,
+        batch_size: int,
+        seed: int,
+        shuffle: bool = True,
+        bucket_by_length: bool = True,
+        num_workers: int = 0,
+        prefetch_factor: int = 2,
+        pin_memory: bool = False,
+        persistent_workers: bool = False,
+        indices: Sequence[int] | None = None,
+    ) -> DataLoader:
+        """Batch the whole pipeline, or only ``indices`` (e.g. one side of a validation split)."""
+        dataset: Dataset = self if indices is None else Subset(self, list(indices))
+        lengths = self.lengths if indices is None else [self.lengths[i] for i in indices]
+        worker_options = {}
+        if num_workers > 0:
+            worker_options = {
+                "prefetch_factor": prefetch_factor,
+                "persistent_workers": persistent_workers,
+                "worker_init_fn": seed_worker,
+            }
+        if bucket_by_length:
+            sampler = BucketBatchSampler(lengths, batch_size, shuffle=shuffle, seed=seed)
+            return DataLoader(
+                dataset,
+                batch_sampler=sampler,
+                collate_fn=pad_collate,
+                num_workers=num_workers,
+                pin_memory=pin_memory,
+                **worker_options,
+            )
+        return DataLoader(
+            dataset,
+            batch_size=batch_size,
+            shuffle=shuffle,
+            generator=make_generator(seed),
+            collate_fn=pad_collate,
+            num_workers=num_workers,
+            pin_memory=pin_memory,
+            **worker_options,
+        )
+
+
+def pad_collate(items: Sequence[Tuple[torch.Tensor, torch.Tensor]]) -> Batch:
+    """Pad variable-length pairs to ``(B, T_max, D)`` and return a ``(B, T_max)`` step mask."""
+    lengths = [inputs.shape[0] for inputs, _ in items]
+    max_len = max(lengths)
+    feature_dim = items[0][0].shape[-1]
+    inputs = torch.zeros((len(items), max_len, feature_dim), dtype=torch.float32)
+    targets = torch.zeros_like(inputs)
+    mask = torch.zeros((len(items), max_len), dtype=torch.bool)
+    for row, ((item_inputs, item_targets), length) in enumerate(zip(items, lengths)):
+        inputs[row, :length] = item_inputs
+        targets[row, :length] = item_targets
+        mask[row, :length] = True
+    return inputs, targets, mask
+
+
+class BucketBatchSampler(Sampler[List[int]]):
+    """Batch items of similar length together to keep padding small.
+
+    Indices are shuffled, split into pools of ``batch_size * pool_factor``,
+    sorted by length inside each pool and cut into batches; the batch order is
+    shuffled again. The shuffle is driven by ``seed`` plus the epoch counter,
+    so runs are reproducible and every epoch sees a different order.
+    """
+
+    def __init__(self, lengths: Sequence[int], batch_size: int, shuffle: bool = True, seed: int = 0, pool_factor: int = 50):
+        self.lengths = list(lengths)
+        self.batch_size = max(1, batch_size)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.pool_size = self.batch_size * max(1, pool_factor)
+        self.epoch = 0
+
+    def __iter__(self) -> Iterator[List[int]]:
+        rng = random.Random(self.seed + self.epoch)
+        self.epoch += 1
+        indices = list(range(len(self.lengths)))
+        if self.shuffle:
+            rng.shuffle(indices)
+        batches: List[List[int]] = []
+        for start in range(0, len(indices), self.pool_size):
+            pool = sorted(indices[start:start + self.pool_size], key=self.lengths.__getitem__)
+            batches.extend(pool[i:i + self.batch_size] for i in range(0, len(pool), self.batch_size))
+        if self.shuffle:
+            rng.shuffle(batches)
+        return iter(batches)
 
     def __len__(self) -> int:
-        return sum(1 for _ in self.data_dir.glob("**/*.npy"))
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
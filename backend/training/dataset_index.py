@@ -0,0 +1,229 @@
+"""Persistent index of the MIDI files under a dataset root.
+
+The index lives in a small SQLite file next to the grid caches. It stores
+every directory's mtime and every MIDI file's size, mtime and content hash.
+Adding, removing or renaming a file changes its directory's mtime. A sync
+therefore only runs ``os.scandir`` on directories whose mtime moved, and
+rebuilds the rest of the tree from the index. Within one process, ``files()``
+is memoized and revalidated with one ``stat`` per directory, so the
+readiness check, the dataset loader and the tools share one walk.
+
+Editing a file in place does not touch its directory, so ``entries()``
+re-stats every file. It only re-hashes the ones whose size or mtime changed.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .grid_cache import default_cache_root, root_digest
+
+MIDI_EXTENSIONS = {".mid", ".midi"}
+_HASH_CHUNK = 1 << 20
+# Directory mtimes have coarse resolution on some filesystems. A directory
+# modified this recently may change again within the same tick, so its mtime
+# is stored as -1, which never matches, so it is rescanned on every sync until
+# it settles.
+_RACY_WINDOW_NS = 2_000_000_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    rel TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    rel TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+"""
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    path: Path
+    size: int
+    mtime_ns: int
+    sha1: str
+
+
+def index_path_for(data_root: Path | str, cache_root: Path | str | None = None) -> Path:
+    return Path(cache_root or default_cache_root()) / f"index-{root_digest(data_root)}.sqlite"
+
+
+def file_sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _join(parent: str, name: str) -> str:
+    return f"{parent}/{name}" if parent else name
+
+
+class DatasetIndex:
+    def __init__(self, root: Path | str, index_path: Path | str | None = None) -> None:
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else index_path_for(self.root)
+        self.scanned_dirs = 0
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._files: Optional[List[Path]] = None
+        self._dir_mtimes: Dict[str, int] = {}
+
+    def files(self) -> List[Path]:
+        """Sorted MIDI paths under the root, walking only what changed since the last call."""
+        with self._lock:
+            if self._files is None or not self._dirs_unchanged():
+                self._sync()
+            return list(self._files or [])
+
+    def entries(self) -> List[IndexEntry]:
+        """Files with size, mtime and content hash; files edited in place are re-hashed."""
+        paths = self.files()
+        with self._lock:
+            known = {
+                rel: (size, mtime_ns, sha1)
+                for rel, size, mtime_ns, sha1 in self._conn.execute("SELECT rel, size, mtime_ns, sha1 FROM files")
+            }
+            entries: List[IndexEntry] = []
+            updates: List[Tuple[int, int, str, str]] = []
+            for path in paths:
+                rel = path.relative_to(self.root).as_posix()
+                try:
+                    stat = path.stat()
+                    size, mtime_ns, sha1 = known.get(rel, (-1, -1, None))
+                    if sha1 is None or (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                        size, mtime_ns, sha1 = stat.st_size, stat.st_mtime_ns, file_sha1(path)
+                        updates.append((size, mtime_ns, sha1, rel))
+                except OSError:
+                    continue
+                entries.append(IndexEntry(path=path, size=size, mtime_ns=mtime_ns, sha1=sha1))
+            if updates:
+                with self._conn:
+                    self._conn.executemany("UPDATE files SET size = ?, mtime_ns = ?, sha1 = ? WHERE rel = ?", updates)
+            return entries
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._files = None
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+            conn.executescript(_SCHEMA)
+        except sqlite3.Error as exc:
+            print(f"[dataset_index] Could not open {self.index_path} ({exc}); keeping the index in memory.")
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.executescript(_SCHEMA)
+        return conn
+
+    def _dirs_unchanged(self) -> bool:
+        if not self._dir_mtimes:
+            return False
+        for rel, mtime_ns in self._dir_mtimes.items():
+            try:
+                if os.stat(self.root / rel).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _sync(self) -> None:
+        self._dir_mtimes = {}
+        if not self.root.is_dir():
+            self._files = []
+            return
+        known_dirs = {rel: mtime_ns for rel, mtime_ns in self._conn.execute("SELECT rel, mtime_ns FROM dirs")}
+        files: List[str] = []
+        pending: List[Tuple[str, Optional[str]]] = [("", None)]
+        racy_before = time.time_ns() - _RACY_WINDOW_NS
+        with self._conn:
+            while pending:
+                rel, parent = pending.pop()
+                try:
+                    mtime_ns = os.stat(self.root / rel).st_mtime_ns
+                except OSError:
+                    continue
+                if mtime_ns > racy_before:
+                    mtime_ns = -1
+                self._dir_mtimes[rel] = mtime_ns
+                if mtime_ns != -1 and known_dirs.get(rel) == mtime_ns:
+                    subdirs = [row[0] for row in self._conn.execute("SELECT rel FROM dirs WHERE parent = ?", (rel,))]
+                else:
+                    subdirs = self._scan_dir(rel, parent, mtime_ns)
+                files.extend(row[0] for row in self._conn.execute("SELECT rel FROM files WHERE dir = ?", (rel,)))
+                pending.extend((subdir, rel) for subdir in subdirs)
+        self._files = sorted(self.root / rel for rel in files)
+
+    def _scan_dir(self, rel: str, parent: Optional[str], mtime_ns: int) -> List[str]:
+        self.scanned_dirs += 1
+        subdirs: List[str] = []
+        found: Dict[str, Tuple[int, int]] = {}
+        try:
+            with os.scandir(self.root / rel) as it:
+                for entry in it:
+                    child = _join(rel, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(child)
+                    elif os.path.splitext(entry.name)[1].lower() in MIDI_EXTENSIONS and entry.is_file():
+                        stat = entry.stat()
+                        found[child] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            pass
+
+        known_subdirs = {row[0] for row in self._conn.execute("SELECT rel FROM dirs WHERE parent = ?", (rel,))}
+        for gone in known_subdirs.difference(subdirs):
+            self._forget_tree(gone)
+        known_files = {
+            row[0]: (row[1], row[2])
+            for row in self._conn.execute("SELECT rel, size, mtime_ns FROM files WHERE dir = ?", (rel,))
+        }
+        self._conn.executemany("DELETE FROM files WHERE rel = ?", [(gone,) for gone in known_files.keys() - found.keys()])
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO files (rel, dir, size, mtime_ns, sha1) VALUES (?, ?, ?, ?, NULL)",
+            [(child, rel, size, mtime) for child, (size, mtime) in found.items() if known_files.get(child) != (size, mtime)],
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dirs (rel, parent, mtime_ns) VALUES (?, ?, ?)",
+            (rel, parent, mtime_ns),
+        )
+        return subdirs
+
+    def _forget_tree(self, rel: str) -> None:
+        prefix = rel + "/"
+        self._conn.execute("DELETE FROM dirs WHERE rel = ? OR substr(rel, 1, ?) = ?", (rel, len(prefix), prefix))
+        self._conn.execute("DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?", (rel, len(prefix), prefix))
+
+
+class _IndexHolder:
+    instances: Dict[str, DatasetIndex] = {}
+    lock = threading.Lock()
+
+
+def get_dataset_index(root: Path | str) -> DatasetIndex:
+    """One index per dataset root for the whole process."""
+    key = str(Path(root))
+    with _IndexHolder.lock:
+        index = _IndexHolder.instances.get(key)
+        if index is None:
+            index = DatasetIndex(root)
+            _IndexHolder.instances[key] = index
+        return index
+
+
+__all__ = ["DatasetIndex", "IndexEntry", "MIDI_EXTENSIONS", "file_sha1", "get_dataset_index", "index_path_for"]
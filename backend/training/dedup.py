@@ -0,0 +1,110 @@
+"""Content-addressed deduplication of the drum corpus.
+
+Two files are duplicates when their bytes hash the same or, failing that, when
+their encoded grids are identical. The first file in path order becomes the
+canonical copy; every other copy maps to it. Grids come from whatever the
+caller has already encoded (the grid cache or the ingest summaries), so
+deduplication never parses MIDI itself. Empty grids are only merged on
+identical bytes: an empty grid usually means an unusable file, not a loop.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .dataset_index import IndexEntry
+
+DUPLICATES_PATH = Path(__file__).resolve().parent / "data" / "drum_duplicates.json"
+
+
+@dataclass
+class DedupResult:
+    paths: List[Path]
+    canonical: List[int] = field(default_factory=list)
+    # duplicate row -> (canonical row, "bytes" | "grid")
+    duplicates: Dict[int, Tuple[int, str]] = field(default_factory=dict)
+
+    @property
+    def canonical_paths(self) -> List[Path]:
+        return [self.paths[row] for row in self.canonical]
+
+    def summary(self) -> Dict[str, int]:
+        reasons = [reason for _, reason in self.duplicates.values()]
+        return {
+            "files": len(self.paths),
+            "canonical": len(self.canonical),
+            "byte_duplicates": reasons.count("bytes"),
+            "grid_duplicates": reasons.count("grid"),
+        }
+
+    def duplicate_map(self) -> Dict[str, List[Dict[str, str]]]:
+        """Canonical path -> the copies folded into it."""
+        groups: Dict[str, List[Dict[str, str]]] = {}
+        for row, (canonical_row, reason) in sorted(self.duplicates.items()):
+            groups.setdefault(str(self.paths[canonical_row]), []).append({"path": str(self.paths[row]), "match": reason})
+        return groups
+
+    def write_report(self, path: Path = DUPLICATES_PATH) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as fh:
+            json.dump({**self.summary(), "duplicates": self.duplicate_map()}, fh, indent=2)
+        return path
+
+
+def grid_key(grid: np.ndarray) -> bytes:
+    bits = np.ascontiguousarray(np.asarray(grid) > 0)
+    return bytes(bits.shape) + np.packbits(bits).tobytes()
+
+
+def grid_from_key(key: bytes) -> np.ndarray:
+    """Rebuild the binary grid a ``grid_key`` was taken from."""
+    shape = (key[0], key[1])
+    bits = np.unpackbits(np.frombuffer(key, dtype=np.uint8, offset=2), count=shape[0] * shape[1])
+    return bits.reshape(shape)
+
+
+def find_duplicates(
+    paths: Sequence[Path],
+    byte_hashes: Sequence[Optional[str]],
+    grids: Sequence[np.ndarray] | np.ndarray,
+) -> DedupResult:
+    return find_duplicates_by_key(paths, byte_hashes, (grid_key(grid) for grid in grids))
+
+
+def find_duplicates_by_key(
+    paths: Sequence[Path],
+    byte_hashes: Sequence[Optional[str]],
+    keys: Iterable[bytes],
+) -> DedupResult:
+    """Like ``find_duplicates`` for callers that only kept each file's ``grid_key``."""
+    result = DedupResult(paths=list(paths))
+    by_bytes: Dict[str, int] = {}
+    by_grid: Dict[bytes, int] = {}
+    for row, (byte_hash, grid_bytes) in enumerate(zip(byte_hashes, keys)):
+        if byte_hash is not None and byte_hash in by_bytes:
+            result.duplicates[row] = (by_bytes[byte_hash], "bytes")
+            continue
+        key = grid_bytes if any(grid_bytes[2:]) else None
+        if key is not None and key in by_grid:
+            result.duplicates[row] = (by_grid[key], "grid")
+            if byte_hash is not None:
+                by_bytes[byte_hash] = by_grid[key]
+            continue
+        result.canonical.append(row)
+        if byte_hash is not None:
+            by_bytes[byte_hash] = row
+        if key is not None:
+            by_grid[key] = row
+    return result
+
+
+def byte_hashes_for(paths: Sequence[Path], entries: Sequence[IndexEntry]) -> List[Optional[str]]:
+    known = {entry.path: entry.sha1 for entry in entries}
+    return [known.get(path) for path in paths]
+
+
+__all__ = ["DUPLICATES_PATH", "DedupResult", "byte_hashes_for", "find_duplicates", "find_duplicates_by_key", "grid_from_key", "grid_key"]
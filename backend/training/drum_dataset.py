@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import os
 import random
 from pathlib import Path
 from typing import List, Sequence
@@ -10,6 +9,12 @@ import pretty_midi
 import torch
 from torch.utils.data import Dataset
 
+from .dataset_index import get_dataset_index
+from .dedup import DedupResult, byte_hashes_for, find_duplicates
+from .grid_cache import GridCache, cache_dir_for
+from .grid_encoding import build_pitch_lut, encode_hits
+from .midi_reader import DrumNotes, MidiParseError, read_drum_notes
+
 LANE_NAMES: Sequence[str] = (
     "kick",
     "snare",
@@ -19,7 +24,6 @@ LANE_NAMES: Sequence[str] = (
     "perc",
 )
 
-_LANE_TO_INDEX = {name: idx for idx, name in enumerate(LANE_NAMES)}
 _PITCH_TO_LANE = {
     36: "kick",
     38: "snare",
@@ -29,13 +33,27 @@ _PITCH_TO_LANE = {
     48: "perc",
 }
 
+PITCH_LUT = build_pitch_lut(_PITCH_TO_LANE, LANE_NAMES)
+
 _DEFAULT_DATA_ROOT = Path(__file__).resolve().parent / "data" / "drums"
 
 
 class DrumDataset(Dataset[torch.Tensor]):
-    """Loads drum-ready MIDI clips and snaps them to a 32x6 grid."""
-
-    def __init__(self, root_path: Path | str | None = None) -> None:
+    """Loads drum-ready MIDI clips and snaps them to a 32x6 grid.
+
+    With ``use_cache`` (or an explicit ``cache_dir``) every file is encoded once
+    into a memory-mapped uint8 array and later epochs read rows from it.
+    ``dedupe`` builds the cache too and keeps one canonical file per set of
+    byte- or grid-identical copies; ``duplicates`` holds the mapping.
+    """
+
+    def __init__(
+        self,
+        root_path: Path | str | None = None,
+        use_cache: bool = False,
+        cache_dir: Path | str | None = None,
+        dedupe: bool = False,
+    ) -> None:
         resolved_root = Path(root_path) if root_path else _DEFAULT_DATA_ROOT
         self.data_root = resolved_root
         if not self.data_root.exists():
@@ -46,6 +64,16 @@ class DrumDataset(Dataset[torch.Tensor]):
         self.files = self._discover_files()
         if not self.files:
             print("[DrumDataset] No MIDI files found. Training will use synthetic noise samples.")
+        self.cache: GridCache | None = None
+        self._grids: np.ndarray | None = None
+        self._rows: List[int] | None = None
+        self.duplicates: DedupResult | None = None
+        if (use_cache or cache_dir is not None or dedupe) and self.files:
+            self.cache = GridCache(cache_dir or cache_dir_for(self.data_root), lanes=len(LANE_NAMES))
+            self._grids = self.cache.build(self.files, self._encode_file)
+            print(f"[DrumDataset] Grid cache: {self.cache.encoded} encoded, {self.cache.reused} reused.")
+            if dedupe:
+                self._dedupe()
 
     def __len__(self) -> int:
         return max(len(self.files), 1)
@@ -53,19 +81,37 @@ class DrumDataset(Dataset[torch.Tensor]):
     def __getitem__(self, index: int) -> torch.Tensor:
         if not self.files:
             return self._synthetic_pattern()
+        if self.cache is not None:
+            if self._grids is None:
+                self._grids = self.cache.load()
+            row_index = index % len(self.files)
+            row = self._grids[self._rows[row_index] if self._rows is not None else row_index]
+            return torch.from_numpy(row.astype(np.float32))
         midi_path = self.files[index % len(self.files)]
         grid = self._encode_file(midi_path)
         return torch.from_numpy(grid)
 
+    def __getstate__(self) -> dict:
+        # DataLoader workers re-open the memory map instead of pickling its contents.
+        state = self.__dict__.copy()
+        state["_grids"] = None
+        return state
+
+    def _dedupe(self) -> None:
+        hashes = byte_hashes_for(self.files, get_dataset_index(self.data_root).entries())
+        self.duplicates = find_duplicates(self.files, hashes, self._grids)
+        self._rows = list(self.duplicates.canonical)
+        self.files = self.duplicates.canonical_paths
+        summary = self.duplicates.summary()
+        print(
+            f"[DrumDataset] Dedup: {summary['canonical']} of {summary['files']} files kept "
+            f"({summary['byte_duplicates']} byte, {summary['grid_duplicates']} grid duplicates)."
+        )
+
     def _discover_files(self) -> List[Path]:
-        midi_files: List[Path] = []
         if not self.data_root.exists():
-            return midi_files
-        for dirpath, _, filenames in os.walk(self.data_root):
-            for filename in filenames:
-                if Path(filename).suffix.lower() in {".mid", ".midi"}:
-                    midi_files.append(Path(dirpath) / filename)
-        return sorted(midi_files)
+            return []
+        return get_dataset_index(self.data_root).files()
 
     def _synthetic_pattern(self) -> torch.Tensor:
         grid = np.zeros((32, len(LANE_NAMES)), dtype=np.float32)
@@ -78,34 +124,37 @@ class DrumDataset(Dataset[torch.Tensor]):
     def _encode_file(self, midi_path: Path) -> np.ndarray:
         grid = np.zeros((32, len(LANE_NAMES)), dtype=np.float32)
         try:
-            midi = pretty_midi.PrettyMIDI(str(midi_path))
+            notes = self.read_notes(midi_path)
         except (OSError, EOFError, ValueError, KeyError) as exc:
             print(f"[DrumDataset] Failed to parse {midi_path}: {exc}")
             return grid
-
-        total_time = midi.get_end_time()
-        step_duration = total_time / 32 if total_time > 0 else 0.5
-        if step_duration == 0:
-            step_duration = 0.5
-
-        for instrument in midi.instruments:
-            if not instrument.is_drum:
-                continue
-            for note in instrument.notes:
-                lane_name = _PITCH_TO_LANE.get(note.pitch)
-                if lane_name is None:
-                    continue
-                lane_idx = _LANE_TO_INDEX[lane_name]
-                step_index = self._quantize_step(note.start, step_duration)
-                grid[step_index, lane_idx] = 1.0
-
-        return grid
+        return self.encode_notes(notes)
 
     @staticmethod
-    def _quantize_step(note_start: float, step_duration: float) -> int:
-        if step_duration <= 0:
-            return 0
-        step = int(note_start / step_duration)
-        return max(0, min(31, step))
+    def read_notes(midi_path: Path) -> DrumNotes:
+        """Read drum notes with the raw SMF reader, falling back to pretty_midi for files it rejects."""
+        try:
+            return read_drum_notes(midi_path)
+        except MidiParseError:
+            return DrumNotes.from_pretty_midi(pretty_midi.PrettyMIDI(str(midi_path)))
+
+    @classmethod
+    def encode_notes(cls, notes: DrumNotes, steps: int = 32, velocity: bool = False) -> np.ndarray:
+        """Snap drum notes to a ``steps`` x 6 grid."""
+        return encode_hits(
+            notes.starts,
+            notes.pitches,
+            notes.end_time,
+            PITCH_LUT,
+            len(LANE_NAMES),
+            steps=steps,
+            velocities=notes.velocities if velocity else None,
+        )
+
+    @classmethod
+    def encode_midi(cls, midi: pretty_midi.PrettyMIDI, steps: int = 32, velocity: bool = False) -> np.ndarray:
+        """Snap the drum notes of an already parsed file to a ``steps`` x 6 grid."""
+        return cls.encode_notes(DrumNotes.from_pretty_midi(midi), steps=steps, velocity=velocity)
+
 
 __all__ = ["DrumDataset", "LANE_NAMES"]
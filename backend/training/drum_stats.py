@@ -0,0 +1,133 @@
+"""Streaming, mergeable statistics over drum grids.
+
+``DrumStats`` keeps only fixed-size counters, whatever the number of patterns:
+per-lane hit totals, a per-step histogram, a lane co-occurrence matrix
+(how often two lanes hit on the same step) and a histogram of hits per
+pattern. Grids are folded in one chunk at a time with array operations.
+Partial results from separate shards merge by addition, so the report folds
+each ingest worker's files into that worker's own ``DrumStats`` and merges the
+partials at the end.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+
+_CHUNK = 4096
+
+
+class DrumStats:
+    def __init__(self, steps: int = 32, lanes: int = 6) -> None:
+        self.steps = steps
+        self.lanes = lanes
+        self.patterns = 0
+        self.lane_hits = np.zeros(lanes, dtype=np.int64)
+        self.step_hits = np.zeros(steps, dtype=np.int64)
+        self.cooccurrence = np.zeros((lanes, lanes), dtype=np.int64)
+        self.hit_histogram = np.zeros(steps * lanes + 1, dtype=np.int64)
+
+    def update(self, grids: np.ndarray) -> "DrumStats":
+        """Fold an ``(N, steps, lanes)`` batch (or a single grid) into the counters."""
+        hits = np.asarray(grids) > 0
+        if hits.ndim == 2:
+            hits = hits[None]
+        if hits.shape[1:] != (self.steps, self.lanes):
+            raise ValueError(f"expected grids shaped (N, {self.steps}, {self.lanes}), got {hits.shape}")
+        if hits.shape[0] == 0:
+            return self
+        counts = hits.astype(np.int64)
+        self.patterns += hits.shape[0]
+        self.lane_hits += counts.sum(axis=(0, 1))
+        self.step_hits += counts.sum(axis=(0, 2))
+        flat = hits.reshape(-1, self.lanes).astype(np.float64)
+        self.cooccurrence += np.rint(flat.T @ flat).astype(np.int64)
+        self.hit_histogram += np.bincount(counts.sum(axis=(1, 2)), minlength=self.hit_histogram.size)
+        return self
+
+    def merge(self, other: "DrumStats") -> "DrumStats":
+        return self._add(other, 1)
+
+    def subtract(self, other: "DrumStats") -> "DrumStats":
+        """Take back patterns that were folded in before they turned out to be duplicates."""
+        return self._add(other, -1)
+
+    def _add(self, other: "DrumStats", sign: int) -> "DrumStats":
+        if (other.steps, other.lanes) != (self.steps, self.lanes):
+            raise ValueError("cannot merge statistics over different grid shapes")
+        self.patterns += sign * other.patterns
+        self.lane_hits += sign * other.lane_hits
+        self.step_hits += sign * other.step_hits
+        self.cooccurrence += sign * other.cooccurrence
+        self.hit_histogram += sign * other.hit_histogram
+        return self
+
+    def to_report(self, lane_names: Sequence[str]) -> Dict[str, object]:
+        if self.patterns == 0:
+            return {
+                "patterns": 0,
+                "message": "No drum patterns available. Add MIDI files first.",
+            }
+        total_hits = int(self.lane_hits.sum())
+        total_possible = self.patterns * self.steps * self.lanes
+        density = self.lane_hits / (self.patterns * self.steps)
+        # Stable sort keeps ties in step order, like Counter.most_common did.
+        top_steps = np.argsort(-self.step_hits, kind="stable")[:8]
+        return {
+            "patterns": self.patterns,
+            "density_per_lane": dict(zip(lane_names, density.tolist())),
+            "sparsity": 1.0 - total_hits / total_possible,
+            "most_common_steps": [[int(step), int(self.step_hits[step])] for step in top_steps],
+            "hits_per_pattern_distribution": {
+                int(hits): int(count) for hits, count in enumerate(self.hit_histogram) if count
+            },
+            "step_histogram": self.step_hits.tolist(),
+            "lane_cooccurrence": {
+                name: dict(zip(lane_names, row)) for name, row in zip(lane_names, self.cooccurrence.tolist())
+            },
+        }
+
+    def save(self, path: Path) -> Path:
+        """Write the raw counters as a compressed ``.npz`` snapshot that ``load`` can merge later."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as fh:
+            np.savez_compressed(
+                fh,
+                shape=np.array([self.steps, self.lanes], dtype=np.int64),
+                patterns=np.array(self.patterns, dtype=np.int64),
+                lane_hits=self.lane_hits,
+                step_hits=self.step_hits,
+                cooccurrence=self.cooccurrence,
+                hit_histogram=self.hit_histogram,
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "DrumStats":
+        with np.load(path) as data:
+            steps, lanes = (int(value) for value in data["shape"])
+            stats = cls(steps=steps, lanes=lanes)
+            stats.patterns = int(data["patterns"])
+            stats.lane_hits = data["lane_hits"].astype(np.int64)
+            stats.step_hits = data["step_hits"].astype(np.int64)
+            stats.cooccurrence = data["cooccurrence"].astype(np.int64)
+            stats.hit_histogram = data["hit_histogram"].astype(np.int64)
+        return stats
+
+
+def accumulate(grids: Iterable[np.ndarray], steps: int = 32, lanes: int = 6, chunk: int = _CHUNK) -> DrumStats:
+    """Stream grids into one ``DrumStats``, stacking at most ``chunk`` of them at a time."""
+    stats = DrumStats(steps=steps, lanes=lanes)
+    buffer = np.zeros((chunk, steps, lanes), dtype=np.uint8)
+    filled = 0
+    for grid in grids:
+        buffer[filled] = np.asarray(grid) > 0
+        filled += 1
+        if filled == chunk:
+            stats.update(buffer)
+            filled = 0
+    return stats.update(buffer[:filled])
+
+
+__all__ = ["DrumStats", "accumulate"]
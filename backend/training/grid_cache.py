@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+CACHE_ROOT = Path(__file__).resolve().parent / "data" / "cache"
+CACHE_ROOT_ENV = "TRAINING_CACHE_DIR"
+_MANIFEST_VERSION = 1
+
+
+def default_cache_root() -> Path:
+    """``$TRAINING_CACHE_DIR`` if set, else the in-tree ``training/data/cache``."""
+    return Path(os.environ.get(CACHE_ROOT_ENV) or CACHE_ROOT)
+
+
+def root_digest(data_root: Path | str) -> str:
+    resolved = str(Path(data_root).resolve())
+    return hashlib.sha1(resolved.encode("utf-8")).hexdigest()[:12]
+
+
+def cache_dir_for(data_root: Path | str, cache_root: Path | str | None = None) -> Path:
+    """One cache directory per dataset root, so switching roots never mixes grids."""
+    return Path(cache_root or default_cache_root()) / f"grids-{root_digest(data_root)}"
+
+
+class GridCache:
+    """Encoded drum grids for a file list, stored as one contiguous uint8 ``.npy``.
+
+    ``grids.npy`` holds an ``(N, steps, lanes)`` array whose rows follow the
+    order of ``manifest.json``. The manifest records each file's path, size and
+    mtime so a rebuild only re-encodes files that were added or changed.
+    """
+
+    def __init__(self, cache_dir: Path | str, steps: int = 32, lanes: int = 6) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.steps = steps
+        self.lanes = lanes
+        self.grids_path = self.cache_dir / "grids.npy"
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self.encoded = 0
+        self.reused = 0
+
+    def build(self, files: Sequence[Path], encode: Callable[[Path], np.ndarray]) -> np.ndarray:
+        """Bring the cache in line with ``files`` and return it memory-mapped read-only."""
+        entries = [self._stat_entry(path) for path in files]
+        if not entries:
+            return np.zeros((0, self.steps, self.lanes), dtype=np.uint8)
+        previous = self._read_manifest()
+        if previous == entries and self.grids_path.exists():
+            self.reused = len(entries)
+            return self.load()
+
+        old_rows = {entry["path"]: (idx, entry) for idx, entry in enumerate(previous or [])}
+        old_grids = self._open_existing()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.grids_path.with_name("grids.tmp.npy")
+        shape = (len(entries), self.steps, self.lanes)
+        grids = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8, shape=shape)
+
+        self.encoded = 0
+        self.reused = 0
+        for row, (path, entry) in enumerate(zip(files, entries)):
+            cached = old_rows.get(entry["path"])
+            if old_grids is not None and cached is not None and cached[1] == entry and cached[0] < len(old_grids):
+                grids[row] = old_grids[cached[0]]
+                self.reused += 1
+            else:
+                grids[row] = np.asarray(encode(path)) > 0
+                self.encoded += 1
+
+        grids.flush()
+        del grids, old_grids
+        # Drop the manifest first: an interrupted swap then forces a full rebuild
+        # instead of pairing new rows with the old manifest.
+        self.manifest_path.unlink(missing_ok=True)
+        os.replace(tmp_path, self.grids_path)
+        self._write_manifest(entries)
+        return self.load()
+
+    def load(self) -> np.ndarray:
+        return np.load(self.grids_path, mmap_mode="r")
+
+    def _open_existing(self) -> Optional[np.ndarray]:
+        if not self.grids_path.exists():
+            return None
+        try:
+            grids = self.load()
+        except (OSError, ValueError):
+            return None
+        if grids.shape[1:] != (self.steps, self.lanes):
+            return None
+        return grids
+
+    @staticmethod
+    def _stat_entry(path: Path) -> Dict[str, object]:
+        try:
+            stat = path.stat()
+            return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        except OSError:
+            return {"path": str(path), "size": -1, "mtime_ns": -1}
+
+    def _read_manifest(self) -> Optional[List[Dict[str, object]]]:
+        try:
+            with self.manifest_path.open("r", encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != _MANIFEST_VERSION or manifest.get("shape") != [self.steps, self.lanes]:
+            return None
+        return manifest.get("files")
+
+    def _write_manifest(self, entries: List[Dict[str, object]]) -> None:
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump({"version": _MANIFEST_VERSION, "shape": [self.steps, self.lanes], "files": entries}, fh)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,191 @@
+"""Parallel MIDI ingestion shared by the dataset validation, normalization and report tools.
+
+Files are fanned out to a process pool in chunks. Every file yields an
+``IngestResult``; a file that fails to parse records its error instead of
+aborting the run. ``IngestEngine.summarize`` parses each file once and keeps
+the summary for the rest of the process, so running validation and the report
+in the same run does not parse the library twice. ``IngestEngine.fold`` is for
+whole-corpus reductions: each worker folds its files into its own accumulator
+and only the accumulators and a small per-file value come back.
+"""
+from __future__ import annotations
+
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from .drum_dataset import DrumDataset
+
+T = TypeVar("T")
+A = TypeVar("A")
+R = TypeVar("R")
+
+_SERIAL_THRESHOLD = 32
+
+
+@dataclass(frozen=True)
+class MidiSummary:
+    """What the dataset tools need from one file, small enough to ship between processes."""
+
+    end_time: float
+    drum_pitches: Tuple[int, ...]
+    grid: np.ndarray
+
+
+@dataclass(frozen=True)
+class IngestResult(Generic[T]):
+    path: Path
+    value: Optional[T] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def summarize_midi(path: Path) -> MidiSummary:
+    notes = DrumDataset.read_notes(path)
+    grid = DrumDataset.encode_notes(notes).astype(np.uint8)
+    pitches = tuple(int(pitch) for pitch in np.unique(notes.pitches))
+    return MidiSummary(end_time=notes.end_time, drum_pitches=pitches, grid=grid)
+
+
+def _capture(fn: Callable[[Path], T], path: Path) -> Tuple[Optional[T], Optional[str]]:
+    try:
+        return fn(path), None
+    except Exception as exc:  # per-file capture: a corrupt file must not stop the run
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+def _run_chunk(fn: Callable[[Path], T], paths: Sequence[Path]) -> List[Tuple[Optional[T], Optional[str]]]:
+    return [_capture(fn, path) for path in paths]
+
+
+def _fold_chunk(
+    step: Callable[[A, Path], T],
+    initial: Callable[[], A],
+    paths: Sequence[Path],
+) -> Tuple[A, List[Tuple[Optional[T], Optional[str]]]]:
+    accumulator = initial()
+    return accumulator, [_capture(functools.partial(step, accumulator), path) for path in paths]
+
+
+class IngestEngine:
+    def __init__(self, workers: int | None = None, chunk_size: int | None = None, progress: bool = True) -> None:
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self._summaries: Dict[Tuple[str, int, int], IngestResult[MidiSummary]] = {}
+
+    def map(self, fn: Callable[[Path], T], paths: Sequence[Path], label: str = "ingest") -> List[IngestResult[T]]:
+        """Apply a picklable, module-level ``fn`` to every path; results keep input order."""
+        paths = list(paths)
+        if not paths:
+            return []
+        reporter = _Progress(label, len(paths), self.progress)
+        outcomes: List[Tuple[Optional[T], Optional[str]]] = []
+        for chunk_outcomes in self._run_chunks(functools.partial(_run_chunk, fn), paths, reporter):
+            outcomes.extend(chunk_outcomes)
+        reporter.finish(sum(1 for _, error in outcomes if error))
+
+        return [IngestResult(path=path, value=value, error=error) for path, (value, error) in zip(paths, outcomes)]
+
+    def fold(
+        self,
+        step: Callable[[A, Path], T],
+        initial: Callable[[], A],
+        merge: Callable[[A, A], A],
+        paths: Sequence[Path],
+        label: str = "fold",
+    ) -> Tuple[A, List[IngestResult[T]]]:
+        """Fold every file into a per-chunk accumulator on the worker, then merge the partials.
+
+        ``step(accumulator, path)`` updates the accumulator and returns a small
+        per-file value; only those values and one accumulator per chunk cross
+        the process boundary. ``step`` and ``initial`` must be picklable.
+        """
+        paths = list(paths)
+        total = initial()
+        if not paths:
+            return total, []
+        reporter = _Progress(label, len(paths), self.progress)
+        outcomes: List[Tuple[Optional[T], Optional[str]]] = []
+        for partial, chunk_outcomes in self._run_chunks(functools.partial(_fold_chunk, step, initial), paths, reporter):
+            total = merge(total, partial)
+            outcomes.extend(chunk_outcomes)
+        reporter.finish(sum(1 for _, error in outcomes if error))
+
+        return total, [IngestResult(path=path, value=value, error=error) for path, (value, error) in zip(paths, outcomes)]
+
+    def summarize(self, paths: Sequence[Path]) -> List[IngestResult[MidiSummary]]:
+        """Parse each file once per process; unchanged files come from the in-memory cache."""
+        keys = [_file_key(path) for path in paths]
+        missing = [path for path, key in zip(paths, keys) if key not in self._summaries]
+        for key, result in zip((_file_key(path) for path in missing), self.map(summarize_midi, missing, "parse")):
+            self._summaries[key] = result
+        return [self._summaries[key] for key in keys]
+
+    def _run_chunks(self, chunk_fn: Callable[[List[Path]], R], paths: List[Path], reporter: _Progress) -> Iterator[R]:
+        chunk_size = self.chunk_size or max(1, min(64, len(paths) // (self.workers * 4) or 1))
+        chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+        if self.workers == 1 or len(paths) <= _SERIAL_THRESHOLD:
+            for chunk in chunks:
+                yield chunk_fn(chunk)
+                reporter.advance(len(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for chunk, result in zip(chunks, pool.map(chunk_fn, chunks)):
+                    yield result
+                    reporter.advance(len(chunk))
+
+
+def _file_key(path: Path) -> Tuple[str, int, int]:
+    try:
+        stat = path.stat()
+        return str(path), stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return str(path), -1, -1
+
+
+class _Progress:
+    def __init__(self, label: str, total: int, enabled: bool) -> None:
+        self.label = label
+        self.total = total
+        self.enabled = enabled
+        self.done = 0
+        self.step = max(1, total // 20)
+        self.next_report = self.step
+        self.started = time.perf_counter()
+
+    def advance(self, count: int) -> None:
+        self.done += count
+        if self.enabled and self.done >= self.next_report and self.done < self.total:
+            rate = self.done / max(time.perf_counter() - self.started, 1e-9)
+            print(f"[ingest] {self.label}: {self.done}/{self.total} files ({self.done * 100 // self.total}%, {rate:.0f}/s)")
+            while self.next_report <= self.done:
+                self.next_report += self.step
+
+    def finish(self, errors: int) -> None:
+        if self.enabled:
+            elapsed = time.perf_counter() - self.started
+            print(f"[ingest] {self.label}: {self.total} files in {elapsed:.1f}s, {errors} errors")
+
+
+class _EngineHolder:
+    instance: IngestEngine | None = None
+
+
+def get_ingest_engine() -> IngestEngine:
+    """Process-wide engine so every tool in one run shares the parse cache."""
+    if _EngineHolder.instance is None:
+        _EngineHolder.instance = IngestEngine()
+    return _EngineHolder.instance
+
+
+__all__ = ["IngestEngine", "IngestResult", "MidiSummary", "get_ingest_engine", "summarize_midi"]
@@ -0,0 +1,297 @@
+"""Minimal Standard MIDI File reader for drum extraction.
+
+``pretty_midi.PrettyMIDI`` builds instrument, note, tempo and metadata object
+graphs for every file. The dataset only needs the closed drum notes and the
+file's end time, so this reader walks the raw track bytes once and keeps ticks
+in plain lists until a single NumPy tick-to-seconds conversion at the end.
+
+The results match what pretty_midi reports for the same file. The tempo map
+comes from track 0. Notes are paired the same way: one note-off closes every
+earlier open note-on for that channel and pitch. The end time also counts
+note ends on every channel, control changes, pitch bends, time and key
+signatures, lyrics and text events. Anything this reader cannot decode exactly
+the way mido would raises ``MidiParseError`` so callers can fall back to
+pretty_midi and get its behaviour, errors included.
+"""
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+DRUM_CHANNEL = 9
+MAX_TICK = 10_000_000  # pretty_midi rejects files past this tick as corrupt
+
+_CHANNEL_DATA_LENGTH = {0x8: 2, 0x9: 2, 0xA: 2, 0xB: 2, 0xC: 1, 0xD: 1, 0xE: 2}
+_SYSTEM_DATA_LENGTH = {0xF1: 1, 0xF2: 2, 0xF3: 1, 0xF6: 0, 0xF8: 0, 0xFA: 0, 0xFB: 0, 0xFC: 0, 0xFE: 0}
+
+_META_TEXT = 0x01
+_META_LYRICS = 0x05
+_META_SET_TEMPO = 0x51
+_META_TIME_SIGNATURE = 0x58
+_META_KEY_SIGNATURE = 0x59
+
+
+class MidiParseError(ValueError):
+    """The bytes are malformed or use a feature this reader does not mirror."""
+
+
+@dataclass(frozen=True)
+class DrumNotes:
+    """Closed channel-10 notes of one file as parallel arrays."""
+
+    starts: np.ndarray
+    pitches: np.ndarray
+    velocities: np.ndarray
+    end_time: float
+
+    @classmethod
+    def from_pretty_midi(cls, midi) -> "DrumNotes":
+        notes = [note for instrument in midi.instruments if instrument.is_drum for note in instrument.notes]
+        return cls(
+            starts=np.fromiter((note.start for note in notes), dtype=np.float64, count=len(notes)),
+            pitches=np.fromiter((note.pitch for note in notes), dtype=np.int64, count=len(notes)),
+            velocities=np.fromiter((note.velocity for note in notes), dtype=np.int64, count=len(notes)),
+            end_time=float(midi.get_end_time()),
+        )
+
+
+@dataclass
+class _TrackScan:
+    last_tick: int = -1
+    content_tick: int = -1
+    tempos: List[Tuple[int, int]] = field(default_factory=list)
+    signature_ticks: List[int] = field(default_factory=list)
+    text_ticks: List[int] = field(default_factory=list)
+    drum_starts: List[int] = field(default_factory=list)
+    drum_pitches: List[int] = field(default_factory=list)
+    drum_velocities: List[int] = field(default_factory=list)
+
+
+def read_drum_notes(path: Path | str) -> DrumNotes:
+    with open(path, "rb") as fh:
+        return parse_drum_notes(fh.read())
+
+
+def parse_drum_notes(data: bytes) -> DrumNotes:
+    if len(data) < 14 or data[:4] != b"MThd":
+        raise MidiParseError("MThd not found")
+    (header_size,) = struct.unpack_from(">L", data, 4)
+    if header_size < 6:
+        raise MidiParseError("truncated header")
+    _, track_count, resolution = struct.unpack_from(">hhh", data, 8)
+    if resolution <= 0:
+        raise MidiParseError(f"unsupported time division {resolution}")
+    if track_count <= 0:
+        raise MidiParseError("file has no tracks")
+
+    scans: List[_TrackScan] = []
+    pos = 8 + header_size
+    for _ in range(track_count):
+        if pos + 8 > len(data):
+            raise MidiParseError("truncated track header")
+        name, size = struct.unpack_from(">4sL", data, pos)
+        if name != b"MTrk":
+            raise MidiParseError("no MTrk header at start of track")
+        start, end = pos + 8, pos + 8 + size
+        if end > len(data):
+            raise MidiParseError("truncated track")
+        scan = _scan_track(data, start, end)
+        if scan.last_tick < 0:
+            raise MidiParseError("empty track")
+        scans.append(scan)
+        pos = end
+
+    if max(scan.last_tick for scan in scans) + 1 > MAX_TICK:
+        raise MidiParseError("largest tick is past MAX_TICK, the file is likely corrupt")
+
+    scale_ticks, scales = _tick_scales(scans[0].tempos, resolution)
+    end_ticks = [scan.content_tick for scan in scans]
+    end_ticks += [tick for scan in scans for tick in scan.text_ticks]
+    end_ticks += scans[0].signature_ticks
+    end_ticks += scale_ticks
+
+    starts = np.fromiter((tick for scan in scans for tick in scan.drum_starts), dtype=np.int64)
+    times = _ticks_to_seconds(np.append(starts, max(end_ticks)), scale_ticks, scales)
+    return DrumNotes(
+        starts=times[:-1],
+        pitches=np.fromiter((pitch for scan in scans for pitch in scan.drum_pitches), dtype=np.int64),
+        velocities=np.fromiter((vel for scan in scans for vel in scan.drum_velocities), dtype=np.int64),
+        end_time=float(times[-1]),
+    )
+
+
+def _read_varlen(data: bytes, pos: int, end: int) -> Tuple[int, int]:
+    value = 0
+    while True:
+        if pos >= end:
+            raise MidiParseError("truncated variable-length value")
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+
+
+def _scan_track(data: bytes, pos: int, end: int) -> _TrackScan:
+    scan = _TrackScan()
+    tick = 0
+    last_status: Optional[int] = None
+    programs = [0] * 16
+    open_notes: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    # Mirrors pretty_midi's instrument bookkeeping in ticks: instruments are
+    # keyed by (program, channel) and exist once a note closes on them. Control
+    # changes and pitch bends that arrive before that are parked per channel
+    # and only count if an instrument on that channel adopts them later.
+    instrument_ticks: Dict[Tuple[int, int], int] = {}
+    straggler_ticks: Dict[int, int] = {}
+    adopted: Set[int] = set()
+
+    while pos < end:
+        delta, pos = _read_varlen(data, pos, end)
+        tick += delta
+        scan.last_tick = tick
+        if pos >= end:
+            raise MidiParseError("truncated event")
+        status = data[pos]
+        pos += 1
+
+        peek: List[int] = []
+        if status < 0x80:
+            if last_status is None:
+                raise MidiParseError("running status without last_status")
+            peek = [status]
+            status = last_status
+        elif status != 0xFF:
+            last_status = status
+
+        if status == 0xFF:
+            if pos >= end:
+                raise MidiParseError("truncated meta event")
+            meta_type = data[pos]
+            length, pos = _read_varlen(data, pos + 1, end)
+            payload = data[pos:min(pos + length, end)]
+            if len(payload) < length:
+                raise MidiParseError("truncated meta event")
+            pos += length
+            _check_meta(meta_type, payload)
+            if meta_type == _META_SET_TEMPO:
+                scan.tempos.append((tick, (payload[0] << 16) | (payload[1] << 8) | payload[2]))
+            elif meta_type in (_META_TIME_SIGNATURE, _META_KEY_SIGNATURE):
+                scan.signature_ticks.append(tick)
+            elif meta_type in (_META_TEXT, _META_LYRICS):
+                scan.text_ticks.append(tick)
+            continue
+
+        if status in (0xF0, 0xF7):
+            length, pos = _read_varlen(data, pos, end)
+            if pos + length > end:
+                raise MidiParseError("truncated sysex")
+            pos += length
+            continue
+
+        kind = status >> 4
+        size = _CHANNEL_DATA_LENGTH.get(kind) if kind < 0xF else _SYSTEM_DATA_LENGTH.get(status)
+        if size is None:
+            raise MidiParseError(f"undefined status byte 0x{status:02x}")
+        needed = size - len(peek)
+        if pos + needed > end:
+            raise MidiParseError("truncated channel message")
+        values = peek + list(data[pos:pos + needed])
+        pos += needed
+        if any(value > 127 for value in values):
+            raise MidiParseError("data byte must be in range 0..127")
+        if kind == 0xF:
+            continue
+
+        channel = status & 0x0F
+        if kind == 0xC:
+            programs[channel] = values[0]
+        elif kind == 0x9 and values[1] > 0:
+            open_notes.setdefault((channel, values[0]), []).append((tick, values[1]))
+        elif kind == 0x8 or kind == 0x9:
+            key = (channel, values[0])
+            pending = open_notes.get(key)
+            if pending is None:
+                continue
+            closing = [note for note in pending if note[0] != tick]
+            keeping = [note for note in pending if note[0] == tick]
+            if closing:
+                instrument = (programs[channel], channel)
+                if instrument in instrument_ticks:
+                    instrument_ticks[instrument] = max(instrument_ticks[instrument], tick)
+                else:
+                    instrument_ticks[instrument] = tick
+                    if channel in straggler_ticks:
+                        adopted.add(channel)
+                if channel == DRUM_CHANNEL:
+                    for start_tick, velocity in closing:
+                        scan.drum_starts.append(start_tick)
+                        scan.drum_pitches.append(values[0])
+                        scan.drum_velocities.append(velocity)
+            if closing and keeping:
+                open_notes[key] = keeping
+            else:
+                del open_notes[key]
+        elif kind == 0xB or kind == 0xE:
+            instrument = (programs[channel], channel)
+            if instrument in instrument_ticks:
+                instrument_ticks[instrument] = max(instrument_ticks[instrument], tick)
+            elif channel in straggler_ticks:
+                straggler_ticks[channel] = max(straggler_ticks[channel], tick)
+            else:
+                straggler_ticks[channel] = tick
+
+    content = list(instrument_ticks.values()) + [straggler_ticks[channel] for channel in adopted]
+    scan.content_tick = max(content, default=-1)
+    return scan
+
+
+def _check_meta(meta_type: int, payload: bytes) -> None:
+    """Reject the meta payloads mido would fail to decode."""
+    size = len(payload)
+    if meta_type == 0x00 and size == 1:
+        raise MidiParseError("malformed sequence_number")
+    if meta_type == 0x20 and size == 0:
+        raise MidiParseError("malformed channel_prefix")
+    if meta_type == _META_SET_TEMPO and (size < 3 or payload[0] == payload[1] == payload[2] == 0):
+        raise MidiParseError("malformed set_tempo")
+    if meta_type == 0x54 and (size < 5 or payload[0] >> 5 > 3):
+        raise MidiParseError("malformed smpte_offset")
+    if meta_type == _META_TIME_SIGNATURE and size < 4:
+        raise MidiParseError("malformed time_signature")
+    if meta_type == _META_KEY_SIGNATURE:
+        if size < 2:
+            raise MidiParseError("malformed key_signature")
+        key = payload[0] - 256 if payload[0] > 127 else payload[0]
+        if not -7 <= key <= 7 or payload[1] not in (0, 1):
+            raise MidiParseError("malformed key_signature")
+
+
+def _tick_scales(tempos: List[Tuple[int, int]], resolution: int) -> Tuple[List[int], List[float]]:
+    """Seconds-per-tick segments, built with the same float arithmetic as pretty_midi."""
+    ticks = [0]
+    scales = [60.0 / (120.0 * resolution)]
+    for tick, tempo in tempos:
+        if tick == 0:
+            ticks, scales = [0], [60.0 / ((6e7 / tempo) * resolution)]
+            continue
+        scale = 60.0 / ((6e7 / tempo) * resolution)
+        if scale != scales[-1]:
+            ticks.append(tick)
+            scales.append(scale)
+    return ticks, scales
+
+
+def _ticks_to_seconds(ticks: np.ndarray, scale_ticks: List[int], scales: List[float]) -> np.ndarray:
+    offsets = [0.0]
+    for (start, scale), stop in zip(zip(scale_ticks[:-1], scales[:-1]), scale_ticks[1:]):
+        offsets.append(offsets[-1] + scale * (stop - start))
+    segment = np.searchsorted(np.asarray(scale_ticks), ticks, side="right") - 1
+    return np.asarray(offsets)[segment] + np.asarray(scales)[segment] * (ticks - np.asarray(scale_ticks)[segment])
+
+
+__all__ = ["DRUM_CHANNEL", "DrumNotes", "MidiParseError", "parse_drum_notes", "read_drum_notes"]
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-import os
 from pathlib import Path
-from typing import Iterable
+from typing import List
 
+import numpy as np
 import pretty_midi
 
 from .dataset_config import DATASET_ROOT
+from .dataset_index import get_dataset_index
+from .grid_encoding import first_unique, round_steps
+from .ingest import get_ingest_engine
 
 _DEFAULT_DATA_DIR = Path(__file__).resolve().parent / "data" / "drums"
 DATASET_ROOT_PATH = Path(DATASET_ROOT)
@@ -16,16 +19,15 @@ if DATASET_ROOT_PATH == _DEFAULT_DATA_DIR:
 ALLOWED_PITCHES = {36, 38, 42, 46, 39, 48}
 STEP_COUNT = 32
 
+_ALLOWED_LUT = np.zeros(128, dtype=bool)
+_ALLOWED_LUT[list(ALLOWED_PITCHES)] = True
 
-def _iter_midi_files() -> Iterable[Path]:
+
+def _iter_midi_files() -> List[Path]:
     if not DATASET_ROOT_PATH.exists():
         print(f"[normalize_drums] Dataset root {DATASET_ROOT_PATH} does not exist.")
         return []
-    for dirpath, _, filenames in os.walk(DATASET_ROOT_PATH):
-        for filename in filenames:
-            candidate = Path(dirpath) / filename
-            if candidate.suffix.lower() in {".mid", ".midi"}:
-                yield candidate
+    return get_dataset_index(DATASET_ROOT_PATH).files()
 
 
 def normalize_midi(path: Path) -> bool:
@@ -46,26 +48,28 @@ def normalize_midi(path: Path) -> bool:
                 changed = True
             continue
 
+        notes = instrument.notes
+        if not notes:
+            continue
+        pitches = np.fromiter((note.pitch for note in notes), dtype=np.int64, count=len(notes))
+        starts = np.fromiter((note.start for note in notes), dtype=np.float64, count=len(notes))
+        velocities = np.fromiter((note.velocity for note in notes), dtype=np.int64, count=len(notes))
+
+        steps = round_steps(starts, step_duration, STEP_COUNT)
+        allowed = np.flatnonzero(_ALLOWED_LUT[np.clip(pitches, 0, 127)])
+        keep = allowed[first_unique(pitches[allowed] * STEP_COUNT + steps[allowed])]
+
+        new_starts = steps[keep] * step_duration
+        new_ends = new_starts + max(step_duration * 0.5, 0.05)
+        new_velocities = np.clip(velocities[keep], 30, 110)
         filtered = []
-        seen = set()
-        for note in instrument.notes:
-            if note.pitch not in ALLOWED_PITCHES:
-                changed = True
-                continue
-            step = int(round(note.start / step_duration)) if step_duration > 0 else 0
-            step = max(0, min(STEP_COUNT - 1, step))
-            key = (note.pitch, step)
-            if key in seen:
-                changed = True
-                continue
-            seen.add(key)
-            new_start = step * step_duration
-            new_end = new_start + max(step_duration * 0.5, 0.05)
-            note.start = new_start
-            note.end = new_end
-            note.velocity = max(30, min(110, note.velocity))
+        for idx, start, end, velocity in zip(keep.tolist(), new_starts.tolist(), new_ends.tolist(), new_velocities.tolist()):
+            note = notes[idx]
+            note.start = start
+            note.end = end
+            note.velocity = velocity
             filtered.append(note)
-        if len(filtered) != len(instrument.notes):
+        if len(filtered) != len(notes):
             changed = True
         instrument.notes = filtered
 
@@ -76,8 +80,10 @@ def normalize_midi(path: Path) -> bool:
 
 
 def batch_normalize() -> None:
-    for midi_file in _iter_midi_files():
-        normalize_midi(midi_file)
+    results = get_ingest_engine().map(normalize_midi, list(_iter_midi_files()), "normalize")
+    for result in results:
+        if not result.ok:
+            print(f"[normalize_drums] Failed to normalize {result.path.name}: {result.error}")
 
 
 if __name__ == "__main__":
@@ -1,64 +1,53 @@
 from __future__ import annotations
 
+import functools
 import json
-from collections import Counter
 from pathlib import Path
-from typing import Dict, List
 
-import numpy as np
 from .dataset_config import DATASET_ROOT
+from .dataset_index import get_dataset_index
+from .dedup import byte_hashes_for, find_duplicates_by_key, grid_from_key, grid_key
 from .drum_dataset import DrumDataset, LANE_NAMES
+from .drum_stats import DrumStats, accumulate
+from .ingest import get_ingest_engine
 
 REPORT_PATH = Path(__file__).resolve().parent / "data" / "drum_report.json"
+STATS_SNAPSHOT_PATH = REPORT_PATH.with_name("drum_stats.npz")
 
 
-def _collect_statistics(dataset: DrumDataset) -> Dict[str, object]:
-    if len(dataset) == 0:
-        return {
-            "patterns": 0,
-            "message": "No drum patterns available. Add MIDI files first.",
-        }
-
-    lane_totals = np.zeros(len(LANE_NAMES), dtype=np.float64)
-    step_totals = np.zeros(32, dtype=np.float64)
-    hits_per_pattern: List[int] = []
-
-    for idx in range(len(dataset)):
-        tensor = dataset[idx].numpy()
-        lane_totals += tensor.sum(axis=0)
-        step_totals += tensor.sum(axis=1)
-        hits_per_pattern.append(int(tensor.sum()))
-
-    total_patterns = len(dataset)
-    total_possible = total_patterns * 32 * len(LANE_NAMES)
-    total_hits = sum(hits_per_pattern)
-
-    density_per_lane = (lane_totals / (total_patterns * 32)).tolist()
-    sparsity = 1.0 - (total_hits / total_possible if total_possible else 0.0)
-
-    step_counter = Counter()
-    for idx, count in enumerate(step_totals):
-        step_counter[idx] = int(count)
-    most_common_steps = step_counter.most_common(8)
-
-    distribution = Counter(hits_per_pattern)
-
-    return {
-        "patterns": total_patterns,
-        "density_per_lane": dict(zip(LANE_NAMES, density_per_lane)),
-        "sparsity": sparsity,
-        "most_common_steps": most_common_steps,
-        "hits_per_pattern_distribution": dict(sorted(distribution.items())),
-    }
+def _fold_grid(stats: DrumStats, path: Path) -> bytes:
+    """Count one file's grid on the ingest worker and send back only its dedup key."""
+    grid = DrumDataset.encode_notes(DrumDataset.read_notes(path), steps=stats.steps)
+    stats.update(grid)
+    return grid_key(grid)
 
 
 def generate_report() -> Path:
-    dataset = DrumDataset(root_path=DATASET_ROOT)
-    stats = _collect_statistics(dataset)
+    root = Path(DATASET_ROOT)
+    files = DrumDataset(root_path=root).files
+    accumulated, results = get_ingest_engine().fold(
+        _fold_grid,
+        functools.partial(DrumStats, lanes=len(LANE_NAMES)),
+        DrumStats.merge,
+        files,
+        "report",
+    )
+    parsed = [result for result in results if result.ok]
+    paths = [result.path for result in parsed]
+    entries = get_dataset_index(root).entries() if paths else []
+    dedup = find_duplicates_by_key(paths, byte_hashes_for(paths, entries), [result.value for result in parsed])
+    # Every parsed file was counted on its worker; take the duplicates back out.
+    duplicates = (grid_from_key(parsed[row].value) for row in dedup.duplicates)
+    accumulated.subtract(accumulate(duplicates, steps=accumulated.steps, lanes=accumulated.lanes))
+    accumulated.save(STATS_SNAPSHOT_PATH)
+    stats = accumulated.to_report(LANE_NAMES)
+    stats["parse_errors"] = sum(1 for result in results if not result.ok)
+    stats["deduplication"] = dedup.summary()
+    print(f"[report_drums] Wrote duplicate map to {dedup.write_report()}")
     REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
     with REPORT_PATH.open("w", encoding="utf-8") as fh:
         json.dump(stats, fh, indent=2)
-    print(f"[report_drums] Wrote {REPORT_PATH}")
+    print(f"[report_drums] Wrote {REPORT_PATH} and {STATS_SNAPSHOT_PATH}")
     return REPORT_PATH
 
 
@@ -4,6 +4,7 @@ import argparse
 from pathlib import Path
 
 from .trainer import TrainingConfig, train
+from .utils import emit_json_progress
 
 
 def main() -> None:
@@ -12,6 +13,12 @@ def main() -> None:
     parser.add_argument("--epochs", type=int, default=2)
     parser.add_argument("--batch-size", type=int, default=32)
     parser.add_argument("--learning-rate", type=float, default=1e-4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--num-workers", type=int, default=2)
+    parser.add_argument("--val-fraction", type=float, default=0.1)
+    parser.add_argument("--patience", type=int, default=3, help="Epochs without improvement before stopping; 0 disables")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an interrupted run's checkpoint")
+    parser.add_argument("--json-progress", action="store_true", help="Emit per-epoch progress as JSON lines")
     args = parser.parse_args()
 
     config = TrainingConfig(
@@ -19,8 +26,13 @@ def main() -> None:
         epochs=args.epochs,
         batch_size=args.batch_size,
         learning_rate=args.learning_rate,
+        seed=args.seed,
+        num_workers=args.num_workers,
+        val_fraction=args.val_fraction,
+        patience=args.patience,
+        resume=not args.no_resume,
     )
-    checkpoint = train(config)
+    checkpoint = train(config, progress=emit_json_progress if args.json_progress else None)
     print(f"Saved checkpoint to {checkpoint}")
 
 
@@ -1,58 +1,232 @@
 from __future__ import annotations
 
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import torch
 from torch import nn
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, Dataset, Subset
 
 from .check_readiness import check_readiness
 from .dataset_config import DATASET_ROOT
 from .drum_dataset import DrumDataset
+from .utils import (
+    ProgressFn,
+    ResumableRun,
+    configure_threads,
+    emit_json_progress,
+    init_loader_worker,
+    maybe_compile,
+    resolve_device,
+    seed_everything,
+    split_indices,
+)
 from models.drum_model import DrumModel
+from models.export import example_input
 
 BATCH_SIZE = 16
 EPOCHS = 50
 LEARNING_RATE = 1e-3
+CHECKPOINT_DIR = Path(__file__).resolve().parent.parent / "models" / "checkpoints" / "drums"
 
 
-def _get_device() -> torch.device:
-    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+def _default_workers() -> int:
+    """Leave one core for the training step; capped because more workers rarely help a small model."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return max(0, min(8, cores - 1))
 
 
-def train() -> None:
+@dataclass
+class DrumTrainingConfig:
+    """Runtime knobs for ``train``; ``None`` thread counts keep torch's defaults."""
+
+    batch_size: int = BATCH_SIZE
+    epochs: int = EPOCHS
+    learning_rate: float = LEARNING_RATE
+    num_workers: int = field(default_factory=_default_workers)
+    prefetch_factor: int = 4
+    persistent_workers: bool = True
+    pin_memory: bool | None = None
+    intra_op_threads: int | None = None
+    inter_op_threads: int | None = None
+    compile: bool = False
+    seed: int = 42
+    val_fraction: float = 0.1
+    patience: int = 5
+    min_delta: float = 0.0
+    checkpoint_every: int = 1
+    resume: bool = True
+
+
+@dataclass
+class EpochTimings:
+    samples: int = 0
+    data_wait: float = 0.0
+    compute: float = 0.0
+    wall: float = 0.0
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.wall if self.wall > 0 else 0.0
+
+
+def _build_loader(dataset: Dataset, config: DrumTrainingConfig, device: torch.device, shuffle: bool = True) -> DataLoader:
+    pin_memory = device.type == "cuda" if config.pin_memory is None else config.pin_memory
+    worker_options = {}
+    if config.num_workers > 0:
+        worker_options = {
+            "prefetch_factor": config.prefetch_factor,
+            "persistent_workers": config.persistent_workers,
+            "worker_init_fn": init_loader_worker,
+        }
+    return DataLoader(
+        dataset,
+        batch_size=config.batch_size,
+        shuffle=shuffle,
+        drop_last=False,
+        num_workers=config.num_workers,
+        pin_memory=pin_memory,
+        **worker_options,
+    )
+
+
+def _run_epoch(
+    model: nn.Module,
+    dataloader: DataLoader,
+    criterion: nn.Module,
+    optimizer: torch.optim.Optimizer,
+    device: torch.device,
+) -> tuple[float, EpochTimings]:
+    timings = EpochTimings()
+    epoch_loss = 0.0
+    epoch_start = time.perf_counter()
+    wait_start = epoch_start
+    for batch in dataloader:
+        step_start = time.perf_counter()
+        timings.data_wait += step_start - wait_start
+        batch = batch.to(device, non_blocking=True)
+        optimizer.zero_grad()
+        outputs = model(batch)
+        loss = criterion(outputs, batch)
+        loss.backward()
+        optimizer.step()
+        epoch_loss += loss.item()  # also synchronizes CUDA, so the compute time is real
+        timings.samples += batch.shape[0]
+        wait_start = time.perf_counter()
+        timings.compute += wait_start - step_start
+    timings.wall = time.perf_counter() - epoch_start
+    return epoch_loss / max(1, len(dataloader)), timings
+
+
+def _evaluate(model: nn.Module, dataloader: DataLoader, criterion: nn.Module, device: torch.device) -> float:
+    model.eval()
+    total = 0.0
+    with torch.no_grad():
+        for batch in dataloader:
+            batch = batch.to(device, non_blocking=True)
+            total += criterion(model(batch), batch).item()
+    model.train()
+    return total / max(1, len(dataloader))
+
+
+def train(config: DrumTrainingConfig | None = None, progress: ProgressFn | None = None) -> Path | None:
+    config = config or DrumTrainingConfig()
     if not check_readiness(verbose=False):
         print("Dataset not ready. Run check_readiness.py for details.")
-        return
+        return None
 
-    device = _get_device()
-    dataset = DrumDataset(root_path=Path(DATASET_ROOT))
-    dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True, drop_last=False)
+    seed_everything(config.seed)
+    configure_threads(config.intra_op_threads, config.inter_op_threads)
+    device = resolve_device()
+    dataset = DrumDataset(root_path=Path(DATASET_ROOT), use_cache=True, dedupe=True)
+    train_idx, val_idx = split_indices(len(dataset.files), config.val_fraction, config.seed)
+    train_set: Dataset = Subset(dataset, train_idx) if val_idx else dataset
+    dataloader = _build_loader(train_set, config, device)
+    val_loader = _build_loader(Subset(dataset, val_idx), config, device, shuffle=False) if val_idx else None
+    print(
+        f"[train_drums] {len(train_set)} training / {len(val_idx)} validation patterns, "
+        f"{config.num_workers} loader workers, "
+        f"{torch.get_num_threads()} intra-op / {torch.get_num_interop_threads()} inter-op threads"
+    )
 
     model = DrumModel().to(device)
     criterion = nn.BCELoss()
-    optimizer = torch.optim.Adam(model.parameters(), lr=LEARNING_RATE)
+    optimizer = torch.optim.Adam(model.parameters(), lr=config.learning_rate)
+    run = ResumableRun(CHECKPOINT_DIR, patience=config.patience, min_delta=config.min_delta, every=config.checkpoint_every)
+    start_epoch = run.resume(model, optimizer) if config.resume else 0
+    step_model = maybe_compile(model, config.compile, example_input(model).to(device))
 
-    for epoch in range(EPOCHS):
-        epoch_loss = 0.0
-        for batch in dataloader:
-            batch = batch.to(device)
-            optimizer.zero_grad()
-            outputs = model(batch)
-            loss = criterion(outputs, batch)
-            loss.backward()
-            optimizer.step()
-            epoch_loss += loss.item()
+    for epoch in range(start_epoch, config.epochs):
+        avg_loss, timings = _run_epoch(step_model, dataloader, criterion, optimizer, device)
+        val_loss = _evaluate(step_model, val_loader, criterion, device) if val_loader is not None else avg_loss
+        print(
+            f"[train_drums] Epoch {epoch + 1}/{config.epochs} - loss={avg_loss:.4f} - val_loss={val_loss:.4f} - "
+            f"{timings.samples_per_second:.0f} samples/s - data wait {timings.data_wait:.2f}s - "
+            f"compute {timings.compute:.2f}s"
+        )
+        if progress is not None:
+            progress({"event": "epoch", "epoch": epoch + 1, "epochs": config.epochs, "loss": avg_loss, "val_loss": val_loss})
+        if run.end_epoch(model, optimizer, epoch, val_loss):
+            print(f"[train_drums] Early stopping: no improvement for {config.patience} epochs.")
+            break
+
+    ckpt_path = run.finish(model, CHECKPOINT_DIR, "drums")
+    print(
+        f"[train_drums] Saved best checkpoint (epoch {run.early_stopping.best_epoch + 1}, "
+        f"val_loss={run.early_stopping.best:.4f}) to {ckpt_path}"
+    )
+    if progress is not None:
+        progress({"event": "checkpoint", "path": str(ckpt_path)})
+    return ckpt_path
 
-        avg_loss = epoch_loss / max(1, len(dataloader))
-        print(f"[train_drums] Epoch {epoch + 1}/{EPOCHS} - loss={avg_loss:.4f}")
 
-    checkpoint_dir = Path(__file__).resolve().parent.parent / "models" / "checkpoints" / "drums"
-    checkpoint_dir.mkdir(parents=True, exist_ok=True)
-    ckpt_path = checkpoint_dir / "drums.pt"
-    torch.save(model.state_dict(), ckpt_path)
-    print(f"[train_drums] Saved checkpoint to {ckpt_path}")
+def main() -> None:
+    defaults = DrumTrainingConfig()
+    parser = argparse.ArgumentParser(description="Train the drum pattern model")
+    parser.add_argument("--epochs", type=int, default=defaults.epochs)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--learning-rate", type=float, default=defaults.learning_rate)
+    parser.add_argument("--num-workers", type=int, default=defaults.num_workers)
+    parser.add_argument("--prefetch-factor", type=int, default=defaults.prefetch_factor)
+    parser.add_argument("--no-persistent-workers", action="store_true")
+    parser.add_argument("--pin-memory", action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument("--intra-op-threads", type=int, default=None)
+    parser.add_argument("--inter-op-threads", type=int, default=None)
+    parser.add_argument("--compile", action="store_true", help="Wrap the model in torch.compile when available")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--val-fraction", type=float, default=defaults.val_fraction)
+    parser.add_argument("--patience", type=int, default=defaults.patience, help="Epochs without improvement before stopping; 0 disables")
+    parser.add_argument("--checkpoint-every", type=int, default=defaults.checkpoint_every)
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an interrupted run's checkpoint")
+    parser.add_argument("--json-progress", action="store_true", help="Emit per-epoch progress as JSON lines")
+    args = parser.parse_args()
+    checkpoint = train(
+        DrumTrainingConfig(
+            batch_size=args.batch_size,
+            epochs=args.epochs,
+            learning_rate=args.learning_rate,
+            num_workers=args.num_workers,
+            prefetch_factor=args.prefetch_factor,
+            persistent_workers=not args.no_persistent_workers,
+            pin_memory=args.pin_memory,
+            intra_op_threads=args.intra_op_threads,
+            inter_op_threads=args.inter_op_threads,
+            compile=args.compile,
+            seed=args.seed,
+            val_fraction=args.val_fraction,
+            patience=args.patience,
+            checkpoint_every=args.checkpoint_every,
+            resume=not args.no_resume,
+        ),
+        progress=emit_json_progress if args.json_progress else None,
+    )
+    if checkpoint is None:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    train()
+    main()
@@ -7,9 +7,9 @@ from pathlib import Path
 import torch
 from torch.optim import AdamW
 
-from ..models.registry import ModelRegistry
-from .data_pipeline import DataPipeline
-from .utils import resolve_device, save_checkpoint, seed_everything
+from models.registry import ModelRegistry
+from .data_pipeline import BucketBatchSampler, DataPipeline
+from .utils import ProgressFn, ResumableRun, resolve_device, seed_everything, split_indices
 
 
 @dataclass
@@ -20,9 +20,44 @@ class TrainingConfig:
     batch_size: int = 32
     learning_rate: float = 1e-4
     seed: int = 42
+    num_workers: int = 2
+    prefetch_factor: int = 2
+    bucket_by_length: bool = True
+    val_fraction: float = 0.1
+    patience: int = 3
+    min_delta: float = 0.0
+    checkpoint_every: int = 1
+    resume: bool = True
 
 
-def train(config: TrainingConfig) -> Path:
+def masked_mse(outputs: torch.Tensor, targets: torch.Tensor, mask: torch.Tensor) -> torch.Tensor:
+    """Mean squared error over real (unpadded) steps only."""
+    weights = mask.unsqueeze(-1).to(outputs.dtype)
+    denom = weights.sum() * outputs.shape[-1]
+    return (((outputs - targets) ** 2) * weights).sum() / denom.clamp_min(1.0)
+
+
+def _step_batches(model, loader, device, optimizer=None) -> float:
+    """One pass over ``loader``; trains when an optimizer is given, otherwise only evaluates."""
+    total = 0.0
+    batches = 0
+    for inputs, targets, mask in loader:
+        inputs = inputs.to(device, non_blocking=True)
+        targets = targets.to(device, non_blocking=True)
+        mask = mask.to(device, non_blocking=True)
+        if optimizer is not None:
+            optimizer.zero_grad()
+        outputs = model(inputs, src_key_padding_mask=~mask)
+        loss = masked_mse(outputs, targets, mask)
+        if optimizer is not None:
+            loss.backward()
+            optimizer.step()
+        total += loss.item()
+        batches += 1
+    return total / max(1, batches)
+
+
+def train(config: TrainingConfig, progress: ProgressFn | None = None) -> Path:
     seed_everything(config.seed)
     device = resolve_device()
 
@@ -30,23 +65,42 @@ def train(config: TrainingConfig) -> Path:
     registry.load_latest()
     model = registry.get_model().to(device)
     pipeline = DataPipeline(config.data_dir)
+    train_idx, val_idx = split_indices(len(pipeline), config.val_fraction, config.seed)
+    loader_options = dict(
+        batch_size=config.batch_size,
+        seed=config.seed,
+        bucket_by_length=config.bucket_by_length,
+        num_workers=config.num_workers,
+        prefetch_factor=config.prefetch_factor,
+        pin_memory=device.type == "cuda",
+    )
+    loader = pipeline.loader(indices=train_idx if val_idx else None, **loader_options)
+    val_loader = pipeline.loader(indices=val_idx, shuffle=False, **loader_options) if val_idx else None
     optimizer = AdamW(model.parameters(), lr=config.learning_rate)
-    loss_fn = torch.nn.MSELoss()
 
-    for _epoch in range(config.epochs):
-        for inputs, targets in pipeline.dataset():
-            inputs = inputs.to(device)
-            targets = targets.to(device)
-            optimizer.zero_grad()
-            outputs = model(inputs)
-            loss = loss_fn(outputs, targets)
-            loss.backward()
-            optimizer.step()
-
-    tag = dt.datetime.utcnow().strftime("ckpt-%Y%m%d-%H%M%S")
-    return save_checkpoint(model.cpu(), config.checkpoint_dir, tag)
+    run = ResumableRun(config.checkpoint_dir, patience=config.patience, min_delta=config.min_delta, every=config.checkpoint_every)
+    start_epoch = run.resume(model, optimizer) if config.resume else 0
+    if isinstance(loader.batch_sampler, BucketBatchSampler):
+        loader.batch_sampler.epoch = start_epoch
 
+    model.train()
+    for epoch in range(start_epoch, config.epochs):
+        train_loss = _step_batches(model, loader, device, optimizer)
+        val_loss = train_loss
+        if val_loader is not None:
+            model.eval()
+            with torch.no_grad():
+                val_loss = _step_batches(model, val_loader, device)
+            model.train()
+        print(f"[trainer] Epoch {epoch + 1}/{config.epochs} - loss={train_loss:.4f} - val_loss={val_loss:.4f}")
+        if progress is not None:
+            progress({"event": "epoch", "epoch": epoch + 1, "epochs": config.epochs, "loss": train_loss, "val_loss": val_loss})
+        if run.end_epoch(model, optimizer, epoch, val_loss):
+            print(f"[trainer] Early stopping: no improvement for {config.patience} epochs.")
+            break
 
-def schedule_training_job() -> None:
-    config = TrainingConfig()
-    train(config)
+    tag = dt.datetime.utcnow().strftime("ckpt-%Y%m%d-%H%M%S")
+    path = run.finish(model.cpu(), config.checkpoint_dir, tag)
+    if progress is not None:
+        progress({"event": "checkpoint", "path": str(path)})
+    return path
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+import json
+import math
+import os
 import random
+import shutil
+import sys
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
 
+import numpy as np
 import torch
 
 
@@ -12,13 +19,220 @@ def resolve_device() -> torch.device:
 
 def seed_everything(seed: int) -> None:
     random.seed(seed)
+    np.random.seed(seed)
     torch.manual_seed(seed)
     if torch.cuda.is_available():
         torch.cuda.manual_seed_all(seed)
 
 
-def save_checkpoint(model: torch.nn.Module, checkpoint_dir: Path, tag: str) -> Path:
+def make_generator(seed: int) -> torch.Generator:
+    """Generator for DataLoader shuffling, independent of the global RNG state."""
+    generator = torch.Generator()
+    generator.manual_seed(seed)
+    return generator
+
+
+def seed_worker(_worker_id: int) -> None:
+    """DataLoader ``worker_init_fn``: derive numpy/random seeds from the worker's torch seed."""
+    worker_seed = torch.initial_seed() % 2**32
+    np.random.seed(worker_seed)
+    random.seed(worker_seed)
+
+
+def init_loader_worker(worker_id: int) -> None:
+    """``worker_init_fn`` that seeds the worker and keeps it to one intra-op thread.
+
+    Every worker would otherwise start as many threads as the main process
+    and oversubscribe the cores the training step needs.
+    """
+    seed_worker(worker_id)
+    torch.set_num_threads(1)
+
+
+def configure_threads(intra_op: int | None = None, inter_op: int | None = None) -> None:
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError as exc:  # only allowed before the first parallel op
+            print(f"[training] Keeping {torch.get_num_interop_threads()} inter-op threads: {exc}")
+
+
+def maybe_compile(model: torch.nn.Module, enabled: bool, example: torch.Tensor | None = None) -> torch.nn.Module:
+    """``torch.compile`` the model when asked and supported, otherwise return it unchanged.
+
+    ``torch.compile`` is lazy: backend and toolchain errors only surface on the
+    first call. With ``example`` a warm-up forward and backward pass runs here,
+    so such a failure falls back to the eager ``model`` instead of crashing the
+    first epoch. The warm-up gradients are cleared afterwards.
+    """
+    if not enabled:
+        return model
+    compile_fn = getattr(torch, "compile", None)
+    if compile_fn is None:
+        print("[training] torch.compile is not available in this torch build; running eagerly.")
+        return model
+    try:
+        compiled = compile_fn(model)
+        if example is not None:
+            compiled(example).float().sum().backward()
+    except Exception as exc:  # backend/toolchain problems should not stop training
+        print(f"[training] torch.compile failed ({exc}); running eagerly.")
+        return model
+    finally:
+        model.zero_grad(set_to_none=True)
+    return compiled
+
+
+RESUME_DIRNAME = "resume"
+
+ProgressFn = Callable[[Dict[str, Any]], None]
+
+
+def emit_json_progress(event: Dict[str, Any]) -> None:
+    """Progress sink for ``--json-progress``: one JSON object per stdout line, read by the job runner."""
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+def save_checkpoint(
+    model: torch.nn.Module,
+    checkpoint_dir: Path,
+    tag: str,
+    optimizer: torch.optim.Optimizer | None = None,
+    epoch: int | None = None,
+    state: Dict[str, Any] | None = None,
+) -> Path:
+    """Write ``{"state_dict": ...}`` plus optional optimizer/epoch/loop state to ``<tag>.pt``.
+
+    The file is written next to its destination and renamed into place, so a
+    crash mid-save leaves the previous checkpoint intact.
+    """
     checkpoint_dir.mkdir(parents=True, exist_ok=True)
     path = checkpoint_dir / f"{tag}.pt"
-    torch.save({"state_dict": model.state_dict()}, path)
+    payload: Dict[str, Any] = {"state_dict": model.state_dict()}
+    if optimizer is not None:
+        payload["optimizer"] = optimizer.state_dict()
+    if epoch is not None:
+        payload["epoch"] = epoch
+        payload["rng_state"] = torch.get_rng_state()
+    if state:
+        payload["state"] = state
+    tmp_path = path.with_suffix(".pt.tmp")
+    torch.save(payload, tmp_path)
+    os.replace(tmp_path, path)
     return path
+
+
+def load_checkpoint(
+    path: Path,
+    model: torch.nn.Module,
+    optimizer: torch.optim.Optimizer | None = None,
+) -> Dict[str, Any]:
+    """Restore what ``save_checkpoint`` wrote and return the whole payload."""
+    payload = torch.load(path, map_location="cpu")
+    if not isinstance(payload, dict) or "state_dict" not in payload:
+        payload = {"state_dict": payload}
+    model.load_state_dict(payload["state_dict"])
+    if optimizer is not None and "optimizer" in payload:
+        optimizer.load_state_dict(payload["optimizer"])
+    if "rng_state" in payload:
+        torch.set_rng_state(payload["rng_state"])
+    return payload
+
+
+class EarlyStopping:
+    """Track the best validation loss and stop after ``patience`` epochs without improvement."""
+
+    def __init__(self, patience: int = 5, min_delta: float = 0.0) -> None:
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best = math.inf
+        self.best_epoch = -1
+        self.bad_epochs = 0
+
+    def step(self, loss: float, epoch: int) -> bool:
+        """Record one epoch; returns True when it is a new best."""
+        if loss < self.best - self.min_delta:
+            self.best = loss
+            self.best_epoch = epoch
+            self.bad_epochs = 0
+            return True
+        self.bad_epochs += 1
+        return False
+
+    @property
+    def should_stop(self) -> bool:
+        return self.patience > 0 and self.bad_epochs >= self.patience
+
+    def state_dict(self) -> Dict[str, Any]:
+        return {"best": self.best, "best_epoch": self.best_epoch, "bad_epochs": self.bad_epochs}
+
+    def load_state_dict(self, state: Dict[str, Any]) -> None:
+        self.best = float(state["best"])
+        self.best_epoch = int(state["best_epoch"])
+        self.bad_epochs = int(state["bad_epochs"])
+
+
+class ResumableRun:
+    """Checkpoint bookkeeping shared by the training loops.
+
+    ``last.pt`` (model, optimizer, epoch, early-stopping state) and ``best.pt``
+    live in ``<checkpoint_dir>/resume``. That keeps them out of the registry's
+    ``*.pt`` glob. A run that finishes clears the directory, so only an
+    interrupted run resumes.
+    """
+
+    def __init__(self, checkpoint_dir: Path, patience: int = 5, min_delta: float = 0.0, every: int = 1) -> None:
+        self.every = max(1, every)
+        self.resume_dir = checkpoint_dir / RESUME_DIRNAME
+        self.last_path = self.resume_dir / "last.pt"
+        self.best_path = self.resume_dir / "best.pt"
+        self.early_stopping = EarlyStopping(patience=patience, min_delta=min_delta)
+
+    def resume(self, model: torch.nn.Module, optimizer: torch.optim.Optimizer) -> int:
+        """Load ``last.pt`` if present; returns the first epoch still to run."""
+        if not self.last_path.exists():
+            return 0
+        payload = load_checkpoint(self.last_path, model, optimizer)
+        self.early_stopping.load_state_dict(payload.get("state", {}).get("early_stopping", self.early_stopping.state_dict()))
+        epoch = int(payload.get("epoch", -1)) + 1
+        print(f"[training] Resuming from {self.last_path} at epoch {epoch + 1}")
+        return epoch
+
+    def end_epoch(self, model: torch.nn.Module, optimizer: torch.optim.Optimizer, epoch: int, val_loss: float) -> bool:
+        """Record ``val_loss``, keep ``best.pt`` current and write ``last.pt`` every ``every`` epochs.
+
+        Returns True when early stopping says to stop.
+        """
+        if self.early_stopping.step(val_loss, epoch):
+            save_checkpoint(model, self.resume_dir, "best", state={"epoch": epoch, "val_loss": val_loss})
+        if (epoch + 1) % self.every:
+            return self.early_stopping.should_stop
+        save_checkpoint(
+            model,
+            self.resume_dir,
+            "last",
+            optimizer=optimizer,
+            epoch=epoch,
+            state={"early_stopping": self.early_stopping.state_dict()},
+        )
+        return self.early_stopping.should_stop
+
+    def finish(self, model: torch.nn.Module, checkpoint_dir: Path, tag: str) -> Path:
+        """Load the best weights into ``model``, publish them as ``<tag>.pt`` and clear the resume state."""
+        if self.best_path.exists():
+            load_checkpoint(self.best_path, model)
+        path = save_checkpoint(model, checkpoint_dir, tag)
+        shutil.rmtree(self.resume_dir, ignore_errors=True)
+        return path
+
+
+def split_indices(count: int, val_fraction: float, seed: int) -> Tuple[List[int], List[int]]:
+    """Deterministic train/validation split; validation stays empty when there is too little data."""
+    val_count = int(count * val_fraction)
+    if val_fraction > 0 and count >= 2:
+        val_count = max(1, val_count)
+    order = torch.randperm(count, generator=make_generator(seed)).tolist()
+    return sorted(order[val_count:]), sorted(order[:val_count])
@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-import os
 from pathlib import Path
 from shutil import move
-from typing import Iterable
-
-import pretty_midi
+from typing import List
 
 from .dataset_config import DATASET_ROOT
+from .dataset_index import get_dataset_index
+from .ingest import MidiSummary, get_ingest_engine
 
 _DEFAULT_DATA_DIR = Path(__file__).resolve().parent / "data" / "drums"
 DATASET_ROOT_PATH = Path(DATASET_ROOT)
@@ -18,25 +17,15 @@ INVALID_DIR = DATASET_ROOT_PATH.parent / "invalid"
 REQUIRED_PITCHES = {36, 38, 42, 46, 39, 48}
 
 
-def _iter_midi_files() -> Iterable[Path]:
+def _iter_midi_files() -> List[Path]:
     if not DATASET_ROOT_PATH.exists():
         print(f"[validate_drums] Dataset root {DATASET_ROOT_PATH} does not exist.")
         return []
-    for dirpath, _, filenames in os.walk(DATASET_ROOT_PATH):
-        for filename in filenames:
-            candidate = Path(dirpath) / filename
-            if candidate.suffix.lower() in {".mid", ".midi"}:
-                yield candidate
+    return get_dataset_index(DATASET_ROOT_PATH).files()
 
 
-def _has_required_pitches(midi: pretty_midi.PrettyMIDI) -> bool:
-    for instrument in midi.instruments:
-        if not instrument.is_drum:
-            continue
-        for note in instrument.notes:
-            if note.pitch in REQUIRED_PITCHES:
-                return True
-    return False
+def _has_required_pitches(summary: MidiSummary) -> bool:
+    return not REQUIRED_PITCHES.isdisjoint(summary.drum_pitches)
 
 
 def validate_dataset(move_invalid: bool = True) -> None:
@@ -45,19 +34,17 @@ def validate_dataset(move_invalid: bool = True) -> None:
     invalid = []
     missing_required = []
 
-    for midi_path in _iter_midi_files():
+    for result in get_ingest_engine().summarize(list(_iter_midi_files())):
         total += 1
-        try:
-            midi = pretty_midi.PrettyMIDI(str(midi_path))
-        except (OSError, EOFError, ValueError, KeyError) as exc:
-            print(f"[validate_drums] Invalid MIDI {midi_path.name}: {exc}")
-            invalid.append(midi_path)
+        if not result.ok:
+            print(f"[validate_drums] Invalid MIDI {result.path.name}: {result.error}")
+            invalid.append(result.path)
             continue
 
-        if _has_required_pitches(midi):
+        if _has_required_pitches(result.value):
             valid += 1
         else:
-            missing_required.append(midi_path)
+            missing_required.append(result.path)
 
     if move_invalid:
         INVALID_DIR.mkdir(parents=True, exist_ok=True)